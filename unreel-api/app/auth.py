@@ -1,9 +1,14 @@
 import firebase_admin
-from firebase_admin import auth, credentials
-from fastapi import Header, HTTPException, status
+from firebase_admin import credentials
+from fastapi import Header, HTTPException, Query, status
+from typing import Optional
+import base64
+import hashlib
+import hmac
 import logging
 import os
 import json
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +16,7 @@ logger = logging.getLogger(__name__)
 # You should provide the path to your service account key file in the .env file
 # or provide the service account JSON as a string in the FIREBASE_SERVICE_ACCOUNT_JSON setting.
 from app.core.config import settings
+from app.services.token_cache_service import verified_token_cache
 
 def initialize_firebase():
     """Helper to initialize firebase if not already done."""
@@ -63,7 +69,8 @@ async def get_current_user(authorization: str = Header(None)):
     token = authorization.split("Bearer ")[1]
     
     try:
-        decoded_token = auth.verify_id_token(token)
+        # Verified once per token (off the event loop), then served from memory until it expires
+        decoded_token = await verified_token_cache.verify(token)
         return decoded_token
     except Exception as e:
         logger.error(f"Error verifying Firebase ID token: {e}")
@@ -71,3 +78,42 @@ async def get_current_user(authorization: str = Header(None)):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid or expired token: {str(e)}",
         )
+
+def create_stream_token(uid: str, analysis_id: str) -> str:
+    """
+    Sign a short-lived token for one analysis' event stream.
+
+    Browsers' EventSource cannot send an Authorization header, so the
+    events route also accepts this token as ?token=. It only opens the
+    stream of that analysis and expires after STREAM_TOKEN_TTL_SECONDS.
+    """
+    expires = int(time.time()) + settings.STREAM_TOKEN_TTL_SECONDS
+    payload = base64.urlsafe_b64encode(f"{uid}:{expires}".encode("utf-8")).decode("ascii").rstrip("=")
+    return f"{payload}.{_stream_signature(payload, analysis_id)}"
+
+def verify_stream_token(token: str, analysis_id: str) -> dict:
+    """Check a token from create_stream_token for an analysis and return its user ({'uid'})."""
+    try:
+        payload, signature = token.rsplit(".", 1)
+        if not hmac.compare_digest(signature, _stream_signature(payload, analysis_id)):
+            raise ValueError("bad signature")
+        uid, expires = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)).decode("utf-8").rsplit(":", 1)
+        if int(expires) < time.time():
+            raise ValueError("expired")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Invalid or expired stream token: {str(e)}",
+        )
+    return {"uid": uid}
+
+def _stream_signature(payload: str, analysis_id: str) -> str:
+    message = f"{analysis_id}.{payload}".encode("utf-8")
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+async def get_stream_user(analysis_id: str, token: Optional[str] = Query(None),
+                          authorization: str = Header(None)):
+    """Authenticate an event stream by its Bearer token, or by a stream token (?token=) for EventSource clients."""
+    if token and not authorization:
+        return verify_stream_token(token, analysis_id)
+    return await get_current_user(authorization)
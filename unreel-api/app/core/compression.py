@@ -0,0 +1,178 @@
+import gzip
+import logging
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.services.response_cache_service import ResponseCache
+
+try:
+    import brotli
+except ImportError:  # Optional encoder
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional encoder
+    zstandard = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Server preference when the client accepts several encodings equally
+_PREFERENCE = ["zstd", "br", "gzip"]
+
+_COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "application/xml", "text/")
+
+# Compressed bodies of ETagged responses are reused until the TTL, keyed by path + ETag + encoding
+COMPRESSED_CACHE_TTL_SECONDS = 3600
+
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, in server preference order."""
+    installed = {"zstd": zstandard is not None, "br": brotli is not None, "gzip": True}
+    return [encoding for encoding in _PREFERENCE if installed[encoding]]
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a content coding from an Accept-Encoding header (RFC 9110).
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+
+    Returns:
+        "zstd", "br" or "gzip", or None to send the body uncompressed
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    candidates = [
+        (weights.get(encoding, weights.get("*", 0.0)), -rank, encoding)
+        for rank, encoding in enumerate(available_encodings())
+    ]
+    weight, _, encoding = max(candidates)
+    return encoding if weight > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with levels tuned for latency rather than ratio."""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 keeps the output deterministic for a given body
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli/zstd compression for buffered responses.
+
+    Bodies under COMPRESSION_MIN_BYTES, non-text media types, responses
+    that are already encoded and event streams pass through untouched.
+    A response with an ETag is immutable for that ETag (finished analyses,
+    chat threads), so its compressed body is cached and reused; the ETag is
+    sent weak, as the compressed bytes differ per encoding.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = None, cache: Optional[ResponseCache] = None):
+        self.app = app
+        self.minimum_size = minimum_size or settings.COMPRESSION_MIN_BYTES
+        self.cache = cache or ResponseCache(
+            max_bytes=settings.COMPRESSION_CACHE_MAX_BYTES, ttl_seconds=COMPRESSED_CACHE_TTL_SECONDS
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                if message["status"] == 304:
+                    # Validates a compressed 200, so it carries the same (weak) ETag
+                    headers = self._weaken_etag(MutableHeaders(raw=list(message["headers"])))
+                    message = {**message, "headers": headers.raw}
+                if not self._compressible(message):
+                    passthrough = True
+                    await send(message)
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            headers, body = await self._encode(start, b"".join(chunks), encoding, scope["path"])
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, start: Message) -> bool:
+        if start["status"] < 200 or start["status"] in (204, 304):
+            return False
+        headers = Headers(raw=start["headers"])
+        content_type = headers.get("content-type", "")
+        if "content-encoding" in headers or content_type.startswith("text/event-stream"):
+            return False
+        if not content_type.startswith(_COMPRESSIBLE_TYPES):
+            return False
+        content_length = headers.get("content-length")
+        return content_length is None or int(content_length) >= self.minimum_size
+
+    async def _encode(self, start: Message, body: bytes, encoding: str, path: str) -> Tuple[MutableHeaders, bytes]:
+        headers = MutableHeaders(raw=list(start["headers"]))
+        headers.add_vary_header("Accept-Encoding")
+        if len(body) < self.minimum_size:
+            return headers, body
+
+        etag = headers.get("etag")
+        key = f"{path} {etag}"
+        cached = await self.cache.get("compressed", key, encoding) if etag else None
+        if cached:
+            compressed = cached["body"]
+        else:
+            compressed = compress(body, encoding)
+            if etag:
+                self.cache.put("compressed", key, encoding, etag, compressed)
+        if len(compressed) >= len(body):
+            return headers, body
+
+        headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(compressed))
+        return self._weaken_etag(headers), compressed
+
+    @staticmethod
+    def _weaken_etag(headers: MutableHeaders) -> MutableHeaders:
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        return headers
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from fastapi import Response
+
+# Clients may keep the body but must revalidate it (If-None-Match) before reuse
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag (RFC 9110).
+
+    Args:
+        if_none_match: Raw If-None-Match header value
+        etag: Current ETag of the resource
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == current for tag in if_none_match.split(","))
+
+
+def conditional_json_response(body: bytes, etag: str, if_none_match: Optional[str]) -> Response:
+    """
+    Return a serialized JSON body with its ETag, or 304 Not Modified if the client already has it.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """
+    Encode the keyset position of the last row on a page as an opaque cursor.
+
+    Args:
+        created_at: createdAt of the last row returned
+        row_id: id of the last row returned (tie-breaker for equal timestamps)
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
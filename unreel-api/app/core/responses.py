@@ -0,0 +1,47 @@
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional fast encoder
+    orjson = None
+
+
+def serialize_json(data: Any) -> bytes:
+    """
+    Serialize a response payload to compact UTF-8 JSON.
+
+    Uses orjson when installed (datetimes, dicts and lists are encoded
+    natively, without a jsonable_encoder pass); anything else, and the
+    stdlib fallback, goes through jsonable_encoder so the output matches
+    FastAPI's JSONResponse.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        jsonable_encoder(data), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def deserialize_json(data: bytes) -> Any:
+    """Parse UTF-8 JSON (orjson when installed)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with serialize_json.
+
+    Returning one from a handler also skips response_model validation, so
+    it is meant for payloads that are already in the response shape (such
+    as AnalysisService.to_response output, whose lens data is validated
+    once when the analysis is saved).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return serialize_json(content)
@@ -0,0 +1,33 @@
+import json
+from typing import Any, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+# Comment line sent periodically so proxies do not close idle event streams
+SSE_KEEPALIVE = ": keep-alive\n\n"
+
+# Headers for text/event-stream responses (disable proxy buffering, e.g. nginx)
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """
+    Format a single Server-Sent Events message.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+        event_id: Optional id, echoed back by browsers as Last-Event-ID on reconnect
+
+    Returns:
+        The wire-format SSE message
+    """
+    message = ""
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    message += f"event: {event}\n"
+    message += f"data: {json.dumps(jsonable_encoder(data))}\n\n"
+    return message
@@ -1,15 +1,26 @@
 import logging
-from typing import Generator
+from typing import AsyncGenerator
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker, Session
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
 
 from app.core.config import settings
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Create the database engine with connection pooling
+
+def _async_database_url(url: str) -> str:
+    """Map the configured (sync) DATABASE_URL to its asyncio driver, e.g. postgresql:// -> postgresql+asyncpg://."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}.get(backend)
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False) if driver else url
+
+
+# Sync engine: startup only (create_all and the column migrations)
 engine = create_engine(
     settings.DATABASE_URL,
     pool_size=10,
@@ -18,22 +29,32 @@ engine = create_engine(
     echo=False  # Set to True for SQL debugging
 )
 
-# Create a configured "Session" class
+# Create a configured "Session" class for the sync engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by request handlers and background jobs, so database
+# round trips never block the event loop
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    echo=False
+)
+
+# Objects stay usable after commit (no implicit refresh round trip on attribute access)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create a Base class for declarative models
 Base = declarative_base()
 
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependency to get DB session.
-    
+    Dependency to get an async DB session.
+
     Yields:
-        Database session
+        Async database session
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -1,10 +1,41 @@
 import logging
-from sqlalchemy import text
-from app.database import engine
+import time
+from datetime import date
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex
+from app.core.config import settings
+from app.database import Base, engine
+from app.models import Analysis, AnalysisBlob, Translation
+from app.services.blob_store_service import encode_blob, extract_rag_results, RAG_LENS_FIELDS
+from app.services.retention_service import (
+    PARTITIONED_TABLES, add_months, default_partition_ddl, monthly_partitions, partition_ddl
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Ledger of applied migrations (outside Base.metadata: managed by run_migrations only)
+ledger_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", ledger_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("appliedAt", DateTime, nullable=False, server_default=func.now()),
+    Column("durationMs", Integer, nullable=False),
+)
+
+# Session-level Postgres advisory lock serializing migrations across workers ("unrl")
+MIGRATION_LOCK_KEY = 0x756E726C
+
+def create_tables():
+    """
+    Create the tables (and indexes) of every model that doesn't exist yet.
+    """
+    Base.metadata.create_all(bind=engine)
+    logger.info("Database tables created successfully")
+
 def add_detected_language_column():
     """
     Add the detectedLanguage column to the analyses table if it doesn't exist.
@@ -69,6 +100,121 @@ def add_user_id_column():
         logger.error(f"Error adding userId column: {e}")
         raise
 
+def add_batch_id_column():
+    """
+    Add the indexed batchId column to the analyses table if it doesn't exist.
+    """
+    try:
+        # Check if the column exists
+        check_column_sql = """
+        SELECT column_name 
+        FROM information_schema.columns 
+        WHERE table_name='analyses' AND column_name='batchId';
+        """
+        
+        with engine.connect() as connection:
+            result = connection.execute(text(check_column_sql))
+            column_exists = result.fetchone()
+            
+            if not column_exists:
+                # Add the column and its index if they don't exist
+                connection.execute(text("""
+                ALTER TABLE analyses 
+                ADD COLUMN "batchId" VARCHAR;
+                """))
+                connection.execute(text("""
+                CREATE INDEX IF NOT EXISTS "ix_analyses_batchId" ON analyses ("batchId");
+                """))
+                connection.commit()
+                logger.info("Successfully added batchId column to analyses table")
+            else:
+                logger.info("batchId column already exists in analyses table")
+                
+    except Exception as e:
+        logger.error(f"Error adding batchId column: {e}")
+        raise
+
+def add_analysis_version_column():
+    """
+    Add the version column (row version used in ETags) to the analyses table if it doesn't exist.
+    """
+    try:
+        # Check if the column exists
+        check_column_sql = """
+        SELECT column_name 
+        FROM information_schema.columns 
+        WHERE table_name='analyses' AND column_name='version';
+        """
+        
+        with engine.connect() as connection:
+            result = connection.execute(text(check_column_sql))
+            column_exists = result.fetchone()
+            
+            if not column_exists:
+                # Add the column if it doesn't exist
+                add_column_sql = """
+                ALTER TABLE analyses 
+                ADD COLUMN "version" INTEGER NOT NULL DEFAULT 1;
+                """
+                connection.execute(text(add_column_sql))
+                connection.commit()
+                logger.info("Successfully added version column to analyses table")
+            else:
+                logger.info("version column already exists in analyses table")
+                
+    except Exception as e:
+        logger.error(f"Error adding version column: {e}")
+        raise
+
+def add_history_index():
+    """
+    Add the composite (userId, createdAt DESC, id DESC) index used by the paginated history listing.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS "ix_analyses_userId_createdAt"
+            ON analyses ("userId", "createdAt" DESC, id DESC);
+            """))
+            connection.commit()
+            logger.info("History index on analyses is in place")
+                
+    except Exception as e:
+        logger.error(f"Error adding history index: {e}")
+        raise
+
+def add_chat_persona_column():
+    """
+    Add the persona column to the chat_messages table if it doesn't exist.
+    """
+    try:
+        # Check if the column exists
+        check_column_sql = """
+        SELECT column_name 
+        FROM information_schema.columns 
+        WHERE table_name='chat_messages' AND column_name='persona';
+        """
+        
+        with engine.connect() as connection:
+            result = connection.execute(text(check_column_sql))
+            column_exists = result.fetchone()
+            
+            if not column_exists:
+                # Add the column if it doesn't exist
+                add_column_sql = """
+                ALTER TABLE chat_messages 
+                ADD COLUMN "persona" TEXT;
+                """
+                connection.execute(text(add_column_sql))
+                connection.commit()
+                logger.info("Successfully added persona column to chat_messages table")
+            else:
+                logger.info("persona column already exists in chat_messages table")
+                
+    except Exception as e:
+        logger.error(f"Error adding persona column: {e}")
+        raise
+
 def add_multi_lens_columns():
     """
     Add the multi-lens JSON columns to the analyses table if they don't exist.
@@ -110,7 +256,448 @@ def add_multi_lens_columns():
         logger.error(f"Error adding multi-lens columns: {e}")
         raise
 
+def convert_lens_columns_to_jsonb():
+    """
+    Convert the lens/content JSON columns of the analyses table to JSONB and add their indexes.
+    
+    Each conversion rewrites the table under an exclusive lock, so it only
+    runs for columns that are still plain JSON. Indexes: GIN (jsonb_path_ops)
+    on availableFeatures and factCheck, and one partial history index per
+    availableFeatures flag.
+    """
+    columns_to_convert = [
+        "keyTopics",
+        "mentionedResources",
+        "locationContext",
+        "educationalInsights",
+        "shoppingItems",
+        "factCheck",
+        "enhancedResources",
+        "musicContext",
+        "availableFeatures"
+    ]
+    
+    try:
+        with engine.connect() as connection:
+            json_columns = {
+                row[0] for row in connection.execute(text("""
+                SELECT column_name 
+                FROM information_schema.columns 
+                WHERE table_name='analyses' AND data_type='json';
+                """))
+            }
+            
+            for col in columns_to_convert:
+                if col in json_columns:
+                    connection.execute(text(f"""
+                    ALTER TABLE analyses 
+                    ALTER COLUMN "{col}" TYPE JSONB USING "{col}"::jsonb;
+                    """))
+                    logger.info(f"Successfully converted {col} column to JSONB")
+            
+            for index in Analysis.__table__.indexes:
+                if index.name in ("ix_analyses_availableFeatures_gin", "ix_analyses_factCheck_gin") \
+                        or index.name.startswith("ix_analyses_feature_"):
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+            
+            connection.commit()
+            logger.info("Lens columns are JSONB and indexed")
+            
+    except Exception as e:
+        logger.error(f"Error converting lens columns to JSONB: {e}")
+        raise
+
+def add_search_columns():
+    """
+    Add the keyword search columns (searchConfig, searchVector) and the GIN index to the analyses table if they don't exist.
+    
+    Existing analyses are indexed lazily, on each user's first keyword search.
+    """
+    try:
+        with engine.connect() as connection:
+            for col, col_type in (("searchConfig", "VARCHAR"), ("searchVector", "TSVECTOR")):
+                result = connection.execute(text(f"""
+                SELECT column_name 
+                FROM information_schema.columns 
+                WHERE table_name='analyses' AND column_name='{col}';
+                """))
+                if not result.fetchone():
+                    connection.execute(text(f"""
+                    ALTER TABLE analyses 
+                    ADD COLUMN "{col}" {col_type};
+                    """))
+                    logger.info(f"Successfully added {col} column to analyses table")
+            
+            connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS "ix_analyses_searchVector_gin"
+            ON analyses USING gin ("searchVector");
+            """))
+            connection.commit()
+            logger.info("Keyword search columns and index are in place")
+            
+    except Exception as e:
+        logger.error(f"Error adding keyword search columns: {e}")
+        raise
+
+def move_blobs_to_side_table(batch_size: int = 200):
+    """
+    Move transcripts, transcript indexes and raw RAG results out of the analyses rows into analysis_blobs.
+    
+    Runs only while analyses still has the fullTranscript/transcriptIndex
+    columns. Rows are copied (compressed) in id order and committed batch by
+    batch, raw searchResults/searchEvidence are stripped from the lens
+    columns, then the two columns are dropped. Interrupted runs resume
+    safely. Postgres reclaims the old TOAST space as rows are rewritten (or
+    at once with VACUUM FULL analyses, during maintenance).
+    """
+    try:
+        with engine.connect() as connection:
+            AnalysisBlob.__table__.create(connection, checkfirst=True)
+            blob_columns = [
+                row[0] for row in connection.execute(text("""
+                SELECT column_name 
+                FROM information_schema.columns 
+                WHERE table_name='analyses' AND column_name IN ('fullTranscript', 'transcriptIndex');
+                """))
+            ]
+            if not blob_columns:
+                logger.info("Analysis blobs are already in analysis_blobs")
+                return
+            
+            selected = ", ".join(f'"{col}"' for col in blob_columns + RAG_LENS_FIELDS)
+            last_id, moved = "", 0
+            while True:
+                rows = connection.execute(
+                    text(f'SELECT id, {selected} FROM analyses WHERE id > :last_id ORDER BY id LIMIT :batch_size'),
+                    {"last_id": last_id, "batch_size": batch_size}
+                ).mappings().all()
+                if not rows:
+                    break
+                
+                blobs = []
+                for row in rows:
+                    values = {col: row[col] for col in blob_columns if row[col] is not None}
+                    lenses = {field: row[field] for field in RAG_LENS_FIELDS}
+                    rag_results = extract_rag_results(lenses)
+                    if rag_results:
+                        values["ragResults"] = rag_results
+                        connection.execute(
+                            update(Analysis).where(Analysis.id == row["id"])
+                            .values(**{field: lenses[field] for field in rag_results})
+                        )
+                    for kind, value in values.items():
+                        codec, size, data = encode_blob(value)
+                        blobs.append({"analysisId": row["id"], "kind": kind, "codec": codec, "size": size, "data": data})
+                if blobs:
+                    connection.execute(insert(AnalysisBlob).values(blobs).on_conflict_do_nothing())
+                connection.commit()
+                last_id = rows[-1]["id"]
+                moved += len(rows)
+            
+            connection.execute(text(f"""
+            ALTER TABLE analyses 
+            {", ".join(f'DROP COLUMN "{col}"' for col in blob_columns)};
+            """))
+            connection.commit()
+            logger.info(f"Moved blobs of {moved} analyses to analysis_blobs")
+            
+    except Exception as e:
+        logger.error(f"Error moving analysis blobs: {e}")
+        raise
+
+def add_blob_archive_column():
+    """
+    Add the archivePath column (set by the retention job) to analysis_blobs if it doesn't exist.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("""
+            ALTER TABLE analysis_blobs
+            ADD COLUMN IF NOT EXISTS "archivePath" VARCHAR;
+            """))
+            connection.commit()
+            logger.info("archivePath column on analysis_blobs is in place")
+
+    except Exception as e:
+        logger.error(f"Error adding archivePath column: {e}")
+        raise
+
+def add_chat_history_index():
+    """
+    Replace the single-column analysisId index of chat_messages with the (analysisId, createdAt, id) index used by paginated chat history.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS "ix_chat_messages_analysisId_createdAt"
+            ON chat_messages ("analysisId", "createdAt", id);
+            """))
+            connection.execute(text('DROP INDEX IF EXISTS "ix_chat_messages_analysisId";'))
+            connection.commit()
+            logger.info("Chat history index on chat_messages is in place")
+
+    except Exception as e:
+        logger.error(f"Error adding chat history index: {e}")
+        raise
+
+def add_translations_table():
+    """
+    Create the translations table (stored transcript translations) if it doesn't exist.
+    """
+    Translation.__table__.create(bind=engine, checkfirst=True)
+    logger.info("translations table is in place")
+
+def add_chat_complete_column():
+    """
+    Add the complete column (False for partial streamed replies) to chat_messages if it doesn't exist.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("""
+            ALTER TABLE chat_messages
+            ADD COLUMN IF NOT EXISTS complete BOOLEAN NOT NULL DEFAULT TRUE;
+            """))
+            connection.commit()
+            logger.info("complete column on chat_messages is in place")
+
+    except Exception as e:
+        logger.error(f"Error adding complete column: {e}")
+        raise
+
+def add_analysis_heartbeat_columns():
+    """
+    Add the workerId/heartbeatAt columns (owner of a processing analysis) and the index of the stale-job sweep.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("""
+            ALTER TABLE analyses
+            ADD COLUMN IF NOT EXISTS "workerId" VARCHAR,
+            ADD COLUMN IF NOT EXISTS "heartbeatAt" TIMESTAMP;
+            """))
+            connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS "ix_analyses_processing_heartbeatAt"
+            ON analyses ("heartbeatAt") WHERE status = 'processing';
+            """))
+            connection.commit()
+            logger.info("Heartbeat columns on analyses are in place")
+
+    except Exception as e:
+        logger.error(f"Error adding heartbeat columns: {e}")
+        raise
+
+def add_translation_translator_column():
+    """
+    Add the translator column (engine/model that made a translation) to the translations key.
+
+    The engine behind existing rows is unknown, so they are dropped: a
+    stored translation only saves a call to the provider.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("""
+            ALTER TABLE translations
+            ADD COLUMN IF NOT EXISTS translator VARCHAR NOT NULL DEFAULT '';
+            """))
+            connection.execute(text("DELETE FROM translations WHERE translator = '';"))
+            connection.execute(text("""
+            ALTER TABLE translations
+            ALTER COLUMN translator DROP DEFAULT,
+            DROP CONSTRAINT IF EXISTS translations_pkey,
+            ADD PRIMARY KEY ("sourceHash", "targetLanguage", translator);
+            """))
+            connection.commit()
+            logger.info("translator column on translations is in place")
+
+    except Exception as e:
+        logger.error(f"Error adding translator column: {e}")
+        raise
+
+def add_batch_position_column():
+    """
+    Add the batchPosition column (submission order of batch items) to analyses if it doesn't exist.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("""
+            ALTER TABLE analyses
+            ADD COLUMN IF NOT EXISTS "batchPosition" INTEGER;
+            """))
+            connection.commit()
+            logger.info("batchPosition column on analyses is in place")
+
+    except Exception as e:
+        logger.error(f"Error adding batchPosition column: {e}")
+        raise
+
+def add_chat_cached_column():
+    """
+    Add the cached column (True for replies served from the answer cache) to chat_messages if it doesn't exist.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("""
+            ALTER TABLE chat_messages
+            ADD COLUMN IF NOT EXISTS cached BOOLEAN NOT NULL DEFAULT FALSE;
+            """))
+            connection.commit()
+            logger.info("cached column on chat_messages is in place")
+
+    except Exception as e:
+        logger.error(f"Error adding cached column: {e}")
+        raise
+
+def partition_tables(months_ahead: int = None):
+    """
+    Convert analyses and chat_messages into tables range-partitioned by month on "createdAt".
+
+    Offline and opt-in: not part of MIGRATIONS, run by hand with
+    `python -m app.database_migration partition` while every app process is
+    stopped. Each table is rebuilt under an ACCESS EXCLUSIVE lock (copy,
+    drop, rename), so expect downtime proportional to the table size; a
+    5-second lock_timeout makes it fail fast instead of queueing behind a
+    connection that is still open.
+
+    Postgres only. Each table is rebuilt once: a partitioned copy with primary
+    key (id, "createdAt") is created with one partition per month from the
+    oldest row to PARTITION_MONTHS_AHEAD months from now (plus a default
+    partition), the rows are copied over, and it replaces the original in the
+    same transaction, so readers see either table whole. The model indexes
+    are then recreated on the new parent (and cascade to every partition).
+    Later months are added ahead of time by the retention job.
+
+    Trade-off: the database no longer enforces a unique id on its own (ids
+    are application-generated UUIDs), and lookups by id alone probe every
+    partition.
+    """
+    if engine.dialect.name != "postgresql":
+        logger.info("Table partitioning skipped (not PostgreSQL)")
+        return
+    months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    last_month = add_months(date.today().replace(day=1), months_ahead)
+
+    try:
+        with engine.connect() as connection:
+            for table in PARTITIONED_TABLES:
+                relkind = connection.execute(
+                    text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table}
+                ).scalar()
+                if relkind == "p":
+                    logger.info(f"{table} is already partitioned")
+                    continue
+
+                staging = f"{table}_partitioned"
+                connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+                connection.execute(text(f'UPDATE "{table}" SET "createdAt" = now() WHERE "createdAt" IS NULL'))
+                first_month = connection.execute(text(f'SELECT min("createdAt") FROM "{table}"')).scalar()
+                first_month = (first_month.date() if first_month else date.today()).replace(day=1)
+
+                connection.execute(text(f'DROP TABLE IF EXISTS "{staging}" CASCADE'))
+                connection.execute(text(f"""
+                CREATE TABLE "{staging}" (LIKE "{table}" INCLUDING DEFAULTS)
+                PARTITION BY RANGE ("createdAt");
+                """))
+                connection.execute(text(f"""
+                ALTER TABLE "{staging}"
+                ALTER COLUMN "createdAt" SET NOT NULL,
+                ADD CONSTRAINT "{staging}_pkey" PRIMARY KEY (id, "createdAt");
+                """))
+                for name, lower, upper in monthly_partitions(table, first_month, last_month):
+                    connection.execute(text(partition_ddl(table, name, lower, upper, parent=staging)))
+                connection.execute(text(default_partition_ddl(table, parent=staging)))
+
+                connection.execute(text(f'INSERT INTO "{staging}" SELECT * FROM "{table}"'))
+                connection.execute(text(f'DROP TABLE "{table}"'))
+                connection.execute(text(f'ALTER TABLE "{staging}" RENAME TO "{table}"'))
+                connection.execute(text(f'ALTER TABLE "{table}" RENAME CONSTRAINT "{staging}_pkey" TO "{table}_pkey"'))
+                for index in Base.metadata.tables[table].indexes:
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+                connection.commit()
+                logger.info(f"Partitioned {table} by month ({first_month:%Y-%m} to {last_month:%Y-%m})")
+
+    except Exception as e:
+        logger.error(f"Error partitioning tables: {e}")
+        raise
+
+# Ordered, idempotent migrations. Append new ones with the next version; never renumber.
+MIGRATIONS = [
+    (1, "create_tables", create_tables),
+    (2, "add_detected_language_column", add_detected_language_column),
+    (3, "add_user_id_column", add_user_id_column),
+    (4, "add_multi_lens_columns", add_multi_lens_columns),
+    (5, "add_batch_id_column", add_batch_id_column),
+    (6, "add_chat_persona_column", add_chat_persona_column),
+    (7, "add_history_index", add_history_index),
+    (8, "add_analysis_version_column", add_analysis_version_column),
+    (9, "convert_lens_columns_to_jsonb", convert_lens_columns_to_jsonb),
+    (10, "add_search_columns", add_search_columns),
+    (11, "move_blobs_to_side_table", move_blobs_to_side_table),
+    (12, "add_blob_archive_column", add_blob_archive_column),
+    # 13 (partition_tables) is no longer run at startup: it is an offline, opt-in step (see partition_tables)
+    (14, "add_chat_history_index", add_chat_history_index),
+    (15, "add_translations_table", add_translations_table),
+    (16, "add_chat_complete_column", add_chat_complete_column),
+    (17, "add_analysis_heartbeat_columns", add_analysis_heartbeat_columns),
+    (18, "add_translation_translator_column", add_translation_translator_column),
+    (19, "add_batch_position_column", add_batch_position_column),
+    (20, "add_chat_cached_column", add_chat_cached_column),
+]
+
+def schema_version() -> int:
+    """
+    Highest applied migration version (0 if the ledger doesn't exist yet), in a single query.
+    """
+    try:
+        with engine.connect() as connection:
+            return connection.execute(select(func.coalesce(func.max(schema_migrations.c.version), 0))).scalar()
+    except DBAPIError:
+        # No ledger yet: a fresh database, or one migrated by the old per-boot probes
+        return 0
+
+def run_migrations():
+    """
+    Apply pending migrations, in version order, once.
+    
+    Boot costs one version query when the schema is current. Otherwise the
+    first worker takes a Postgres advisory lock (the others wait on it),
+    re-reads the ledger and applies each pending migration, recording it in
+    schema_migrations as it completes; a failed migration stops the run and
+    is retried on the next boot. Every migration is idempotent, so databases
+    set up before the ledger existed are simply brought onto it.
+    """
+    latest = MIGRATIONS[-1][0]
+    if schema_version() >= latest:
+        logger.info(f"Database schema is current (version {latest})")
+        return
+    
+    use_lock = engine.dialect.name == "postgresql"
+    with engine.connect() as connection:
+        if use_lock:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+        try:
+            ledger_metadata.create_all(connection)
+            applied = set(connection.execute(select(schema_migrations.c.version)).scalars())
+            connection.commit()
+            
+            for version, name, migrate in MIGRATIONS:
+                if version in applied:
+                    continue
+                started = time.perf_counter()
+                migrate()
+                duration_ms = int((time.perf_counter() - started) * 1000)
+                connection.execute(schema_migrations.insert().values(version=version, name=name, durationMs=duration_ms))
+                connection.commit()
+                logger.info(f"Applied migration {version} ({name}) in {duration_ms} ms")
+        finally:
+            if use_lock:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                connection.commit()
+
 if __name__ == "__main__":
-    add_detected_language_column()
-    add_user_id_column()
-    add_multi_lens_columns()
\ No newline at end of file
+    import sys
+
+    if sys.argv[1:] == ["partition"]:
+        partition_tables()
+    else:
+        run_migrations()
\ No newline at end of file
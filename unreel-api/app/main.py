@@ -5,9 +5,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routers import analysis_router, chat_router
-from app.database import Base, engine
+from app.database import async_engine
 from app.core.config import settings
-from app.database_migration import add_detected_language_column, add_user_id_column, add_multi_lens_columns
+from app.core.responses import FastJSONResponse
+from app.core.compression import CompressionMiddleware
+from app.database_migration import run_migrations
+from app.services.analysis_service import shutdown_shared_services
+from app.services.job_service import get_job_service
+from app.services.retention_service import get_retention_service
+from app.services.token_cache_service import verified_token_cache
 
 from contextlib import asynccontextmanager
 
@@ -24,26 +30,39 @@ async def lifespan(app: FastAPI):
     # Startup: Create database tables and run migrations
     try:
         logger.info("Initializing database...")
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created successfully")
-        
-        # Run database migrations
-        add_detected_language_column()
-        add_user_id_column()
-        add_multi_lens_columns()
+        # Tables and versioned migrations; a single version check when the schema is current
+        run_migrations()
         logger.info("Database migration completed successfully")
     except Exception as e:
         logger.error(f"Error during startup database operations: {e}")
     
+    # Start background workers for job-mode analyses
+    job_service = get_job_service()
+    await job_service.start()
+    
+    # Periodic partition maintenance and archival of cold blobs
+    retention_service = get_retention_service()
+    await retention_service.start()
+    
+    # Keep Firebase signing certificates warm for token verification
+    await verified_token_cache.start()
+    
     yield
-    # Shutdown logic (if any) here
+    
+    # Shutdown: stop background workers, then close pooled connections
+    await verified_token_cache.stop()
+    await retention_service.stop()
+    await job_service.stop()
+    shutdown_shared_services()
+    await async_engine.dispose()
 
 # Create FastAPI app
 app = FastAPI(
     title="UnReel API",
     description="AI companion app that analyzes short-form videos",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -53,8 +72,12 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Negotiated gzip/brotli/zstd compression (event streams are passed through)
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(analysis_router.router)
 app.include_router(chat_router.router)
@@ -1,13 +1,35 @@
-from sqlalchemy import Column, String, Text, DateTime, JSON, func
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Boolean, Column, String, Text, DateTime, JSON, LargeBinary, Integer, Index, PrimaryKeyConstraint, event, func, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import Mapped, mapped_column, object_session
 from app.database import Base
 from datetime import datetime
 import uuid
 from typing import Optional
 
+# Lens and content documents: JSONB on Postgres (indexable, parsed once on write), JSON elsewhere
+JSONDocument = JSONB().with_variant(JSON(), "sqlite")
+
+# availableFeatures flags, one per lens
+FEATURE_FLAGS = ["location", "educational", "shopping", "factCheck", "resource", "music"]
+
+
+def feature_flag_clause(flag: str):
+    """
+    SQL predicate "this lens found data" for a feature flag.
+
+    Rendered as a literal (never a bound parameter) so it matches the
+    partial index predicate exactly, even in generic prepared-statement
+    plans. Only names from FEATURE_FLAGS are accepted.
+    """
+    if flag not in FEATURE_FLAGS:
+        raise ValueError(f"Unknown feature flag: {flag}")
+    return text(f"""("availableFeatures" @> '{{"{flag}": true}}')""")
+
 
 class Analysis(Base):
     __tablename__ = "analyses"
+    # Fetch server-generated columns (createdAt, updatedAt, version) with RETURNING instead of a refresh query
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     originalUrl: Mapped[str] = mapped_column(String, nullable=False)
@@ -17,27 +39,140 @@ class Analysis(Base):
     caption: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     translation: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    keyTopics: Mapped[Optional[JSON]] = mapped_column(JSON, nullable=True)
-    mentionedResources: Mapped[Optional[JSON]] = mapped_column(JSON, nullable=True)
-    locationContext: Mapped[Optional[JSON]] = mapped_column(JSON, nullable=True)
-    educationalInsights: Mapped[Optional[JSON]] = mapped_column(JSON, nullable=True)
-    shoppingItems: Mapped[Optional[JSON]] = mapped_column(JSON, nullable=True)
-    factCheck: Mapped[Optional[JSON]] = mapped_column(JSON, nullable=True)
-    enhancedResources: Mapped[Optional[JSON]] = mapped_column(JSON, nullable=True)
-    musicContext: Mapped[Optional[JSON]] = mapped_column(JSON, nullable=True)
-    availableFeatures: Mapped[Optional[JSON]] = mapped_column(JSON, nullable=True)
-    fullTranscript: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    keyTopics: Mapped[Optional[JSON]] = mapped_column(JSONDocument, nullable=True)
+    mentionedResources: Mapped[Optional[JSON]] = mapped_column(JSONDocument, nullable=True)
+    locationContext: Mapped[Optional[JSON]] = mapped_column(JSONDocument, nullable=True)
+    educationalInsights: Mapped[Optional[JSON]] = mapped_column(JSONDocument, nullable=True)
+    shoppingItems: Mapped[Optional[JSON]] = mapped_column(JSONDocument, nullable=True)
+    factCheck: Mapped[Optional[JSON]] = mapped_column(JSONDocument, nullable=True)
+    enhancedResources: Mapped[Optional[JSON]] = mapped_column(JSONDocument, nullable=True)
+    musicContext: Mapped[Optional[JSON]] = mapped_column(JSONDocument, nullable=True)
+    availableFeatures: Mapped[Optional[JSON]] = mapped_column(JSONDocument, nullable=True)
     detectedLanguage: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Keyword search document, maintained at write time (see keyword_search_service); never loaded by default
+    searchConfig: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    searchVector: Mapped[Optional[str]] = mapped_column(TSVECTOR().with_variant(Text(), "sqlite"), nullable=True, deferred=True)
     userId: Mapped[Optional[str]] = mapped_column(String, index=True, nullable=True)
+    batchId: Mapped[Optional[str]] = mapped_column(String, index=True, nullable=True)
+    # Position of the item in its batch, in submission order
+    batchPosition: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Process running the pipeline and its last heartbeat, while processing (see job_service)
+    workerId: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    heartbeatAt: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     createdAt: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     updatedAt: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
+
+# Keyset pagination of a user's history: (userId, createdAt DESC, id DESC)
+Index("ix_analyses_userId_createdAt", Analysis.userId, Analysis.createdAt.desc(), Analysis.id.desc())
+
+# Sweep of processing analyses whose worker stopped sending heartbeats
+Index(
+    "ix_analyses_processing_heartbeatAt", Analysis.heartbeatAt,
+    postgresql_where=text("status = 'processing'"),
+).ddl_if(dialect="postgresql")
+
+# Containment queries on lens documents (availableFeatures @> '{"shopping": true}',
+# factCheck @> '[{"verdict": "Contradicted"}]')
+for _column in ("availableFeatures", "factCheck"):
+    Index(
+        f"ix_analyses_{_column}_gin", getattr(Analysis, _column),
+        postgresql_using="gin", postgresql_ops={_column: "jsonb_path_ops"},
+    ).ddl_if(dialect="postgresql")
+
+# Ranked keyword search over the tsvector document
+Index("ix_analyses_searchVector_gin", Analysis.searchVector, postgresql_using="gin").ddl_if(dialect="postgresql")
+
+# Lens-filtered history: one partial (userId, createdAt DESC, id DESC) index per feature flag
+for _flag in FEATURE_FLAGS:
+    Index(
+        f"ix_analyses_feature_{_flag}", Analysis.userId, Analysis.createdAt.desc(), Analysis.id.desc(),
+        postgresql_where=feature_flag_clause(_flag),
+    ).ddl_if(dialect="postgresql")
+
+
+@event.listens_for(Analysis, "before_update")
+def _bump_analysis_version(mapper, connection, target):
+    """Increment the row version on every real change (used in ETags)."""
+    session = object_session(target)
+    if session is not None and session.is_modified(target, include_collections=False):
+        # SQL expression: incremented atomically in the UPDATE, no read needed
+        target.version = Analysis.version + 1
 
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    analysisId: Mapped[str] = mapped_column(String, index=True, nullable=False)
+    analysisId: Mapped[str] = mapped_column(String, nullable=False)
     message: Mapped[str] = mapped_column(Text, nullable=False)
     reply: Mapped[str] = mapped_column(Text, nullable=False)
+    persona: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # False for a streamed reply cut short (client disconnected or generation failed)
+    complete: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default=text("true"))
+    # True for a reply served from the answer cache (a repeat of an earlier row, never re-seeded)
+    cached: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=text("false"))
+    createdAt: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
+
+# Keyset pagination of a chat thread (latest first): (analysisId, createdAt, id)
+Index("ix_chat_messages_analysisId_createdAt", ChatMessage.analysisId, ChatMessage.createdAt, ChatMessage.id)
+
+
+class AnalysisEmbedding(Base):
+    __tablename__ = "analysis_embeddings"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    analysisId: Mapped[str] = mapped_column(String, index=True, nullable=False)
+    userId: Mapped[Optional[str]] = mapped_column(String, index=True, nullable=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    vector: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    createdAt: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
+
+class AnalysisBlob(Base):
+    """
+    Large, rarely read payloads of an analysis, kept out of the analyses row.
+
+    One compressed document per (analysisId, kind): the full transcript, its
+    chunk index and the raw RAG search results of the lenses (see
+    blob_store_service).
+    """
+    __tablename__ = "analysis_blobs"
+    __table_args__ = (PrimaryKeyConstraint("analysisId", "kind"),)
+
+    analysisId: Mapped[str] = mapped_column(String, nullable=False)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    codec: Mapped[str] = mapped_column(String, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # Set (and data emptied) once the blob is archived to a local file by the retention job
+    archivePath: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    createdAt: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
+
+class Translation(Base):
+    """
+    Stored machine translation of a text, keyed by the text's hash, the target language and the translator.
+
+    Keyed by content rather than analysis, so identical transcripts share
+    one translation and an edited transcript never reads a stale one; and
+    by the engine/model that made it, so switching TRANSLATION_BACKEND (or
+    installing a local model) doesn't keep serving the old engine's output.
+    The translated text is compressed like analysis blobs (see
+    translation_cache_service).
+    """
+    __tablename__ = "translations"
+    __table_args__ = (PrimaryKeyConstraint("sourceHash", "targetLanguage", "translator"),)
+
+    sourceHash: Mapped[str] = mapped_column(String, nullable=False)
+    targetLanguage: Mapped[str] = mapped_column(String, nullable=False)
+    # Engine/model that made the translation (TranslationService.translator_id, e.g. "google", "local:nllb")
+    translator: Mapped[str] = mapped_column(String, nullable=False)
+    # Analysis the translation was first made for (informational)
+    analysisId: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    codec: Mapped[str] = mapped_column(String, nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
     createdAt: Mapped[datetime] = mapped_column(DateTime, default=func.now())
\ No newline at end of file
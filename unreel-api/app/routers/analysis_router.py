@@ -1,33 +1,92 @@
+import asyncio
 import logging
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, Optional
 import yt_dlp
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
 from app import schemas
-from app.models import Analysis
-from app.services.analysis_service import AnalysisService
-from app.services.translation_service import TranslationService
+from app.models import Analysis, FEATURE_FLAGS, feature_flag_clause
+from app.services.analysis_service import AnalysisService, LENS_FIELDS, FACT_CHECK_VERDICTS
+from app.services.translation_cache_service import translation_cache
+from app.services.job_service import get_job_service, QueueFullError
+from app.services.batch_service import BatchService
+from app.services.search_index_service import search_index
+from app.services.keyword_search_service import keyword_search
+from app.services.blob_store_service import blob_store, merge_rag_results
+from app.services.progress_service import progress_tracker, TERMINAL_STAGES
+from app.core.sse import format_sse, SSE_HEADERS, SSE_KEEPALIVE
+from app.core.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from app.core.http_cache import conditional_json_response
+from app.core.responses import FastJSONResponse, serialize_json
+from app.services.response_cache_service import response_cache
 from app.database import get_db
-from app.auth import get_current_user
+from app.auth import create_stream_token, get_current_user, get_stream_user
+from app.core.config import settings
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/analyze", tags=["analysis"])
 
+# Seconds between keep-alive comments on idle event streams
+SSE_KEEPALIVE_INTERVAL = 15
+
 
 @router.get("", response_model=list[schemas.AnalysisResponse])
 async def list_analyses(
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    cursor: Optional[str] = Query(None, description=f"Cursor from the {NEXT_CURSOR_HEADER} header of the previous page"),
+    lens: Optional[str] = Query(None, description=f"Only analyses where this lens found data ({', '.join(FEATURE_FLAGS)})"),
+    verdict: Optional[str] = Query(None, description=f"Only analyses with a fact-check claim of this verdict ({', '.join(FACT_CHECK_VERDICTS)})"),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ) -> Any:
     """
-    List user's analysis history.
+    List user's analysis history, newest first.
+    
+    Keyset-paginated on (createdAt, id) and selecting only the listed
+    columns, so each page costs the same however long the history is. When
+    more rows exist, the next page's cursor is returned in the
+    X-Next-Cursor response header.
+    
+    `lens` and `verdict` filters are answered from JSONB indexes (a
+    partial history index per lens flag, GIN on factCheck).
     """
     user_id = current_user.get("uid")
-    analyses = db.query(Analysis).filter(Analysis.userId == user_id).order_by(Analysis.createdAt.desc()).limit(20).all()
+    query = (
+        select(Analysis.id, Analysis.originalUrl, Analysis.status, Analysis.createdAt, Analysis.userId,
+               Analysis.detectedLanguage, Analysis.title, Analysis.uploader, Analysis.caption)
+        .where(Analysis.userId == user_id)
+    )
+    if lens:
+        if lens not in FEATURE_FLAGS:
+            raise HTTPException(status_code=400, detail=f"Unknown lens. Available lenses are: {', '.join(FEATURE_FLAGS)}")
+        query = query.where(feature_flag_clause(lens))
+    if verdict:
+        verdict = verdict.capitalize()
+        if verdict not in FACT_CHECK_VERDICTS:
+            raise HTTPException(status_code=400, detail=f"Unknown verdict. Verdicts are: {', '.join(FACT_CHECK_VERDICTS)}")
+        query = query.where(Analysis.factCheck.contains([{"verdict": verdict}]))
+    if cursor:
+        try:
+            created_at, last_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(Analysis.createdAt, Analysis.id) < tuple_(created_at, last_id))
+    
+    analyses = (await db.execute(
+        query.order_by(Analysis.createdAt.desc(), Analysis.id.desc()).limit(limit + 1)
+    )).all()
+    if len(analyses) > limit:
+        analyses = analyses[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(analyses[-1].createdAt, analyses[-1].id)
+    
     # Map id to analysisId for schema compatibility
     return [
         {
@@ -45,25 +104,87 @@ async def list_analyses(
         } for a in analyses
     ]
 
+@router.get("/search", response_model=schemas.SearchResponse)
+async def search_analyses(
+    q: str = Query(..., min_length=1, max_length=500, description="Free-text query"),
+    limit: int = Query(20, ge=1, le=50),
+    mode: str = Query("semantic", pattern="^(semantic|keyword)$", description="'keyword' runs ranked full-text search with highlighted snippets"),
+    language: Optional[str] = Query(None, max_length=10, description="Language code of a keyword query, to also match its word stems"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Search over the user's whole analysis history.
+    
+    Semantic mode matches the query against each analysis' summary, key
+    topics and transcript embeddings. Keyword mode ranks the indexed
+    title, caption, summary and transcript text (websearch syntax:
+    "phrases", OR, -exclusions) and returns a highlighted snippet. Must be
+    declared before GET /{analysis_id}.
+    """
+    user_id = current_user.get("uid")
+    if mode == "keyword":
+        try:
+            results = await keyword_search.search(db, user_id, q, limit, language)
+        except Exception as e:
+            logger.error(f"Keyword search failed: {str(e)}", exc_info=True)
+            raise HTTPException(status_code=500, detail="Search failed. Please try again later.")
+        return {"query": q, "results": results}
+    
+    try:
+        hits = await search_index.search(db, user_id, q, limit)
+    except Exception as e:
+        logger.error(f"Search failed: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Search failed. Please try again later.")
+    
+    rows = {
+        row.id: row for row in (await db.execute(
+            select(Analysis.id, Analysis.originalUrl, Analysis.title, Analysis.uploader,
+                   Analysis.summary, Analysis.createdAt)
+            .where(Analysis.id.in_([hit["analysisId"] for hit in hits]), Analysis.userId == user_id)
+        )).all()
+    }
+    results = [
+        {
+            **hit,
+            "originalUrl": rows[hit["analysisId"]].originalUrl,
+            "title": rows[hit["analysisId"]].title,
+            "uploader": rows[hit["analysisId"]].uploader,
+            "summary": rows[hit["analysisId"]].summary,
+            "createdAt": rows[hit["analysisId"]].createdAt,
+        }
+        for hit in hits if hit["analysisId"] in rows
+    ]
+    return {"query": q, "results": results}
+
 @router.post("", response_model=schemas.AnalysisResponse)
 async def create_analysis(
     request: schemas.AnalysisRequest,
-    db: Session = Depends(get_db),
+    mode: str = Query("sync", pattern="^(sync|job)$", description="'job' returns 202 immediately and runs the pipeline in the background"),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
-) -> Dict[str, Any]:
+) -> FastJSONResponse:
     """
     Create a new video analysis.
     
+    The result is built in the AnalysisResponse shape with lens data that
+    was validated when it was saved, so it is serialized directly instead
+    of being validated a second time against the response model.
+    
     Args:
         request: Analysis request containing the video URL
+        mode: "sync" to wait for the full pipeline, "job" to enqueue it
         db: Database session
         
     Returns:
-        Analysis response with results
+        Analysis response with results (or the pending record in job mode)
         
     Raises:
-        HTTPException: If analysis fails
+        HTTPException: If analysis fails or the job queue is full
     """
+    if mode == "job":
+        return await _enqueue_analysis(request, db, current_user.get("uid"))
+
     try:
         logger.info(f"Starting analysis for URL: {request.url}")
         
@@ -84,7 +205,7 @@ async def create_analysis(
         )
         
         logger.info(f"Analysis completed successfully for URL: {request.url}")
-        return analysis
+        return FastJSONResponse(analysis)
         
     except yt_dlp.utils.DownloadError as e:
         error_msg = str(e)
@@ -113,11 +234,114 @@ async def create_analysis(
         raise HTTPException(status_code=500, detail="An unexpected error occurred. Please try again later.")
 
 
+async def _enqueue_analysis(
+    request: schemas.AnalysisRequest,
+    db: AsyncSession,
+    user_id: str
+) -> FastJSONResponse:
+    """
+    Create a pending analysis and hand it to the background job workers.
+    
+    Returns:
+        The pending analysis in AnalysisResponse shape, with a 202 status
+    """
+    job_service = get_job_service()
+    if not job_service.running or not job_service.has_capacity():
+        logger.warning(f"Analysis queue full, rejecting job for URL: {request.url}")
+        raise HTTPException(
+            status_code=503,
+            detail="The analysis queue is full. Please try again shortly.",
+            headers={"Retry-After": "30"}
+        )
+
+    analysis_service = AnalysisService()
+    analysis = await analysis_service.create_pending_analysis(db, request.url, user_id)
+    try:
+        job_service.submit(analysis.id, _lens_options(request), owner=user_id)
+    except QueueFullError:
+        analysis.status = "failed"
+        await db.commit()
+        raise HTTPException(
+            status_code=503,
+            detail="The analysis queue is full. Please try again shortly.",
+            headers={"Retry-After": "30"}
+        )
+
+    logger.info(f"Analysis {analysis.id} accepted in job mode for URL: {request.url}")
+    return FastJSONResponse(
+        AnalysisService.to_response(analysis),
+        status_code=202,
+        headers={"Location": f"{router.prefix}/{analysis.id}"}
+    )
+
+
+def _lens_options(request: schemas.AnalysisLenses) -> Dict[str, bool]:
+    """Map request lens flags to AnalysisService.run_analysis keyword arguments."""
+    return {
+        "focus_location": request.focusLocation,
+        "focus_educational": request.focusEducational,
+        "focus_shopping": request.focusShopping,
+        "focus_fact_check": request.focusFactCheck,
+        "focus_resource": request.focusResource,
+        "focus_music": request.focusMusic,
+    }
+
+
+@router.post("/batch", response_model=schemas.BatchAnalysisResponse, status_code=202)
+async def create_batch_analysis(
+    request: schemas.BatchAnalysisRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Submit many videos for analysis at once.
+    
+    URLs are canonicalized and deduplicated, then every unique video is
+    queued on the shared job workers (fairly interleaved with other users'
+    work). Poll GET /batch/{batch_id} for per-item status.
+    
+    Raises:
+        HTTPException: If the batch is too large or the queue cannot take it
+    """
+    if len(request.urls) > settings.BATCH_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can contain at most {settings.BATCH_MAX_URLS} URLs."
+        )
+    
+    try:
+        return await BatchService().create_batch(db, request.urls, current_user.get("uid"), _lens_options(request))
+    except QueueFullError as e:
+        logger.warning(f"Rejecting batch of {len(request.urls)} URLs: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="The analysis queue cannot take this batch right now. Please try again shortly.",
+            headers={"Retry-After": "60"}
+        )
+
+
+@router.get("/batch/{batch_id}", response_model=schemas.BatchAnalysisResponse)
+async def get_batch_analysis(
+    batch_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get per-item status for a batch submitted by the current user.
+    """
+    batch = await BatchService().get_batch(db, batch_id, current_user.get("uid"))
+    
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return batch
+
+
 @router.post("/{analysis_id}/translate")
 async def translate_transcript(
     analysis_id: str,
     request: schemas.TranslationRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
@@ -138,16 +362,19 @@ async def translate_transcript(
         logger.info(f"Translating transcript for analysis {analysis_id} to {request.target_language}")
         
         # Get the analysis from database
-        analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+        analysis = (await db.execute(
+            select(Analysis.id, Analysis.summary, Analysis.detectedLanguage).where(Analysis.id == analysis_id)
+        )).first()
         
         if not analysis:
             raise HTTPException(status_code=404, detail="Analysis not found")
-            
-        if not analysis.fullTranscript:
+        
+        transcript = (await blob_store.load(db, analysis_id, ["fullTranscript"])).get("fullTranscript")
+        if not transcript:
             raise HTTPException(status_code=400, detail="No transcript available for translation")
         
         # Use module-level cached translation service
-        translation_service = TranslationService()
+        translation_service = AnalysisService().translation_service
         
         # Check if target language is supported
         supported_languages = translation_service.get_supported_languages()
@@ -157,26 +384,34 @@ async def translate_transcript(
                 detail=f"Unsupported language. Supported languages are: {', '.join(supported_languages.keys())}"
             )
         
-        # Translate the transcript
-        translated_text = translation_service.translate_text(
-            analysis.fullTranscript, 
-            request.target_language
-        )
-        
-        if not translated_text:
-            raise HTTPException(status_code=500, detail="Translation failed")
-        
-        logger.info(f"Transcript translation completed successfully for analysis {analysis_id}")
+        # Stored translations (by the engine/model that would translate now) are returned without calling it
+        translator = await asyncio.to_thread(translation_service.translator_id, transcript, request.target_language)
+        translated_text = await translation_cache.get(db, transcript, request.target_language, translator)
+        cached = translated_text is not None
+        if not cached:
+            # Translate the transcript (blocking network call, off the event loop)
+            translated_text = await asyncio.to_thread(
+                translation_service.translate_text,
+                transcript, 
+                request.target_language
+            )
+            
+            if not translated_text:
+                raise HTTPException(status_code=500, detail="Translation failed")
+            
+            await translation_cache.put(db, transcript, request.target_language, translator, translated_text, analysis_id)
+            logger.info(f"Transcript translation completed successfully for analysis {analysis_id}")
         
         return {
             "analysisId": analysis_id,
-            "originalText": analysis.fullTranscript,
+            "originalText": transcript,
             "translatedText": translated_text,
             "sourceLanguage": analysis.detectedLanguage,
             "targetLanguage": request.target_language,
             "supportedLanguages": supported_languages,
             "translationType": "transcript",  # Indicates this is a transcript translation, not summary
-            "summary": analysis.summary  # Include the original English summary for reference
+            "summary": analysis.summary,  # Include the original English summary for reference
+            "cached": cached
         }
         
     except HTTPException:
@@ -189,41 +424,217 @@ async def translate_transcript(
 @router.get("/{analysis_id}")
 async def get_analysis(
     analysis_id: str,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return, e.g. 'metadata,content.summary,progress' (default: all)"
+    ),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
-) -> Dict[str, Any]:
+) -> Any:
     """
     Get an existing analysis by ID.
+    
+    While the analysis is still processing (e.g. submitted in job mode),
+    the response includes its stage-level progress. With `fields`, only the
+    selected parts are returned and only their columns (and, for
+    fullTranscript, the compressed transcript blob) are loaded.
+    
+    Finished analyses carry an ETag (row version + updatedAt) and honor
+    If-None-Match; their serialized body is cached in-process until the row
+    changes, so repeat reads skip the database entirely.
     """
-    analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+    try:
+        selection = AnalysisService.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    variant = AnalysisService.selection_key(selection)
+    
+    cached = await response_cache.get("analysis", analysis_id, variant)
+    if cached:
+        return conditional_json_response(cached["body"], cached["etag"], if_none_match)
+    
+    columns = AnalysisService.columns_for(selection) + ["version", "updatedAt"]
+    analysis = (await db.execute(
+        select(Analysis)
+        .options(load_only(*(getattr(Analysis, c) for c in columns)))
+        .where(Analysis.id == analysis_id)
+    )).scalars().first()
     
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found")
-        
+    
+    blobs = await blob_store.load(db, analysis_id, AnalysisService.blobs_for(selection))
+    data = AnalysisService.to_response(analysis, selection, blobs)
+    # Progress moves without row updates, so in-flight analyses are never cached
+    if analysis.status == "processing":
+        return data
+    
+    etag = AnalysisService.etag(analysis, variant)
+    body = serialize_json(data)
+    # A write may have committed (and invalidated the cache) since the row was read:
+    # only cache the rendering of the committed version, never an older one
+    committed = (await db.execute(
+        select(Analysis.version, Analysis.updatedAt).where(Analysis.id == analysis_id)
+    )).first()
+    if committed is not None and (committed.version, committed.updatedAt) == (analysis.version, analysis.updatedAt):
+        response_cache.put("analysis", analysis_id, variant, etag, body)
+    return conditional_json_response(body, etag, if_none_match)
+
+
+@router.get("/{analysis_id}/transcript")
+async def get_analysis_transcript(
+    analysis_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get only the transcript of an analysis (decompressed from its blob).
+    """
+    analysis = (await db.execute(
+        select(Analysis.id, Analysis.detectedLanguage).where(Analysis.id == analysis_id)
+    )).first()
+    
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    blobs = await blob_store.load(db, analysis_id, ["fullTranscript"])
+    return {
+        "analysisId": analysis.id,
+        "fullTranscript": blobs.get("fullTranscript"),
+        "detectedLanguage": analysis.detectedLanguage
+    }
+
+
+@router.get("/{analysis_id}/lens/{lens_name}")
+async def get_analysis_lens(
+    analysis_id: str,
+    lens_name: str,
+    include_search_results: bool = Query(False, alias="searchResults", description="Include raw RAG search results"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get a single lens of an analysis (e.g. factCheck, shoppingItems).
+    
+    Raw RAG output (`searchResults`, fact-check `searchEvidence`) is stored
+    in a compressed blob and only loaded when requested.
+    """
+    if lens_name not in LENS_FIELDS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown lens. Available lenses are: {', '.join(LENS_FIELDS)}"
+        )
+    
+    analysis = (await db.execute(
+        select(Analysis.id, Analysis.status, getattr(Analysis, lens_name).label("data"))
+        .where(Analysis.id == analysis_id)
+    )).first()
+    
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    data = analysis.data
+    if isinstance(data, list):
+        data = [
+            {k: v for k, v in item.items() if k != "searchResults"} if isinstance(item, dict) else item
+            for item in data
+        ]
+        if include_search_results:
+            rag_results = (await blob_store.load(db, analysis_id, ["ragResults"])).get("ragResults") or {}
+            data = merge_rag_results(data, rag_results.get(lens_name))
+    
     return {
         "analysisId": analysis.id,
-        "originalUrl": analysis.originalUrl,
         "status": analysis.status,
-        "metadata": {
-            "title": analysis.title,
-            "uploader": analysis.uploader,
-            "caption": analysis.caption
-        },
-        "content": {
-            "summary": analysis.summary,
-            "translation": analysis.translation,
-            "keyTopics": analysis.keyTopics,
-            "mentionedResources": analysis.mentionedResources,
-            "locationContext": analysis.locationContext,
-            "educationalInsights": analysis.educationalInsights,
-            "shoppingItems": analysis.shoppingItems,
-            "factCheck": analysis.factCheck,
-            "enhancedResources": analysis.enhancedResources,
-            "musicContext": analysis.musicContext,
-        },
-        "availableFeatures": analysis.availableFeatures,
-        "fullTranscript": analysis.fullTranscript,
-        "detectedLanguage": analysis.detectedLanguage,
-        "createdAt": analysis.createdAt,
-        "supportedLanguages": TranslationService().get_supported_languages()
+        "lens": lens_name,
+        "data": data
     }
+
+
+@router.post("/{analysis_id}/events/token")
+async def create_analysis_events_token(
+    analysis_id: str,
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Issue a short-lived token opening this analysis' event stream.
+    
+    Browsers' EventSource cannot set an Authorization header: open
+    `/{analysis_id}/events?token=<token>` instead. The token is valid for
+    STREAM_TOKEN_TTL_SECONDS; after it expires, EventSource's automatic
+    reconnect fails and the client requests a new one.
+    """
+    return {
+        "token": create_stream_token(current_user.get("uid"), analysis_id),
+        "expiresIn": settings.STREAM_TOKEN_TTL_SECONDS,
+    }
+
+
+@router.get("/{analysis_id}/events")
+async def stream_analysis_events(
+    analysis_id: str,
+    request: Request,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_stream_user)
+) -> StreamingResponse:
+    """
+    Stream per-stage progress and partial results as Server-Sent Events.
+    
+    Authenticated by the Bearer token, or by a `token` query parameter from
+    POST /{analysis_id}/events/token (for EventSource clients).
+    
+    Events: "stage", "download", "transcript", "language", "summary",
+    "lens" (one per lens), "enrichment" (one per RAG pass). The stream ends
+    after the terminal "stage" event (completed or failed), or right after a
+    "stage" event with stage "unknown" when the analysis is processing but
+    not tracked by this server process (poll GET /analysis/{id} instead).
+    """
+    analysis = (await db.execute(
+        select(Analysis.id, Analysis.status).where(Analysis.id == analysis_id)
+    )).first()
+    
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    # Hand the connection back to the pool for the (long-lived) stream
+    await db.close()
+    
+    return StreamingResponse(
+        _analysis_event_stream(analysis_id, analysis.status, request, last_event_id or 0),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+async def _analysis_event_stream(
+    analysis_id: str,
+    status: str,
+    request: Request,
+    last_event_id: int
+) -> AsyncIterator[str]:
+    queue = progress_tracker.subscribe(analysis_id, last_event_id)
+    try:
+        # Finished before this process tracked it (e.g. after a restart): report the final state only
+        if status != "processing" and queue.empty():
+            yield format_sse("stage", {"stage": status})
+            return
+        # Processing, but not by this process (interrupted run, or another replica): no events will come
+        if progress_tracker.get(analysis_id) is None and queue.empty():
+            yield format_sse("stage", {"stage": "unknown", "status": status})
+            return
+        
+        while True:
+            try:
+                record = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield SSE_KEEPALIVE
+                continue
+            
+            yield format_sse(record["event"], record["data"], record["id"])
+            if record["event"] == "stage" and record["data"].get("stage") in TERMINAL_STAGES:
+                return
+    finally:
+        progress_tracker.unsubscribe(analysis_id, queue)
@@ -1,72 +1,316 @@
+import asyncio
 import logging
-from typing import Any, Dict
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import schemas
 from app.services.analysis_service import AnalysisService
+from app.services.answer_cache_service import chat_answer_cache
 from app.models import Analysis, ChatMessage
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app.auth import get_current_user
+from app.core.config import settings
+from app.core.sse import format_sse, SSE_HEADERS
+from app.core.http_cache import conditional_json_response
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.responses import serialize_json
+from app.services.response_cache_service import response_cache
+from app.services.retrieval_service import build_transcript_index, search_transcript_index, format_excerpts
+from app.services.blob_store_service import blob_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/chat", tags=["chat"])
 
+# Partial replies being saved after a disconnect (strong references until the save completes)
+_pending_saves: Set[asyncio.Task] = set()
+
 @router.post("", response_model=schemas.ChatResponse)
 async def chat_with_video(
     request: schemas.ChatRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ) -> Dict[str, Any]:
     try:
         logger.info(f"Chat request for analysis ID: {request.analysisId}")
         
-        analysis = db.query(Analysis).filter(Analysis.id == request.analysisId).first()
+        analysis = await db.get(Analysis, request.analysisId)
         if not analysis:
             raise HTTPException(status_code=404, detail="Analysis not found")
         
-        context = _prepare_analysis_context(analysis)
-        analysis_svc = AnalysisService()
-        reply = await analysis_svc.ai_service.chat_with_video(context, request.message, request.persona)
+        # Repeated questions are answered from earlier replies without an LLM call
+        cached_reply = await chat_answer_cache.lookup(db, request.analysisId, request.message, request.persona)
+        if cached_reply is not None:
+            reply = cached_reply
+        else:
+            transcript, index = await _load_transcript(db, analysis.id)
+            context = _prepare_analysis_context(analysis, transcript)
+            excerpts = await _retrieve_excerpts(db, analysis.id, transcript, index, request.message)
+            analysis_svc = AnalysisService()
+            reply = await analysis_svc.ai_service.chat_with_video(
+                context, request.message, request.persona, analysis_id=request.analysisId, excerpts=excerpts
+            )
+            chat_answer_cache.remember(request.analysisId, request.message, request.persona, reply)
         
         # Save to database
         chat_msg = ChatMessage(
             analysisId=request.analysisId,
             message=request.message,
-            reply=reply
+            reply=reply,
+            persona=request.persona,
+            cached=cached_reply is not None
         )
         db.add(chat_msg)
-        db.commit()
+        await db.commit()
         
-        return {"reply": reply}
+        return {"reply": reply, "cached": cached_reply is not None}
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Chat failed: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="An error occurred while processing your chat request. Please try again.")
 
+@router.post("/stream")
+async def chat_with_video_stream(
+    request: schemas.ChatRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Streaming variant of POST /api/v1/chat over Server-Sent Events.
+    
+    Emits "token" events ({"text": ...}) as Gemini generates the reply, then a
+    single "done" event ({"reply": ..., "messageId": ..., "cached": ...}), or
+    "error" if generation fails. The ChatMessage row is persisted when the
+    stream ends, including the partial reply (marked incomplete) if the
+    client disconnects or generation fails mid-stream. Cached answers are
+    sent as a single "token" event.
+    """
+    logger.info(f"Streaming chat request for analysis ID: {request.analysisId}")
+    
+    analysis = await db.get(Analysis, request.analysisId)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    cached_reply = await chat_answer_cache.lookup(db, request.analysisId, request.message, request.persona)
+    if cached_reply is not None:
+        # The stream saves with its own session: release this connection before streaming
+        await db.close()
+        return StreamingResponse(
+            _cached_chat_event_stream(request, cached_reply),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+    
+    transcript, index = await _load_transcript(db, analysis.id)
+    context = _prepare_analysis_context(analysis, transcript)
+    excerpts = await _retrieve_excerpts(db, analysis.id, transcript, index, request.message)
+    await db.close()
+    return StreamingResponse(
+        _chat_event_stream(request, context, excerpts),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+async def _chat_event_stream(request: schemas.ChatRequest, context: str,
+                             excerpts: Optional[str] = None) -> AsyncIterator[str]:
+    analysis_svc = AnalysisService()
+    fragments = []
+    persisted = False
+    try:
+        async for text in analysis_svc.ai_service.chat_with_video_stream(
+            context, request.message, request.persona, analysis_id=request.analysisId, excerpts=excerpts
+        ):
+            fragments.append(text)
+            yield format_sse("token", {"text": text})
+        
+        persisted = True
+        reply = "".join(fragments)
+        message_id = await _save_chat_message(request.analysisId, request.message, reply, request.persona)
+        chat_answer_cache.remember(request.analysisId, request.message, request.persona, reply)
+        yield format_sse("done", {"reply": reply, "messageId": message_id, "cached": False})
+    except Exception as e:
+        logger.error(f"Streaming chat failed: {str(e)}", exc_info=True)
+        yield format_sse("error", {"detail": "An error occurred while processing your chat request. Please try again."})
+    finally:
+        # Client disconnected or generation failed mid-stream: keep whatever was generated so far,
+        # marked incomplete so it is never served as an answer. On a disconnect the stream's task is
+        # being cancelled (and Starlette's cancel scope cancels every later await too), so the save
+        # runs as its own task, which completes even if waiting for it here is cancelled.
+        if not persisted and fragments:
+            save = asyncio.create_task(
+                _save_chat_message(request.analysisId, request.message, "".join(fragments), request.persona,
+                                   complete=False)
+            )
+            _pending_saves.add(save)
+            save.add_done_callback(_pending_saves.discard)
+            await asyncio.shield(save)
+
+async def _cached_chat_event_stream(request: schemas.ChatRequest, reply: str) -> AsyncIterator[str]:
+    message_id = await _save_chat_message(request.analysisId, request.message, reply, request.persona, cached=True)
+    yield format_sse("token", {"text": reply})
+    yield format_sse("done", {"reply": reply, "messageId": message_id, "cached": True})
+
+async def _save_chat_message(analysis_id: str, message: str, reply: str,
+                             persona: Optional[str] = None, complete: bool = True,
+                             cached: bool = False) -> Optional[str]:
+    """
+    Persist a chat turn in its own session (the request session may already be closed while streaming).
+    
+    Args:
+        complete: False for a partial streamed reply (kept in history, never reused as an answer)
+        cached: True for a reply served from the answer cache (kept in history, never re-seeded)
+    
+    Returns:
+        ID of the saved ChatMessage, or None if saving failed
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            message_id = str(uuid.uuid4())
+            db.add(ChatMessage(id=message_id, analysisId=analysis_id, message=message, reply=reply, persona=persona,
+                               complete=complete, cached=cached))
+            await db.commit()
+            return message_id
+        except Exception as e:
+            logger.error(f"Failed to save streamed chat message: {str(e)}", exc_info=True)
+            await db.rollback()
+            return None
+
 @router.get("/{analysis_id}")
 async def get_chat_history(
     analysis_id: str,
-    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=200, description="Number of latest messages to return"),
+    before: Optional[str] = Query(None, description="nextCursor of the previous page (older messages)"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
-):
+) -> Response:
+    """
+    Get the latest messages of an analysis' chat thread, oldest first.
+    
+    Keyset-paginated on (createdAt, id) over the (analysisId, createdAt, id)
+    index and selecting only the returned columns, so a page costs the same
+    however long the thread is. When older messages exist, the cursor for
+    them is returned as `nextCursor` (pass it as `before`).
+    
+    Each page is cached until a new message is saved, and its ETag honors
+    If-None-Match.
+    """
+    variant = f"{limit}:{before or ''}"
+    cached = await response_cache.get("chat", analysis_id, variant)
+    if cached:
+        return conditional_json_response(cached["body"], cached["etag"], if_none_match)
+    
+    try:
+        position = decode_cursor(before) if before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
     try:
-        messages = db.query(ChatMessage).filter(ChatMessage.analysisId == analysis_id).order_by(ChatMessage.createdAt.asc()).all()
-        return {"messages": messages}
+        messages = (await db.execute(_chat_page_query(analysis_id, limit + 1, position))).all()
     except Exception as e:
         logger.error(f"Failed to fetch chat history: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch chat history.")
+    
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        next_cursor = encode_cursor(messages[-1].createdAt, messages[-1].id)
+    messages.reverse()
+    body = serialize_json({"messages": [
+        {
+            "id": m.id,
+            "analysisId": m.analysisId,
+            "message": m.message,
+            "reply": m.reply,
+            "persona": m.persona,
+            "createdAt": m.createdAt
+        } for m in messages
+    ], "nextCursor": next_cursor})
+    
+    etag = f'"{analysis_id}-{messages[0].id if messages else 0}-{messages[-1].id if messages else 0}-{len(messages)}"'
+    # Only cache the latest page if no message was committed (and the cache invalidated) since it was read
+    if before or await _latest_message_id(db, analysis_id) == (messages[-1].id if messages else None):
+        response_cache.put("chat", analysis_id, variant, etag, body)
+    return conditional_json_response(body, etag, if_none_match)
+
+
+async def _latest_message_id(db: AsyncSession, analysis_id: str) -> Optional[str]:
+    """ID of the newest committed message of a thread."""
+    return (await db.execute(
+        select(ChatMessage.id)
+        .where(ChatMessage.analysisId == analysis_id)
+        .order_by(ChatMessage.createdAt.desc(), ChatMessage.id.desc())
+        .limit(1)
+    )).scalar()
+
 
+def _chat_page_query(analysis_id: str, limit: int, before: Optional[Tuple[datetime, str]] = None) -> Select:
+    """Latest `limit` messages of a thread older than the (createdAt, id) position `before`, newest first."""
+    query = select(
+        ChatMessage.id, ChatMessage.analysisId, ChatMessage.message, ChatMessage.reply,
+        ChatMessage.persona, ChatMessage.createdAt
+    ).where(ChatMessage.analysisId == analysis_id)
+    if before:
+        query = query.where(tuple_(ChatMessage.createdAt, ChatMessage.id) < tuple_(*before))
+    return query.order_by(ChatMessage.createdAt.desc(), ChatMessage.id.desc()).limit(limit)
 
-def _prepare_analysis_context(analysis: Analysis) -> str:
+async def _load_transcript(db: AsyncSession, analysis_id: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """Load the transcript and its chunk index (compressed blobs kept outside the analyses row)."""
+    blobs = await blob_store.load(db, analysis_id, ["fullTranscript", "transcriptIndex"])
+    return blobs.get("fullTranscript"), blobs.get("transcriptIndex")
+
+def _uses_retrieval(transcript: Optional[str]) -> bool:
+    """Long transcripts are not pasted into the chat context; relevant chunks are retrieved per question."""
+    return len(transcript or '') > settings.CHAT_RETRIEVAL_MIN_CHARS
+
+async def _retrieve_excerpts(db: AsyncSession, analysis_id: str, transcript: Optional[str],
+                             index: Optional[Dict[str, Any]], message: str) -> Optional[str]:
+    """
+    Retrieve the transcript chunks most relevant to a chat question.
+    
+    Analyses created before the transcript index existed get one built and
+    saved on first use.
+    
+    Returns:
+        Formatted excerpts, or None if the transcript is short enough to be sent whole
+    """
+    if not _uses_retrieval(transcript):
+        return None
+    
+    if not index:
+        index = build_transcript_index(transcript, chunk_chars=settings.TRANSCRIPT_CHUNK_CHARS)
+        try:
+            await blob_store.save(db, analysis_id, {"transcriptIndex": index})
+        except Exception as e:
+            logger.warning(f"Could not save transcript index for analysis {analysis_id}: {e}")
+            await db.rollback()
+    if not index:
+        return None
+    
+    excerpts = search_transcript_index(index, message, settings.CHAT_RETRIEVAL_TOP_K)
+    # No lexical overlap (e.g. "summarize this"): fall back to the opening of the video
+    if not excerpts:
+        excerpts = index["chunks"][:settings.CHAT_RETRIEVAL_TOP_K]
+    return format_excerpts(excerpts)
+
+def _prepare_analysis_context(analysis: Analysis, transcript: Optional[str]) -> str:
     """
     Prepare context string from analysis data.
     
+    For long videos the full transcript is left out and replaced by a note;
+    the relevant excerpts are sent with each question instead (see
+    _retrieve_excerpts), which keeps the context small and cache-stable.
+    
     Args:
         analysis: Analysis model instance
+        transcript: Its full transcript
         
     Returns:
         Formatted context string
@@ -75,7 +319,11 @@ def _prepare_analysis_context(analysis: Analysis) -> str:
     title = getattr(analysis, 'title', None) or 'Unknown Title'
     uploader = getattr(analysis, 'uploader', None) or 'Unknown Uploader'
     summary = getattr(analysis, 'summary', None) or 'No summary available'
-    transcript = getattr(analysis, 'fullTranscript', None) or 'No transcript available'
+    if _uses_retrieval(transcript):
+        transcript = ('The transcript is too long to include in full. Relevant transcript excerpts '
+                      'are provided with each question; base transcript-specific answers on them.')
+    else:
+        transcript = transcript or 'No transcript available'
     
     # Handle JSON columns
     key_topics = getattr(analysis, 'keyTopics', None) or []
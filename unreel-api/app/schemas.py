@@ -39,8 +39,7 @@ class MusicContext(BaseModel):
 
 
 # --- Analysis ---
-class AnalysisRequest(BaseModel):
-    url: str = Field(..., description="URL of the video to analyze")
+class AnalysisLenses(BaseModel):
     focusEducational: bool = Field(False, description="Extract step-by-step tutorials or mini-courses")
     focusShopping: bool = Field(False, description="Identify products, outfits, or gear")
     focusLocation: bool = Field(True, description="Identify situational context and landmarks")
@@ -49,6 +48,31 @@ class AnalysisRequest(BaseModel):
     focusMusic: bool = Field(False, description="Identify background music and find streaming links")
 
 
+class AnalysisRequest(AnalysisLenses):
+    url: str = Field(..., description="URL of the video to analyze")
+
+
+class BatchAnalysisRequest(AnalysisLenses):
+    urls: List[str] = Field(..., min_length=1, description="URLs of the videos to analyze (duplicates are merged)")
+
+
+class BatchItem(BaseModel):
+    url: str = Field(..., description="URL as submitted (the first one, for duplicates)")
+    canonicalUrl: str = Field(..., description="Normalized URL used for deduplication")
+    analysisId: str = Field(..., description="Analysis handling this video")
+    status: str = Field(..., description="Status of the analysis")
+    stage: Optional[str] = Field(None, description="Current pipeline stage while processing")
+
+
+class BatchAnalysisResponse(BaseModel):
+    batchId: str = Field(..., description="Unique identifier for the batch")
+    status: str = Field(..., description="processing until every item has completed or failed")
+    total: int = Field(..., description="Number of unique analyses in the batch")
+    completed: int = Field(..., description="Number of completed analyses")
+    failed: int = Field(..., description="Number of failed analyses")
+    items: List[BatchItem] = Field(..., description="Per-video status, one item per unique video, ordered by analysisId")
+
+
 class Resource(BaseModel):
     type: str = Field(..., description="Type of the resource")
     name: str = Field(..., description="Name of the resource")
@@ -73,6 +97,16 @@ class AnalysisContent(BaseModel):
     musicContext: Optional[MusicContext] = Field(None, description="Background music details and verified links")
 
 
+class AnalysisProgress(BaseModel):
+    stage: str = Field(..., description="Current pipeline stage (queued, downloading, analyzing, ...)")
+    stageIndex: Optional[int] = Field(None, description="Zero-based position of the stage in the pipeline")
+    totalStages: int = Field(..., description="Total number of pipeline stages")
+    startedAt: datetime = Field(..., description="When progress tracking started for this analysis")
+    updatedAt: datetime = Field(..., description="When the analysis last changed stage")
+    detail: Optional[Dict[str, Any]] = Field(None, description="Stage-specific details such as queue depth or error")
+    preview: Optional[Dict[str, Any]] = Field(None, description="Provisional fast-lane summary and topics from metadata only")
+
+
 class AnalysisResponse(BaseModel):
     analysisId: str = Field(..., description="Unique identifier for the analysis")
     originalUrl: str = Field(..., description="Original URL of the video")
@@ -83,12 +117,30 @@ class AnalysisResponse(BaseModel):
     fullTranscript: Optional[str] = Field(None, description="Full transcript of the video")
     detectedLanguage: Optional[str] = Field(None, description="Detected language of the transcript")
     supportedLanguages: Optional[Dict[str, str]] = Field(None, description="Supported languages for translation")
+    progress: Optional[AnalysisProgress] = Field(None, description="Stage-level progress while the analysis is processing")
     createdAt: datetime = Field(..., description="Timestamp when the analysis was created")
 
     class Config:
         from_attributes = True  # For compatibility with SQLAlchemy models
 
 
+class SearchResult(BaseModel):
+    analysisId: str = Field(..., description="ID of the matching analysis")
+    originalUrl: str = Field(..., description="Original URL of the video")
+    title: Optional[str] = Field(None, description="Title of the video")
+    uploader: Optional[str] = Field(None, description="Uploader of the video")
+    summary: Optional[str] = Field(None, description="Summary of the video")
+    score: float = Field(..., description="Similarity between the query and the analysis")
+    matchedOn: str = Field(..., description="Part of the analysis that matched best (summary, topics or transcript)")
+    snippet: Optional[str] = Field(None, description="HTML-escaped excerpt with <mark> highlights (keyword search only)")
+    createdAt: datetime = Field(..., description="Timestamp when the analysis was created")
+
+
+class SearchResponse(BaseModel):
+    query: str = Field(..., description="Search query")
+    results: List[SearchResult] = Field(..., description="Matching analyses, best first")
+
+
 # --- Translation ---
 class TranslationRequest(BaseModel):
     target_language: str = Field(..., description="Target language code for translation")
@@ -103,6 +155,7 @@ class TranslationResponse(BaseModel):
     supportedLanguages: Dict[str, str] = Field(..., description="Supported languages for translation")
     translationType: str = Field(..., description="Type of translation (transcript)")
     summary: Optional[str] = Field(None, description="Original English summary for reference")
+    cached: bool = Field(False, description="Whether the translation was served from the translation store")
 
 # --- Chat ---
 class ChatRequest(BaseModel):
@@ -112,4 +165,5 @@ class ChatRequest(BaseModel):
 
 
 class ChatResponse(BaseModel):
-    reply: str = Field(..., description="AI's reply to the chat message")
\ No newline at end of file
+    reply: str = Field(..., description="AI's reply to the chat message")
+    cached: bool = Field(False, description="Whether the reply was served from the answer cache")
\ No newline at end of file
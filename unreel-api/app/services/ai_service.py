@@ -2,13 +2,15 @@ import json
 import logging
 import asyncio
 import os
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 
 import google.generativeai as genai
 
 from app.core.config import settings
 
 from app.services.music_service import MusicService
+from app.services.resource_pools import llm_pool
+from app.services.context_cache_service import chat_context_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -16,13 +18,22 @@ logger = logging.getLogger(__name__)
 # Configure the Google Generative AI client
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
+CHAT_SYSTEM_ROLE = (
+    "You are UnReel AI, an advanced video intelligence assistant. "
+    "Your primary job is to answer the user's question based on the provided Video Context. "
+    "If the video context lacks the answer, state that clearly, though you may supplement with general knowledge if helpful."
+)
+
+CHAT_FALLBACK_REPLY = "I'm sorry, but I'm currently unable to process your request. Please try again later."
+
 
 class AiService:
     """Service for AI-powered video analysis using Google Gemini with Multi-Lens support."""
     
     def __init__(self):
         """Initialize the AiService with dual models for efficiency and depth."""
-        self.model = genai.GenerativeModel('gemini-flash-latest')
+        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        self.preview_model = genai.GenerativeModel(settings.FAST_LANE_MODEL)
         self.music_service = MusicService()
 
     def _build_base_prompt(self, caption: str, transcript: str, 
@@ -260,10 +271,11 @@ Set each "availableFeatures" flag to true ONLY if meaningful data was found for
             if focus_resource: prompt_core += self._build_resource_prompt()
             prompt_core += self._build_json_schema_prompt(core_lenses)
 
-            response_core = await self.model.generate_content_async(
-                [prompt_core] + files_to_upload,
-                generation_config={"response_mime_type": "application/json"}
-            )
+            async with llm_pool:
+                response_core = await self.model.generate_content_async(
+                    [prompt_core] + files_to_upload,
+                    generation_config={"response_mime_type": "application/json"}
+                )
             result = json.loads(response_core.text)
             if isinstance(result, list): result = result[0]
 
@@ -313,6 +325,49 @@ Set each "availableFeatures" flag to true ONLY if meaningful data was found for
                 "availableFeatures": {},
             }
 
+    async def get_preview(self, metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Fast-lane pass: a provisional summary from yt-dlp metadata alone.
+        
+        Runs on the lightweight preview model with no media attached, so it
+        can answer while the video is still downloading and transcribing.
+        
+        Args:
+            metadata: Video metadata with 'title', 'uploader' and 'caption'
+            
+        Returns:
+            Dict with 'summary' and 'keyTopics', or None if the pass fails
+        """
+        try:
+            prompt = f"""You are previewing a short-form video for a tool called "UnReel" using ONLY its metadata; the video itself has not been watched yet.
+
+Video Title: {metadata.get('title') or 'Unknown'}
+Video Uploader: {metadata.get('uploader') or 'Unknown'}
+Video Caption: {metadata.get('caption') or 'None'}
+
+Return ONLY a JSON object with these exact keys:
+{{
+  "summary": "1-2 sentence provisional summary in ENGLISH of what the video is likely about",
+  "keyTopics": ["3-5 likely topic strings"]
+}}
+Do not invent specifics that the metadata does not support."""
+
+            async with llm_pool:
+                response = await self.preview_model.generate_content_async(
+                    prompt,
+                    generation_config={"response_mime_type": "application/json"}
+                )
+            result = json.loads(response.text)
+            if isinstance(result, list): result = result[0]
+            return {
+                "summary": result.get("summary", ""),
+                "keyTopics": result.get("keyTopics", []),
+            }
+            
+        except Exception as e:
+            logger.warning(f"Fast-lane preview failed: {e}")
+            return None
+
     async def refine_with_evidence(self, claims: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         RAG Pass 2: Take fact-check claims enriched with search evidence
@@ -345,12 +400,13 @@ For each claim, return a JSON array where each object has:
 CRITICAL: Base your verdict on the search evidence, not just your internal knowledge. If the evidence is conflicting, say "Inconclusive".
 Return ONLY a JSON array."""
 
-            response = await self.model.generate_content_async(
-                prompt,
-                generation_config={
-                    "response_mime_type": "application/json"
-                }
-            )
+            async with llm_pool:
+                response = await self.model.generate_content_async(
+                    prompt,
+                    generation_config={
+                        "response_mime_type": "application/json"
+                    }
+                )
 
             refined = json.loads(response.text)
             if isinstance(refined, list):
@@ -363,47 +419,140 @@ Return ONLY a JSON array."""
             logger.error(f"Error in RAG refinement: {e}", exc_info=True)
             return claims  # fallback to original unrefined claims
 
-    async def chat_with_video(self, context: str, message: str, persona: Optional[str] = None) -> str:
-        """
-        Chat with the AI about a video using highly structured prompt engineering.
-        
-        Args:
-            context: Video analysis context
-            message: User's chat message
-            persona: Optional string of custom traits and instructions
-            
-        Returns:
-            AI's response to the chat message
-        """
-        try:
-            system_role = (
-                "You are UnReel AI, an advanced video intelligence assistant. "
-                "Your primary job is to answer the user's question based on the provided Video Context. "
-                "If the video context lacks the answer, state that clearly, though you may supplement with general knowledge if helpful."
-            )
-
-            persona_block = ""
-            if persona:
-                persona_block = f"""
+    def _build_persona_block(self, persona: Optional[str]) -> str:
+        if not persona:
+            return ""
+        return f"""
 --- USER PERSONA & STYLE DIRECTIVES ---
 The user has configured the following strict rules for your behavior and formatting:
 {persona}
 CRITICAL: You MUST fully adopt this persona, tone, and formatting style for your entire response.
 """
-            
-            prompt = f"""{system_role}
+
+    def _build_excerpts_block(self, excerpts: Optional[str]) -> str:
+        if not excerpts:
+            return ""
+        return f"""
+--- RELEVANT TRANSCRIPT EXCERPTS ---
+{excerpts}
+"""
+
+    def _build_chat_prompt(self, context: str, message: str, persona: Optional[str] = None,
+                           excerpts: Optional[str] = None) -> str:
+        """Build the structured chat prompt shared by the blocking and streaming chat paths."""
+        return f"""{CHAT_SYSTEM_ROLE}
 
 --- VIDEO CONTEXT ---
 {context}
-{persona_block}
+{self._build_excerpts_block(excerpts)}{self._build_persona_block(persona)}
 --- USER QUESTION ---
 {message}
 
 Provide your response below:"""
 
-            response = await self.model.generate_content_async(prompt)
+    async def _prepare_chat(self, context: str, message: str, persona: Optional[str],
+                            analysis_id: Optional[str], excerpts: Optional[str] = None):
+        """
+        Pick the model and prompt for a chat turn.
+        
+        With context caching enabled, the system role and video context live in
+        a Gemini cached content for the analysis and the turn only carries the
+        retrieved transcript excerpts, persona and question; otherwise the full
+        prompt is sent inline.
+        
+        Returns:
+            Tuple of (model, prompt)
+        """
+        if analysis_id and settings.CHAT_CONTEXT_CACHE_ENABLED:
+            cached_model = await chat_context_cache.get_model(
+                analysis_id, CHAT_SYSTEM_ROLE, f"--- VIDEO CONTEXT ---\n{context}"
+            )
+            if cached_model is not None:
+                prompt = f"""{self._build_excerpts_block(excerpts)}{self._build_persona_block(persona)}
+--- USER QUESTION ---
+{message}
+
+Provide your response below:"""
+                return cached_model, prompt
+        return self.model, self._build_chat_prompt(context, message, persona, excerpts)
+
+    async def chat_with_video(self, context: str, message: str, persona: Optional[str] = None,
+                              analysis_id: Optional[str] = None, excerpts: Optional[str] = None) -> str:
+        """
+        Chat with the AI about a video using highly structured prompt engineering.
+        
+        Args:
+            context: Video analysis context
+            message: User's chat message
+            persona: Optional string of custom traits and instructions
+            analysis_id: ID of the analysis, used to reuse its cached context
+            excerpts: Transcript excerpts retrieved for this question (long videos)
+            
+        Returns:
+            AI's response to the chat message
+        """
+        try:
+            model, prompt = await self._prepare_chat(context, message, persona, analysis_id, excerpts)
+
+            async with llm_pool:
+                response = await model.generate_content_async(prompt)
             return response.text
             
         except Exception as e:
             logger.error(f"Error in AI chat: {str(e)}", exc_info=True)
-            return "I'm sorry, but I'm currently unable to process your request. Please try again later."
\ No newline at end of file
+            return CHAT_FALLBACK_REPLY
+
+    async def chat_with_video_stream(self, context: str, message: str,
+                                     persona: Optional[str] = None,
+                                     analysis_id: Optional[str] = None,
+                                     excerpts: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Streaming variant of chat_with_video: yields reply text as Gemini generates it.
+        
+        Args:
+            context: Video analysis context
+            message: User's chat message
+            persona: Optional string of custom traits and instructions
+            analysis_id: ID of the analysis, used to reuse its cached context
+            excerpts: Transcript excerpts retrieved for this question (long videos)
+            
+        Yields:
+            Successive text fragments of the reply
+            
+        Raises:
+            Exception: If generation fails (the caller decides how to report it mid-stream)
+        """
+        model, prompt = await self._prepare_chat(context, message, persona, analysis_id, excerpts)
+
+        # The model's stream is drained into a queue under the LLM slot and fragments are yielded outside
+        # it, so a slow client holds a few KB of reply text rather than one of the LLM_CONCURRENCY slots
+        fragments: asyncio.Queue = asyncio.Queue()
+
+        async def drain():
+            try:
+                async with llm_pool:
+                    response = await model.generate_content_async(prompt, stream=True)
+                    async for chunk in response:
+                        try:
+                            text = chunk.text
+                        except ValueError:
+                            # Chunks without text parts (e.g. the final finish_reason chunk)
+                            continue
+                        if text:
+                            fragments.put_nowait(text)
+                fragments.put_nowait(None)
+            except Exception as e:
+                fragments.put_nowait(e)
+
+        producer = asyncio.create_task(drain())
+        try:
+            while True:
+                fragment = await fragments.get()
+                if fragment is None:
+                    return
+                if isinstance(fragment, Exception):
+                    raise fragment
+                yield fragment
+        finally:
+            # The client went away: stop generating
+            producer.cancel()
@@ -2,25 +2,81 @@ import logging
 import os
 import shutil
 import asyncio
-from typing import Dict, Any
+import zlib
+import uuid
+from typing import Dict, Any, List, Optional, Set
 
-from sqlalchemy.orm import Session
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import schemas
+from app.core.config import settings
 from app.services.media_service import MediaService
 from app.services.ai_service import AiService
 from app.services.translation_service import TranslationService
 from app.services.search_service import SearchService
+from app.services.job_service import get_job_service
+from app.services.progress_service import progress_tracker
+from app.services.retrieval_service import build_transcript_index
+from app.services.search_index_service import search_index
+from app.services.keyword_search_service import keyword_search
+from app.services.blob_store_service import blob_store, extract_rag_results, RAG_LENS_FIELDS
 from app.models import Analysis, ChatMessage
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Lens columns published individually as partial results
+LENS_FIELDS = [
+    "locationContext",
+    "educationalInsights",
+    "shoppingItems",
+    "factCheck",
+    "enhancedResources",
+    "musicContext",
+]
+
+# Fact-check verdicts the analysis prompt asks for
+FACT_CHECK_VERDICTS = ["Supported", "Contradicted", "Inconclusive"]
+
+# Fields of AnalysisResponse.content, in response order
+CONTENT_FIELDS = ["summary", "translation", "keyTopics", "mentionedResources"] + LENS_FIELDS
+
+# Validators for the content columns (their AnalysisContent field types)
+CONTENT_ADAPTERS = {
+    field: TypeAdapter(info.annotation) for field, info in schemas.AnalysisContent.model_fields.items()
+}
+
+# Selectable top-level response fields (?fields=) and the columns each one needs
+RESPONSE_FIELD_COLUMNS = {
+    "metadata": ["title", "uploader", "caption"],
+    "content": CONTENT_FIELDS,
+    "availableFeatures": ["availableFeatures"],
+    "fullTranscript": [],
+    "detectedLanguage": ["detectedLanguage"],
+    "supportedLanguages": [],
+    "progress": [],
+}
+
+# Response fields stored as compressed blobs outside the analyses row (see blob_store_service)
+RESPONSE_FIELD_BLOBS = {
+    "fullTranscript": ["fullTranscript"],
+}
+
+# Always part of the response
+BASE_COLUMNS = ["originalUrl", "status", "createdAt"]
+
 # Global service instances (Singleton pattern)
 _media_service = None
 _ai_service = None
 _translation_service = None
 _search_service = None
 
+def shutdown_shared_services():
+    """Release resources held by the shared service instances (translation worker processes)."""
+    if _translation_service is not None:
+        _translation_service.shutdown()
+
 class AnalysisService:
     """Service for orchestrating video analysis workflow."""
     
@@ -42,7 +98,30 @@ class AnalysisService:
         self.translation_service = _translation_service
         self.search_service = _search_service
 
-    async def create_analysis(self, db: Session, url: str, user_id: str = None,
+    async def create_pending_analysis(self, db: AsyncSession, url: str, user_id: str = None) -> Analysis:
+        """
+        Create the initial "processing" analysis record.
+        
+        Args:
+            db: Database session
+            url: URL of the video to analyze
+            user_id: ID of the user requesting analysis
+            
+        Returns:
+            The persisted Analysis row
+        """
+        analysis = Analysis(
+            id=str(uuid.uuid4()),
+            originalUrl=url,
+            userId=user_id,
+            status="processing"
+        )
+        get_job_service().claim(analysis)
+        db.add(analysis)
+        await db.commit()
+        return analysis
+
+    async def create_analysis(self, db: AsyncSession, url: str, user_id: str = None,
                               focus_location: bool = True,
                               focus_educational: bool = False,
                               focus_shopping: bool = False,
@@ -68,20 +147,49 @@ class AnalysisService:
         Raises:
             Exception: If analysis fails
         """
-        # Create initial analysis record
-        analysis = Analysis(
-            originalUrl=url,
-            userId=user_id,
-            status="processing"
+        analysis = await self.create_pending_analysis(db, url, user_id)
+        return await self.run_analysis(
+            db, analysis,
+            focus_location=focus_location,
+            focus_educational=focus_educational,
+            focus_shopping=focus_shopping,
+            focus_fact_check=focus_fact_check,
+            focus_resource=focus_resource,
+            focus_music=focus_music
         )
-        db.add(analysis)
-        db.commit()
-        db.refresh(analysis)
+
+    async def run_analysis(self, db: AsyncSession, analysis: Analysis,
+                           focus_location: bool = True,
+                           focus_educational: bool = False,
+                           focus_shopping: bool = False,
+                           focus_fact_check: bool = False,
+                           focus_resource: bool = False,
+                           focus_music: bool = False) -> Dict[str, Any]:
+        """
+        Run the full analysis pipeline for an existing "processing" record.
+        
+        Used directly by the synchronous endpoint and by the background job
+        workers. Stage transitions are reported to the progress tracker.
         
+        Returns:
+            Dictionary containing analysis results
+            
+        Raises:
+            Exception: If analysis fails
+        """
+        analysis_id = analysis.id
+        url = analysis.originalUrl
         media_data = None
+        preview_task = None
         try:
             # Process video using media service
-            media_data = await self.media_service.process_video(url)
+            progress_tracker.update(analysis.id, "downloading")
+            if settings.FAST_LANE_PREVIEW_ENABLED:
+                # Fast lane: metadata-only preview runs alongside download/transcription
+                preview_task = asyncio.create_task(self._fast_lane_preview(analysis.id, url))
+            media_data = await self.media_service.process_video(
+                url, on_downloaded=lambda metadata, tier: self._publish_download(analysis_id, metadata, tier)
+            )
             
             # Extract data from media processing
             audio_path = media_data["audio_path"]
@@ -94,12 +202,19 @@ class AnalysisService:
             logger.debug(f"Audio path: {audio_path}")
             logger.debug(f"Frame paths: {frame_paths}")
             logger.debug(f"Metadata: {metadata}")
+            progress_tracker.publish(analysis.id, "transcript", {
+                "available": bool(audio_path),
+                "length": len(transcript or ""),
+            })
             
             # Detect language of the transcript
+            progress_tracker.update(analysis.id, "detecting_language")
             detected_language = self.translation_service.detect_language(transcript)
             logger.info(f"Detected transcript language: {detected_language}")
+            progress_tracker.publish(analysis.id, "language", {"detectedLanguage": detected_language})
             
             # Analyze content with AI (pass lens toggles)
+            progress_tracker.update(analysis.id, "analyzing")
             ai_result = await self.ai_service.get_analysis(
                 audio_path, 
                 frame_paths, 
@@ -131,51 +246,76 @@ class AnalysisService:
             analysis.enhancedResources = ai_result.get("enhancedResources")
             analysis.musicContext = ai_result.get("musicContext")
             analysis.availableFeatures = ai_result.get("availableFeatures")
-            analysis.fullTranscript = transcript
+            transcript_index = build_transcript_index(
+                transcript, media_data.get("transcript_segments"), settings.TRANSCRIPT_CHUNK_CHARS
+            )
             analysis.detectedLanguage = detected_language
             
+            # The full multimodal result supersedes any provisional preview still in flight
+            if preview_task and not preview_task.done():
+                preview_task.cancel()
+            
+            # Publish the core result first so clients can render it before enrichment finishes
+            progress_tracker.publish(analysis.id, "summary", {
+                "summary": analysis.summary,
+                "translation": analysis.translation,
+                "keyTopics": analysis.keyTopics,
+                "mentionedResources": analysis.mentionedResources,
+                "availableFeatures": analysis.availableFeatures,
+            })
+            for lens_field in LENS_FIELDS:
+                lens_data = getattr(analysis, lens_field)
+                if lens_data is not None:
+                    progress_tracker.publish(analysis.id, "lens", {"lens": lens_field, "data": lens_data})
+            
             # ─── RAG ENRICHMENT PASS (CONCURRENT) ──────────────────────
             # Run all RAG passes in parallel for maximum throughput
             logger.info("Starting RAG enrichment pass...")
+            progress_tracker.update(analysis.id, "enriching")
             
             rag_tasks = {}
             
             if focus_fact_check and analysis.factCheck:
                 logger.info(f"RAG: Verifying {len(analysis.factCheck)} claims with Google Search...")
-                rag_tasks["factCheck"] = self.search_service.verify_claims(analysis.factCheck)
+                rag_tasks["factCheck"] = self._fact_check_pass(analysis.factCheck)
             
             if focus_resource and analysis.enhancedResources:
                 logger.info(f"RAG: Finding URLs for {len(analysis.enhancedResources)} resources...")
-                rag_tasks["resources"] = self.search_service.find_resource_urls(analysis.enhancedResources)
+                rag_tasks["enhancedResources"] = self.search_service.find_resource_urls(analysis.enhancedResources)
             
             if focus_shopping and analysis.shoppingItems:
                 logger.info(f"RAG: Finding purchase links for {len(analysis.shoppingItems)} items...")
-                rag_tasks["shopping"] = self.search_service.find_product_urls(analysis.shoppingItems)
+                rag_tasks["shoppingItems"] = self.search_service.find_product_urls(analysis.shoppingItems)
             
             if rag_tasks:
-                keys = list(rag_tasks.keys())
-                results = await asyncio.gather(*rag_tasks.values(), return_exceptions=True)
-                rag_results = dict(zip(keys, results))
-                
-                # Apply fact-check results (needs a second AI refinement pass)
-                if "factCheck" in rag_results and not isinstance(rag_results["factCheck"], Exception):
-                    refined_claims = await self.ai_service.refine_with_evidence(rag_results["factCheck"])
-                    analysis.factCheck = refined_claims
-                    logger.info("RAG: Fact-check claims refined with live evidence.")
-                
-                if "resources" in rag_results and not isinstance(rag_results["resources"], Exception):
-                    analysis.enhancedResources = rag_results["resources"]
-                    logger.info("RAG: Resource URLs resolved.")
+                async def run_pass(field, coro):
+                    try:
+                        return field, await coro
+                    except Exception as rag_error:
+                        logger.error(f"RAG: {field} enrichment failed: {rag_error}")
+                        return field, None
                 
-                if "shopping" in rag_results and not isinstance(rag_results["shopping"], Exception):
-                    analysis.shoppingItems = rag_results["shopping"]
-                    logger.info("RAG: Shopping URLs resolved.")
+                # Apply (and publish) each enrichment as soon as it lands
+                for next_pass in asyncio.as_completed([run_pass(f, c) for f, c in rag_tasks.items()]):
+                    field, enriched = await next_pass
+                    if enriched is None:
+                        continue
+                    setattr(analysis, field, enriched)
+                    progress_tracker.publish(analysis.id, "enrichment", {"lens": field, "data": enriched})
+                    logger.info(f"RAG: {field} enriched with live search results.")
             
             
             # ─── END RAG ENRICHMENT ─────────────────────────────────────
             
-            db.commit()
-            db.refresh(analysis)
+            progress_tracker.update(analysis.id, "saving")
+            # Raw search results and evidence are kept out of the lens columns (served by the lens endpoint)
+            rag_results = extract_rag_results({field: getattr(analysis, field) for field in RAG_LENS_FIELDS})
+            self.validate_content(analysis)
+            await blob_store.stage(db, analysis.id, {
+                "fullTranscript": transcript,
+                "transcriptIndex": transcript_index,
+                "ragResults": rag_results or None,
+            })
             
             # Save initial summary as first chat message
             chat_message = ChatMessage(
@@ -184,46 +324,34 @@ class AnalysisService:
                 reply=ai_result["summary"]
             )
             db.add(chat_message)
-            db.commit()
+            
+            # Make the analysis searchable right away (the history search backfills on failure)
+            search_vectors = await search_index.stage_analysis(db, analysis, transcript, transcript_index)
+            await keyword_search.stage_analysis(db, analysis, transcript)
+            
+            # Results, blobs, first chat message and search documents land in one transaction
+            await db.commit()
+            search_index.publish(analysis, search_vectors)
+            
+            progress_tracker.update(analysis.id, "completed")
             
             # Return the response in the exact format specified
-            return {
-                "analysisId": analysis.id,
-                "originalUrl": analysis.originalUrl,
-                "status": analysis.status,
-                "metadata": {
-                    "title": analysis.title,
-                    "uploader": analysis.uploader,
-                    "caption": analysis.caption
-                },
-                "content": {
-                    "summary": analysis.summary,
-                    "translation": analysis.translation,
-                    "keyTopics": analysis.keyTopics,
-                    "mentionedResources": analysis.mentionedResources,
-                    "locationContext": analysis.locationContext,
-                    "educationalInsights": analysis.educationalInsights,
-                    "shoppingItems": analysis.shoppingItems,
-                    "factCheck": analysis.factCheck,
-                    "enhancedResources": analysis.enhancedResources,
-                    "musicContext": analysis.musicContext,
-                },
-                "availableFeatures": analysis.availableFeatures,
-                "fullTranscript": analysis.fullTranscript,
-                "detectedLanguage": analysis.detectedLanguage,
-                "supportedLanguages": self.translation_service.get_supported_languages(),
-                "createdAt": analysis.createdAt
-            }
+            return self.to_response(analysis, blobs={"fullTranscript": transcript})
             
         except Exception as e:
-            # Update analysis status to failed
+            # Update analysis status to failed (discarding a half-flushed transaction first)
+            await db.rollback()
             analysis.status = "failed"
-            db.commit()
+            await db.commit()
+            progress_tracker.update(analysis_id, "failed", error=str(e))
             
             logger.error(f"Analysis failed: {str(e)}", exc_info=True)
             # Re-raise the exception
             raise
         finally:
+            if preview_task and not preview_task.done():
+                preview_task.cancel()
+            
             # Clean up temporary directory if it exists
             if media_data and "temp_dir" in media_data:
                 temp_dir = media_data["temp_dir"]
@@ -232,4 +360,183 @@ class AnalysisService:
                         shutil.rmtree(temp_dir)
                         logger.info(f"Cleaned up temporary directory: {temp_dir}")
                     except Exception as cleanup_error:
-                        logger.error(f"Error cleaning up temporary directory {temp_dir}: {str(cleanup_error)}")
\ No newline at end of file
+                        logger.error(f"Error cleaning up temporary directory {temp_dir}: {str(cleanup_error)}")
+
+    @staticmethod
+    def _publish_download(analysis_id: str, metadata: Dict[str, Any], download_tier: str):
+        """Report the finished download (called by the media pipeline before transcription starts)."""
+        progress_tracker.publish(analysis_id, "download", {"tier": download_tier, "metadata": metadata})
+        progress_tracker.update(analysis_id, "transcribing")
+
+    async def _fast_lane_preview(self, analysis_id: str, url: str):
+        """Publish a provisional summary built from yt-dlp metadata alone."""
+        try:
+            metadata = await asyncio.wait_for(
+                self.media_service.fetch_metadata(url),
+                timeout=settings.FAST_LANE_TIMEOUT_SECONDS
+            )
+            if not metadata or not (metadata.get("title") or metadata.get("caption")):
+                return
+            preview = await asyncio.wait_for(
+                self.ai_service.get_preview(metadata),
+                timeout=settings.FAST_LANE_TIMEOUT_SECONDS
+            )
+            if preview:
+                progress_tracker.set_preview(analysis_id, {**preview, "metadata": metadata})
+                logger.info(f"Fast-lane preview published for analysis {analysis_id}")
+        except asyncio.TimeoutError:
+            logger.info(f"Fast-lane preview timed out for analysis {analysis_id}")
+
+    async def _fact_check_pass(self, claims):
+        """Search for evidence, then run the Gemini refinement pass over it."""
+        evidence = await self.search_service.verify_claims(claims)
+        return await self.ai_service.refine_with_evidence(evidence)
+
+    @staticmethod
+    def parse_fields(fields: Optional[str]) -> Optional[Dict[str, Optional[Set[str]]]]:
+        """
+        Parse a sparse fieldset such as "metadata,content.summary,content.factCheck".
+        
+        Args:
+            fields: Comma-separated top-level response fields, or content.<field>
+            
+        Returns:
+            Mapping of top-level field to the selected content fields (None
+            meaning all of them), or None if no selection was given
+            
+        Raises:
+            ValueError: If a field is unknown
+        """
+        if not fields:
+            return None
+        
+        selection: Dict[str, Optional[Set[str]]] = {}
+        for field in filter(None, (f.strip() for f in fields.split(","))):
+            top, _, sub = field.partition(".")
+            if top not in RESPONSE_FIELD_COLUMNS or (sub and (top != "content" or sub not in CONTENT_FIELDS)):
+                raise ValueError(f"Unknown field: {field}")
+            if not sub:
+                selection[top] = None
+            elif top not in selection or selection[top] is not None:
+                selection.setdefault(top, set()).add(sub)
+        return selection
+    
+    @staticmethod
+    def columns_for(selection: Optional[Dict[str, Optional[Set[str]]]]) -> List[str]:
+        """Analysis columns needed to render a field selection (for load_only)."""
+        if selection is None:
+            return BASE_COLUMNS + [c for columns in RESPONSE_FIELD_COLUMNS.values() for c in columns]
+        
+        columns = list(BASE_COLUMNS)
+        for top, sub in selection.items():
+            columns += RESPONSE_FIELD_COLUMNS[top] if sub is None else [c for c in CONTENT_FIELDS if c in sub]
+        return list(dict.fromkeys(columns))
+    
+    @staticmethod
+    def blobs_for(selection: Optional[Dict[str, Optional[Set[str]]]]) -> List[str]:
+        """Blob kinds needed to render a field selection (loaded with blob_store.load)."""
+        return [
+            kind for field, kinds in RESPONSE_FIELD_BLOBS.items()
+            if selection is None or field in selection for kind in kinds
+        ]
+    
+    @staticmethod
+    def validate_content(analysis: Analysis):
+        """
+        Validate the content columns against their response types, once, before saving.
+        
+        Values are stored in their serialized AnalysisResponse shape (defaults
+        filled in, unknown keys dropped), so responses built from the row can
+        be serialized without response model validation. A value that does
+        not validate is stored as generated.
+        
+        Args:
+            analysis: Analysis model instance
+        """
+        for field, adapter in CONTENT_ADAPTERS.items():
+            value = getattr(analysis, field)
+            if value is None:
+                continue
+            try:
+                setattr(analysis, field, adapter.dump_python(adapter.validate_python(value), mode="json"))
+            except ValidationError as e:
+                logger.warning(f"{field} of analysis {analysis.id} does not match its schema: {e.error_count()} errors")
+    
+    @staticmethod
+    def selection_key(selection: Optional[Dict[str, Optional[Set[str]]]]) -> str:
+        """Canonical string for a field selection (cache variant key)."""
+        if selection is None:
+            return ""
+        return ",".join(sorted(
+            top if sub is None else ",".join(f"{top}.{field}" for field in sorted(sub))
+            for top, sub in selection.items()
+        ))
+    
+    @staticmethod
+    def etag(analysis: Analysis, variant: str = "") -> str:
+        """
+        Strong ETag for a rendering of an analysis.
+        
+        Built from the row version and updatedAt (both change on every
+        write) plus the field selection, since each selection is a
+        different representation.
+        """
+        updated = int(analysis.updatedAt.timestamp() * 1000) if analysis.updatedAt else 0
+        return f'"{analysis.id}-{analysis.version}-{updated}-{zlib.crc32(variant.encode("utf-8")):08x}"'
+    
+    @staticmethod
+    def to_response(analysis: Analysis,
+                    selection: Optional[Dict[str, Optional[Set[str]]]] = None,
+                    blobs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Map an Analysis row to the AnalysisResponse shape.
+        
+        Args:
+            analysis: Analysis model instance
+            selection: Optional sparse fieldset from parse_fields; only the
+                selected fields are rendered (and only their columns touched)
+            blobs: The analysis' blobs named by blobs_for(selection)
+            
+        Returns:
+            Response dictionary
+        """
+        def wanted(field: str) -> bool:
+            return selection is None or field in selection
+        
+        response = {
+            "analysisId": analysis.id,
+            "originalUrl": analysis.originalUrl,
+            "status": analysis.status,
+        }
+        if wanted("metadata"):
+            response["metadata"] = {
+                "title": analysis.title,
+                "uploader": analysis.uploader,
+                "caption": analysis.caption
+            }
+        if wanted("content"):
+            sub = selection.get("content") if selection else None
+            response["content"] = {
+                field: getattr(analysis, field) for field in CONTENT_FIELDS if sub is None or field in sub
+            }
+        if wanted("availableFeatures"):
+            response["availableFeatures"] = analysis.availableFeatures
+        if wanted("fullTranscript"):
+            response["fullTranscript"] = (blobs or {}).get("fullTranscript")
+        if wanted("detectedLanguage"):
+            response["detectedLanguage"] = analysis.detectedLanguage
+        if wanted("supportedLanguages"):
+            response["supportedLanguages"] = dict(TranslationService.SUPPORTED_LANGUAGES)
+        response["createdAt"] = analysis.createdAt
+        
+        if analysis.status == "processing" and (wanted("progress") or wanted("content")):
+            progress = progress_tracker.get(analysis.id)
+            if wanted("progress"):
+                response["progress"] = progress
+            # Serve the provisional fast-lane result until the full analysis lands
+            content = response.get("content")
+            if content is not None and progress and progress.get("preview"):
+                for field in ("summary", "keyTopics"):
+                    if field in content and not content[field]:
+                        content[field] = progress["preview"].get(field)
+        return response
@@ -0,0 +1,138 @@
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import ChatMessage
+from app.services.ai_service import CHAT_FALLBACK_REPLY
+from app.services.embedding_service import embed_text, normalize_text, EMBEDDING_DIM
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_ANALYSES = 500
+
+
+class ChatAnswerCache:
+    """
+    Per-analysis cache of chat answers, seeded from prior complete ChatMessage rows.
+
+    Turns answered from the cache are saved as rows marked cached, which
+    are left out of the seeding query: they repeat an earlier row's reply.
+
+    A question is answered from the cache when an earlier question on the
+    same analysis, asked with the same persona, either normalizes to the
+    same text (exact hit) or has a cosine similarity of at least
+    CHAT_ANSWER_CACHE_THRESHOLD between their local embeddings (near hit).
+    Chat turns are stateless (no conversation history goes to the model),
+    so a cached reply is as good as a fresh one.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_ANALYSES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    async def lookup(self, db: AsyncSession, analysis_id: str, message: str,
+                     persona: Optional[str] = None) -> Optional[str]:
+        """
+        Find a cached reply for a question.
+
+        Args:
+            db: Database session (used to seed the cache from chat history)
+            analysis_id: ID of the analysis
+            message: User's chat message
+            persona: Persona the question is asked with
+
+        Returns:
+            Cached reply, or None on a miss
+        """
+        if not settings.CHAT_ANSWER_CACHE_ENABLED:
+            return None
+
+        entry = await self._load(db, analysis_id)
+        key = (normalize_text(message), self._persona_key(persona))
+        if not key[0]:
+            return None
+
+        reply = entry["exact"].get(key)
+        if reply is not None:
+            logger.info(f"Chat answer cache exact hit for analysis {analysis_id}")
+            return reply
+
+        candidates = [i for i, (_, p) in enumerate(entry["keys"]) if p == key[1]]
+        if not candidates:
+            return None
+        scores = entry["vectors"][candidates] @ embed_text(message)
+        best = int(np.argmax(scores))
+        if scores[best] >= settings.CHAT_ANSWER_CACHE_THRESHOLD:
+            logger.info(f"Chat answer cache near hit for analysis {analysis_id} (similarity {scores[best]:.2f})")
+            return entry["replies"][candidates[best]]
+        return None
+
+    def remember(self, analysis_id: str, message: str, persona: Optional[str], reply: str):
+        """Add a freshly generated reply to an analysis that is already cached."""
+        entry = self._entries.get(analysis_id)
+        if entry is None or not settings.CHAT_ANSWER_CACHE_ENABLED:
+            # Not loaded yet: it will be seeded from the saved ChatMessage row
+            return
+        self._add(entry, message, persona, reply)
+
+    async def _load(self, db: AsyncSession, analysis_id: str) -> Dict[str, Any]:
+        entry = self._entries.get(analysis_id)
+        if entry is not None:
+            self._entries.move_to_end(analysis_id)
+            return entry
+
+        entry = {
+            "exact": {},
+            "keys": [],
+            "replies": [],
+            "vectors": np.zeros((0, EMBEDDING_DIM), dtype=np.float32),
+        }
+        rows = (await db.execute(
+            select(ChatMessage.message, ChatMessage.persona, ChatMessage.reply)
+            .where(
+                ChatMessage.analysisId == analysis_id,
+                ChatMessage.complete.is_(True),
+                ChatMessage.cached.is_(False),
+            )
+            .order_by(ChatMessage.createdAt.desc())
+            .limit(settings.CHAT_ANSWER_CACHE_MAX_MESSAGES)
+        )).all()
+        # Oldest first, so newer answers to the same question win the exact lookup
+        for row in reversed(rows):
+            self._add(entry, row.message, row.persona, row.reply)
+
+        self._entries[analysis_id] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _add(self, entry: Dict[str, Any], message: str, persona: Optional[str], reply: str):
+        key = (normalize_text(message), self._persona_key(persona))
+        # Never serve the generic failure reply from the cache
+        if not key[0] or not reply or reply == CHAT_FALLBACK_REPLY:
+            return
+        entry["exact"][key] = reply
+        entry["keys"].append(key)
+        entry["replies"].append(reply)
+        entry["vectors"] = np.vstack([entry["vectors"], embed_text(message)])
+
+        overflow = len(entry["replies"]) - settings.CHAT_ANSWER_CACHE_MAX_MESSAGES
+        if overflow > 0:
+            del entry["keys"][:overflow]
+            del entry["replies"][:overflow]
+            entry["vectors"] = entry["vectors"][overflow:]
+            entry["exact"] = dict(zip(entry["keys"], entry["replies"]))
+
+    @staticmethod
+    def _persona_key(persona: Optional[str]) -> str:
+        return normalize_text(persona or "")
+
+
+# Global cache instance (Singleton pattern)
+chat_answer_cache = ChatAnswerCache()
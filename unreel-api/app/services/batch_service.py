@@ -0,0 +1,140 @@
+import logging
+import uuid
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qs, urlencode
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Analysis
+from app.services.job_service import get_job_service, QueueFullError
+from app.services.progress_service import progress_tracker
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Query parameters that identify the video itself and must survive canonicalization
+_IDENTITY_PARAMS = {"v", "id"}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a video URL so that trivially different links deduplicate.
+
+    Lower-cases the scheme and host, drops "www."/"m." prefixes, tracking
+    query parameters (igsh, utm_*, si, ...), fragments and trailing slashes,
+    and maps share-link variants (youtu.be, /reels/) to a single form.
+
+    Args:
+        url: URL as submitted by the user
+
+    Returns:
+        Canonical URL string
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = parts.netloc.lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    path = parts.path.rstrip("/") or "/"
+    query = {k: v for k, v in parse_qs(parts.query).items() if k in _IDENTITY_PARAMS}
+
+    if host == "youtu.be":
+        host, query, path = "youtube.com", {"v": [path.lstrip("/")]}, "/watch"
+    if host == "instagram.com" and path.startswith("/reels/"):
+        path = "/reel/" + path[len("/reels/"):]
+
+    return urlunsplit((scheme, host, path, urlencode(query, doseq=True), ""))
+
+
+class BatchService:
+    """Service for submitting and tracking batches of analyses."""
+
+    async def create_batch(self, db: AsyncSession, urls: List[str], user_id: Optional[str],
+                     options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Deduplicate the URLs, create one pending analysis per unique video and
+        enqueue them all on the shared job queue.
+
+        Args:
+            db: Database session
+            urls: URLs as submitted
+            user_id: ID of the user submitting the batch (fair-scheduling lane)
+            options: Lens toggles forwarded to AnalysisService.run_analysis
+
+        Returns:
+            Batch status dictionary (BatchAnalysisResponse shape), with one
+            item per unique video (its first submitted URL) in submission
+            order, as get_batch returns it
+
+        Raises:
+            QueueFullError: If the queue cannot take every unique item
+        """
+        canonical_urls = [canonicalize_url(url) for url in urls]
+        unique_urls: Dict[str, str] = {}
+        for url, canonical in zip(urls, canonical_urls):
+            unique_urls.setdefault(canonical, url)
+
+        job_service = get_job_service()
+        if not job_service.running or not job_service.has_capacity(len(unique_urls)):
+            raise QueueFullError(f"Analysis queue cannot take {len(unique_urls)} more jobs")
+
+        batch_id = str(uuid.uuid4())
+        analysis_ids = {canonical: str(uuid.uuid4()) for canonical in unique_urls}
+        analyses = [
+            Analysis(id=analysis_ids[canonical], originalUrl=url, userId=user_id,
+                     batchId=batch_id, batchPosition=position, status="processing")
+            for position, (canonical, url) in enumerate(unique_urls.items())
+        ]
+        for analysis in analyses:
+            job_service.claim(analysis)
+        db.add_all(analyses)
+        await db.commit()
+
+        for analysis_id in analysis_ids.values():
+            job_service.submit(analysis_id, options, owner=user_id)
+
+        logger.info(f"Batch {batch_id}: {len(urls)} URLs submitted, {len(analysis_ids)} unique analyses queued")
+        items = [self._item(url, canonical, analysis_ids[canonical], "processing") for canonical, url in unique_urls.items()]
+        return self._summarize(batch_id, items, unique_count=len(analysis_ids))
+
+    async def get_batch(self, db: AsyncSession, batch_id: str, user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Get per-item status for a batch (one item per unique video, in submission order).
+
+        Returns:
+            Batch status dictionary, or None if the batch does not exist for this user
+        """
+        rows = (await db.execute(
+            select(Analysis.id, Analysis.originalUrl, Analysis.status)
+            .where(Analysis.batchId == batch_id, Analysis.userId == user_id)
+            .order_by(Analysis.batchPosition.asc(), Analysis.createdAt.asc(), Analysis.id.asc())
+        )).all()
+        if not rows:
+            return None
+        items = [self._item(row.originalUrl, canonicalize_url(row.originalUrl), row.id, row.status) for row in rows]
+        return self._summarize(batch_id, items, unique_count=len(rows))
+
+    def _item(self, url: str, canonical: str, analysis_id: str, status: str) -> Dict[str, Any]:
+        progress = progress_tracker.get(analysis_id) if status == "processing" else None
+        return {
+            "url": url,
+            "canonicalUrl": canonical,
+            "analysisId": analysis_id,
+            "status": status,
+            "stage": progress["stage"] if progress else None,
+        }
+
+    def _summarize(self, batch_id: str, items: List[Dict[str, Any]], unique_count: int) -> Dict[str, Any]:
+        statuses = {item["analysisId"]: item["status"] for item in items}
+        completed = sum(1 for status in statuses.values() if status == "completed")
+        failed = sum(1 for status in statuses.values() if status == "failed")
+        return {
+            "batchId": batch_id,
+            "status": "completed" if completed + failed == unique_count else "processing",
+            "total": unique_count,
+            "completed": completed,
+            "failed": failed,
+            "items": items,
+        }
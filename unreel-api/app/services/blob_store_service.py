@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import os
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.responses import serialize_json, deserialize_json
+from app.models import AnalysisBlob
+
+try:
+    import zstandard
+except ImportError:  # Optional codec (zlib is used without it)
+    zstandard = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Payloads stored outside the analyses row
+BLOB_KINDS = ["fullTranscript", "transcriptIndex", "ragResults"]
+
+# Raw RAG output on lens items (search results, fact-check evidence), stored as the ragResults blob
+RAW_RESULT_KEYS = ("searchResults", "searchEvidence")
+
+# Lenses enriched by RAG passes
+RAG_LENS_FIELDS = ["shoppingItems", "factCheck", "enhancedResources"]
+
+# Values this small are not worth a codec round trip
+MIN_COMPRESS_BYTES = 256
+
+
+def encode_blob(value: Any) -> Tuple[str, int, bytes]:
+    """
+    Serialize and compress a blob value.
+
+    zstd when the zstandard package is installed, zlib otherwise; the
+    codec is stored with each blob, so both stay readable.
+
+    Returns:
+        (codec, uncompressed size, stored bytes)
+    """
+    raw = serialize_json(value)
+    if len(raw) < MIN_COMPRESS_BYTES:
+        return "identity", len(raw), raw
+    if zstandard is not None:
+        return "zstd", len(raw), zstandard.ZstdCompressor(level=settings.BLOB_ZSTD_LEVEL).compress(raw)
+    return "zlib", len(raw), zlib.compress(raw, settings.BLOB_ZLIB_LEVEL)
+
+
+def decode_blob(codec: str, data: bytes) -> Any:
+    """Decompress and parse a stored blob."""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Blob is zstd-compressed but the zstandard package is not installed")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == "zlib":
+        data = zlib.decompress(data)
+    elif codec != "identity":
+        raise ValueError(f"Unknown blob codec: {codec}")
+    return deserialize_json(data)
+
+
+def archive_path(analysis_id: str, kind: str, codec: str, created_at: Optional[datetime]) -> str:
+    """Relative path of an archived blob under ARCHIVE_DIR, grouped by the analysis' month."""
+    month = f"{created_at:%Y/%m}" if created_at else "undated"
+    return f"{month}/{analysis_id}/{kind}.{codec}"
+
+
+def write_archive(relative_path: str, data: bytes):
+    """Write an archived blob's stored (already compressed) bytes atomically."""
+    path = os.path.join(settings.ARCHIVE_DIR, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def read_archive(relative_path: str) -> bytes:
+    if not settings.ARCHIVE_DIR:
+        raise FileNotFoundError(f"ARCHIVE_DIR is not set, cannot read {relative_path}")
+    with open(os.path.join(settings.ARCHIVE_DIR, relative_path), "rb") as f:
+        return f.read()
+
+
+def extract_rag_results(lenses: Dict[str, Any]) -> Dict[str, List[Optional[Dict[str, Any]]]]:
+    """
+    Move raw RAG output off lens items, in place.
+
+    Args:
+        lenses: Lens field -> lens data (lists of item dicts)
+
+    Returns:
+        Lens field -> one entry per item (its raw keys, or None), for the
+        lenses that had any
+    """
+    results = {}
+    for field, items in lenses.items():
+        if not isinstance(items, list):
+            continue
+        extracted = []
+        for item in items:
+            raw = {key: item.pop(key) for key in RAW_RESULT_KEYS if isinstance(item, dict) and item.get(key) is not None}
+            extracted.append(raw or None)
+        if any(extracted):
+            results[field] = extracted
+    return results
+
+
+def merge_rag_results(items: Any, extracted: Optional[List[Optional[Dict[str, Any]]]]) -> Any:
+    """Put a lens' raw RAG output (from extract_rag_results) back onto its items."""
+    if not isinstance(items, list) or not extracted:
+        return items
+    return [
+        {**item, **raw} if isinstance(item, dict) and raw else item
+        for item, raw in zip(items, extracted + [None] * (len(items) - len(extracted)))
+    ]
+
+
+class BlobStore:
+    """
+    Compressed side-table storage for the large payloads of an analysis.
+
+    Transcripts, transcript indexes and raw RAG results are read by a few
+    endpoints only, so keeping them out of the analyses row keeps that row
+    (and every history, search and lens scan over it) small. Blobs are
+    loaded explicitly, by the endpoints that need them. Blobs of old
+    analyses may have been archived to local files (see retention_service);
+    they are read back transparently.
+    """
+
+    async def stage(self, db: AsyncSession, analysis_id: str, blobs: Dict[str, Any]):
+        """
+        Replace an analysis' blobs inside the caller's transaction (None values are skipped).
+
+        Args:
+            db: Database session
+            analysis_id: ID of the analysis
+            blobs: Blob kind -> value
+        """
+        blobs = {kind: value for kind, value in blobs.items() if value is not None}
+        if not blobs:
+            return
+        await db.execute(
+            delete(AnalysisBlob).where(AnalysisBlob.analysisId == analysis_id, AnalysisBlob.kind.in_(list(blobs)))
+        )
+        db.add_all([self.to_row(analysis_id, kind, value) for kind, value in blobs.items()])
+
+    async def save(self, db: AsyncSession, analysis_id: str, blobs: Dict[str, Any]):
+        """Replace an analysis' blobs and commit."""
+        await self.stage(db, analysis_id, blobs)
+        await db.commit()
+
+    async def load(self, db: AsyncSession, analysis_id: str, kinds: Iterable[str]) -> Dict[str, Any]:
+        """
+        Load some of an analysis' blobs.
+
+        Args:
+            db: Database session
+            analysis_id: ID of the analysis
+            kinds: Blob kinds to load
+
+        Returns:
+            Blob kind -> value, for the kinds that exist
+        """
+        return (await self.load_many(db, [analysis_id], kinds)).get(analysis_id, {})
+
+    async def load_many(self, db: AsyncSession, analysis_ids: List[str],
+                        kinds: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Load blobs of several analyses at once (analysis ID -> kind -> value)."""
+        kinds = list(kinds)
+        if not analysis_ids or not kinds:
+            return {}
+        rows = (await db.execute(
+            select(AnalysisBlob.analysisId, AnalysisBlob.kind, AnalysisBlob.codec, AnalysisBlob.data,
+                   AnalysisBlob.archivePath)
+            .where(AnalysisBlob.analysisId.in_(analysis_ids), AnalysisBlob.kind.in_(kinds))
+        )).all()
+        blobs = defaultdict(dict)
+        for row in rows:
+            data = row.data
+            if row.archivePath:
+                try:
+                    data = await asyncio.to_thread(read_archive, row.archivePath)
+                except OSError as e:
+                    logger.error(f"Archived {row.kind} blob of analysis {row.analysisId} is unreadable: {e}")
+                    continue
+            blobs[row.analysisId][row.kind] = decode_blob(row.codec, data)
+        return dict(blobs)
+
+    @staticmethod
+    def to_row(analysis_id: str, kind: str, value: Any) -> AnalysisBlob:
+        if kind not in BLOB_KINDS:
+            raise ValueError(f"Unknown blob kind: {kind}")
+        codec, size, data = encode_blob(value)
+        return AnalysisBlob(analysisId=analysis_id, kind=kind, codec=codec, size=size, data=data)
+
+
+# Global blob store instance (Singleton pattern)
+blob_store = BlobStore()
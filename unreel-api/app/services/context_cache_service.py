@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+
+import google.generativeai as genai
+from google.generativeai import caching
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Recreate caches a little before Gemini expires them, so a turn never races the expiry
+EXPIRY_MARGIN = timedelta(seconds=60)
+# After a failed creation (quota, API errors), retry later
+RETRY_AFTER = timedelta(minutes=10)
+# Rough token estimate of English text, to skip contexts below the minimum cacheable size without an API call
+CHARS_PER_TOKEN = 4
+MAX_CACHED_ANALYSES = 500
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+class ChatContextCache:
+    """
+    Local registry of Gemini cached contents, one per analysis.
+
+    The cached content holds the chat system role and the static video
+    context (metadata, summary, topics, transcript), so each chat turn only
+    sends the user's question and persona. Entries are keyed by analysis ID
+    and remember the context fingerprint and expiry: an expired cache, or a
+    context that changed since it was cached (e.g. a lens was added), is
+    recreated transparently on the next turn. Contexts estimated below
+    CHAT_CONTEXT_CACHE_MIN_TOKENS are never cached (Gemini rejects them).
+    The cache uses GEMINI_MODEL, the model of inline chat turns.
+
+    Only text is cached, the same context an inline turn sends: chat has
+    never sent the video's audio or frames. Those exist only as temporary
+    files and Gemini File uploads made for the analysis; the files are
+    deleted once it finishes and the uploads expire after 48 hours, so
+    they cannot back a cache that is recreated for the analysis' lifetime.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_ANALYSES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def get_model(self, analysis_id: str, system_instruction: str,
+                        context: str) -> Optional[genai.GenerativeModel]:
+        """
+        Return a model bound to the cached context for an analysis, creating it if needed.
+
+        Args:
+            analysis_id: ID of the analysis
+            system_instruction: Chat system role stored with the cache
+            context: Static video context to cache
+
+        Returns:
+            GenerativeModel using the cached content, or None if caching is
+            unavailable for this context (the caller sends the context inline)
+        """
+        if estimate_tokens(system_instruction) + estimate_tokens(context) < settings.CHAT_CONTEXT_CACHE_MIN_TOKENS:
+            return None
+        fingerprint = hashlib.sha256(f"{system_instruction}\n{context}".encode("utf-8")).hexdigest()
+
+        entry = self._lookup(analysis_id, fingerprint)
+        if entry is not None:
+            return entry.get("model")
+
+        lock = self._locks.setdefault(analysis_id, asyncio.Lock())
+        async with lock:
+            # Another turn may have created it while we waited
+            entry = self._lookup(analysis_id, fingerprint)
+            if entry is not None:
+                return entry.get("model")
+            return await self._create(analysis_id, fingerprint, system_instruction, context)
+
+    def _lookup(self, analysis_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(analysis_id)
+        if not entry or entry["fingerprint"] != fingerprint:
+            return None
+        if datetime.now(timezone.utc) >= entry["expiresAt"] - EXPIRY_MARGIN:
+            return None
+        self._entries.move_to_end(analysis_id)
+        return entry
+
+    async def _create(self, analysis_id: str, fingerprint: str,
+                      system_instruction: str, context: str) -> Optional[genai.GenerativeModel]:
+        ttl = timedelta(seconds=settings.CHAT_CONTEXT_CACHE_TTL_SECONDS)
+        stale = self._entries.pop(analysis_id, None)
+
+        try:
+            cached = await asyncio.to_thread(
+                caching.CachedContent.create,
+                model=settings.GEMINI_MODEL,
+                display_name=f"unreel-chat-{analysis_id}",
+                system_instruction=system_instruction,
+                contents=[context],
+                ttl=ttl,
+            )
+            model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+            entry = {
+                "fingerprint": fingerprint,
+                "name": cached.name,
+                "model": model,
+                "expiresAt": datetime.now(timezone.utc) + ttl,
+            }
+            logger.info(f"Created Gemini context cache {cached.name} for analysis {analysis_id}")
+        except Exception as e:
+            logger.warning(f"Context caching unavailable for analysis {analysis_id}, sending context inline: {e}")
+            entry = {
+                "fingerprint": fingerprint,
+                "name": None,
+                "model": None,
+                "expiresAt": datetime.now(timezone.utc) + RETRY_AFTER,
+            }
+
+        self._entries[analysis_id] = entry
+        while len(self._entries) > self.max_entries:
+            # Evicted caches simply expire on Gemini's side after their TTL
+            evicted_id, _ = self._entries.popitem(last=False)
+            self._locks.pop(evicted_id, None)
+
+        if stale and stale.get("name") and stale["name"] != entry["name"]:
+            asyncio.create_task(self._delete(stale["name"]))
+        return entry["model"]
+
+    async def _delete(self, name: str):
+        """Best-effort deletion of a superseded cache (it expires anyway)."""
+        try:
+            await asyncio.to_thread(caching.CachedContent(name).delete)
+        except Exception as e:
+            logger.debug(f"Could not delete superseded context cache {name}: {e}")
+
+
+# Global registry instance (Singleton pattern)
+chat_context_cache = ChatContextCache()
@@ -0,0 +1,84 @@
+import re
+import unicodedata
+import zlib
+from typing import List, Tuple
+
+import numpy as np
+
+from app.services.retrieval_service import STOPWORDS
+
+# Dimension of the hashed feature space; small enough to compare thousands of vectors per millisecond
+EMBEDDING_DIM = 512
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Relative weights of the feature families. Content words (and their character
+# trigrams, so plurals and small typos still overlap) carry the meaning; question
+# words are weighted up so "where was this filmed" does not match "when was this
+# filmed"; function words and bigrams only nudge the score.
+_CONTENT_WEIGHT = 1.5
+_ANCHOR_WEIGHT = 2.0
+_FUNCTION_WEIGHT = 0.3
+_BIGRAM_WEIGHT = 0.3
+_TRIGRAM_WEIGHT = 0.5
+_ANCHOR_WORDS = {"who", "what", "when", "where", "why", "how", "which", "not", "no"}
+_FUNCTION_WORDS = STOPWORDS - _ANCHOR_WORDS
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, strip accents and punctuation, and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def _bucket(feature: str) -> int:
+    # crc32 is stable across processes, unlike the salted built-in hash()
+    return zlib.crc32(feature.encode("utf-8"))
+
+
+def embed_text(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Embed text as an L2-normalized hashed bag of features.
+
+    Features are weighted words, word bigrams and character trigrams of
+    content words, hashed into `dim` signed buckets. This is a purely local,
+    dependency-light stand-in for a neural sentence embedding:
+    it catches rephrasings that share most of their wording, which is what
+    repeated chat questions look like, in microseconds and without an API call.
+
+    Args:
+        text: Text to embed
+        dim: Vector dimension
+
+    Returns:
+        float32 vector of shape (dim,); all zeros for empty text
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    words = normalize_text(text).split()
+
+    features: List[Tuple[str, float]] = []
+    for word in words:
+        if word in _ANCHOR_WORDS:
+            features.append((word, _ANCHOR_WEIGHT))
+        elif word in _FUNCTION_WORDS or len(word) < 2:
+            features.append((word, _FUNCTION_WEIGHT))
+        else:
+            features.append((word, _CONTENT_WEIGHT))
+            padded = f"#{word}#"
+            features += [(f"~{padded[i:i + 3]}", _TRIGRAM_WEIGHT) for i in range(len(padded) - 2)]
+    features += [(f"{a} {b}", _BIGRAM_WEIGHT) for a, b in zip(words, words[1:])]
+
+    for feature, weight in features:
+        h = _bucket(feature)
+        vector[h % dim] += weight if (h >> 31) & 1 else -weight
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def embed_texts(texts: List[str], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Embed several texts into a (len(texts), dim) matrix."""
+    if not texts:
+        return np.zeros((0, dim), dtype=np.float32)
+    return np.stack([embed_text(text, dim) for text in texts])
@@ -0,0 +1,227 @@
+import logging
+import asyncio
+import os
+import socket
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from sqlalchemy import func, or_, update
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models import Analysis
+from app.services.progress_service import progress_tracker
+from app.services.response_cache_service import response_cache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+# Identifies this process on the analyses it runs (workerId column)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class QueueFullError(Exception):
+    """Raised when the analysis job queue has reached its maximum depth."""
+
+
+class JobService:
+    """
+    Background job runner for asynchronous analyses.
+
+    Jobs are drained by a fixed pool of worker tasks, so the number of
+    pipelines running at once never exceeds ANALYSIS_WORKER_CONCURRENCY
+    regardless of how many requests arrive. Waiting jobs are kept in one
+    lane per owner (user) and workers take from the lanes round-robin, so a
+    large batch from one user cannot starve everyone else's analyses.
+
+    Every processing analysis created by this process (queued, running, or
+    run inline by the synchronous endpoint) is stamped with WORKER_ID and
+    its heartbeatAt is refreshed every ANALYSIS_HEARTBEAT_SECONDS. The same
+    loop fails processing analyses whose heartbeat is older than
+    ANALYSIS_STALE_AFTER_SECONDS: their process died, and with it the
+    in-memory queue, so nothing would ever finish them.
+    """
+
+    def __init__(self, concurrency: int = None, max_depth: int = None):
+        self.concurrency = concurrency or settings.ANALYSIS_WORKER_CONCURRENCY
+        self.max_depth = max_depth or settings.ANALYSIS_QUEUE_MAX_DEPTH
+        self._lanes: "OrderedDict[str, deque]" = OrderedDict()
+        self._pending = 0
+        self._ready: Optional[asyncio.Semaphore] = None
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        # Processing analyses owned by this process
+        self._owned: Set[str] = set()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting to be picked up by a worker."""
+        return self._pending
+
+    def has_capacity(self, jobs: int = 1) -> bool:
+        return self._pending + jobs <= self.max_depth
+
+    async def start(self):
+        """Spawn the worker pool. Called once from the application lifespan."""
+        if self.running:
+            return
+        self._ready = asyncio.Semaphore(0)
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"analysis-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop(), name="analysis-heartbeat")
+        logger.info(f"Analysis job workers started (concurrency={self.concurrency}, max_depth={self.max_depth})")
+
+    def claim(self, analysis: Analysis):
+        """
+        Make this process the owner of a new processing analysis (before it is first committed).
+
+        Args:
+            analysis: Pending Analysis row
+        """
+        analysis.workerId = WORKER_ID
+        analysis.heartbeatAt = datetime.utcnow()
+        self._owned.add(analysis.id)
+
+    async def send_heartbeat(self):
+        """Refresh heartbeatAt of the owned analyses, forgetting those that are no longer processing."""
+        if not self._owned:
+            return
+        async with AsyncSessionLocal() as db:
+            alive = (await db.execute(
+                update(Analysis)
+                .where(Analysis.id.in_(list(self._owned)), Analysis.status == "processing")
+                # Keep updatedAt (and so the ETag) unchanged: a heartbeat is not a content change
+                .values(heartbeatAt=datetime.utcnow(), updatedAt=Analysis.updatedAt)
+                .returning(Analysis.id)
+                .execution_options(synchronize_session=False)
+            )).scalars().all()
+            await db.commit()
+        self._owned.intersection_update(alive)
+
+    async def fail_interrupted(self) -> int:
+        """
+        Mark processing analyses whose worker stopped sending heartbeats as failed.
+
+        Rows without a heartbeat (created before heartbeats existed) are
+        judged by updatedAt. Analyses owned by this process are never
+        touched.
+
+        Returns:
+            Number of analyses marked failed
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.ANALYSIS_STALE_AFTER_SECONDS)
+        async with AsyncSessionLocal() as db:
+            failed_ids = (await db.execute(
+                update(Analysis)
+                .where(
+                    Analysis.status == "processing",
+                    func.coalesce(Analysis.heartbeatAt, Analysis.updatedAt) <= cutoff,
+                    or_(Analysis.workerId.is_(None), Analysis.workerId != WORKER_ID),
+                )
+                .values(status="failed", version=Analysis.version + 1)
+                .returning(Analysis.id)
+                .execution_options(synchronize_session=False)
+            )).scalars().all()
+            await db.commit()
+        for analysis_id in failed_ids:
+            response_cache.invalidate("analysis", analysis_id)
+        if failed_ids:
+            logger.warning(f"Marked {len(failed_ids)} analyses of unresponsive workers as failed")
+        return len(failed_ids)
+
+    async def stop(self):
+        """Cancel all workers. Jobs still in the queue are dropped (and failed once their heartbeat is stale)."""
+        tasks = self._workers + ([self._heartbeat] if self._heartbeat else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+        self._lanes.clear()
+        self._pending = 0
+        logger.info("Analysis job workers stopped")
+
+    def submit(self, analysis_id: str, options: Dict[str, Any], owner: Optional[str] = None):
+        """
+        Enqueue an already-created analysis for background processing.
+
+        Args:
+            analysis_id: ID of the pending Analysis row
+            options: Lens toggles forwarded to AnalysisService.run_analysis
+            owner: Fair-scheduling lane (usually the user ID)
+
+        Raises:
+            QueueFullError: If the queue is at its maximum depth
+        """
+        if not self.running:
+            raise RuntimeError("Job workers are not running")
+        if not self.has_capacity():
+            raise QueueFullError(f"Analysis queue is full ({self.max_depth} jobs waiting)")
+
+        self._lanes.setdefault(owner or "anonymous", deque()).append((analysis_id, options))
+        self._pending += 1
+        self._ready.release()
+        progress_tracker.update(analysis_id, "queued", queueDepth=self.depth)
+        logger.info(f"Queued analysis {analysis_id} (depth={self.depth})")
+
+    def _next_job(self) -> Tuple[str, Dict[str, Any]]:
+        # Round-robin: serve the first lane, then move it to the back if it still has work
+        owner, lane = next(iter(self._lanes.items()))
+        job = lane.popleft()
+        if lane:
+            self._lanes.move_to_end(owner)
+        else:
+            del self._lanes[owner]
+        self._pending -= 1
+        return job
+
+    async def _worker(self, index: int):
+        while True:
+            await self._ready.acquire()
+            analysis_id, options = self._next_job()
+            try:
+                await self._run_job(analysis_id, options)
+            except Exception as e:
+                # Failures are already recorded on the row by the pipeline
+                logger.error(f"Worker {index}: job {analysis_id} failed: {e}")
+
+    async def _heartbeat_loop(self):
+        while True:
+            for step in (self.send_heartbeat, self.fail_interrupted):
+                try:
+                    await step()
+                except Exception as e:
+                    logger.error(f"Analysis heartbeat failed: {e}")
+            await asyncio.sleep(settings.ANALYSIS_HEARTBEAT_SECONDS)
+
+    async def _run_job(self, analysis_id: str, options: Dict[str, Any]):
+        # Imported lazily: AnalysisService loads Whisper and Gemini clients
+        from app.services.analysis_service import AnalysisService
+
+        async with AsyncSessionLocal() as db:
+            analysis = await db.get(Analysis, analysis_id)
+            if not analysis:
+                logger.warning(f"Queued analysis {analysis_id} no longer exists, skipping")
+                return
+            await AnalysisService().run_analysis(db, analysis, **options)
+
+
+# Global job service instance (Singleton pattern)
+_job_service = None
+
+
+def get_job_service() -> JobService:
+    """Return the process-wide JobService, creating it on first use."""
+    global _job_service
+    if _job_service is None:
+        _job_service = JobService()
+    return _job_service
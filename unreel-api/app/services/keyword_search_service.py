@@ -0,0 +1,267 @@
+import html
+import logging
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import Text, bindparam, func, literal_column, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Analysis
+from app.services.blob_store_service import blob_store
+from app.services.response_cache_service import response_cache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# detectedLanguage (ISO 639-1, from langdetect) -> Postgres text search configuration
+TEXT_SEARCH_CONFIGS = {
+    "ar": "arabic",
+    "da": "danish",
+    "de": "german",
+    "el": "greek",
+    "en": "english",
+    "es": "spanish",
+    "fi": "finnish",
+    "fr": "french",
+    "hu": "hungarian",
+    "id": "indonesian",
+    "it": "italian",
+    "lt": "lithuanian",
+    "ne": "nepali",
+    "nl": "dutch",
+    "no": "norwegian",
+    "pt": "portuguese",
+    "ro": "romanian",
+    "ru": "russian",
+    "sv": "swedish",
+    "ta": "tamil",
+    "tr": "turkish",
+}
+FALLBACK_CONFIG = "simple"
+CONFIG_NAMES = set(TEXT_SEARCH_CONFIGS.values()) | {FALLBACK_CONFIG}
+
+# Summaries are always generated in English
+SUMMARY_CONFIG = "english"
+
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=12, MaxFragments=2, FragmentDelimiter=\" … \""
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def text_search_config(language: Optional[str]) -> str:
+    """Text search configuration for a detected language code (unknown languages are not stemmed)."""
+    if not language:
+        return FALLBACK_CONFIG
+    return TEXT_SEARCH_CONFIGS.get(language.lower().split("-")[0], FALLBACK_CONFIG)
+
+
+def escape_headline(headline: Optional[str]) -> Optional[str]:
+    """HTML-escape a ts_headline excerpt, keeping only its <mark> highlight tags."""
+    if headline is None:
+        return None
+    return html.escape(headline, quote=False).replace("&lt;mark&gt;", "<mark>").replace("&lt;/mark&gt;", "</mark>")
+
+
+def _regconfig(config: str):
+    """A known configuration name as a SQL literal (keeps statements constant and plan-cacheable)."""
+    if config not in CONFIG_NAMES:
+        raise ValueError(f"Unknown text search configuration: {config}")
+    return literal_column(f"'{config}'::regconfig")
+
+
+def search_document(config: str, transcript):
+    """
+    SQL expression computing an analysis' tsvector from its columns and transcript.
+
+    Title and summary weigh most (A), then caption (B), then transcript
+    (C). The transcript is also indexed unstemmed ('simple', D), so exact
+    words match whatever language the query is written in.
+
+    Args:
+        config: Text search configuration of the video's language
+        transcript: SQL expression (bound parameter) for the transcript, which
+            is stored compressed outside the row
+    """
+    def vector(config_name: str, column, weight: str):
+        return func.setweight(
+            func.to_tsvector(_regconfig(config_name), func.coalesce(column, "")), literal_column(f"'{weight}'")
+        )
+
+    document = (
+        vector(config, Analysis.title, "A")
+        .op("||")(vector(SUMMARY_CONFIG, Analysis.summary, "A"))
+        .op("||")(vector(config, Analysis.caption, "B"))
+        .op("||")(vector(config, transcript, "C"))
+    )
+    if config != FALLBACK_CONFIG:
+        document = document.op("||")(vector(FALLBACK_CONFIG, transcript, "D"))
+    return document
+
+
+def search_query(query: str, language: Optional[str] = None):
+    """
+    Constant tsquery for a keyword search (websearch syntax: "phrases", OR, -exclusions).
+
+    Matches English stems (summaries), unstemmed words (any transcript)
+    and, when the query language is given, that language's stems.
+    """
+    configs = [SUMMARY_CONFIG, FALLBACK_CONFIG]
+    if language and text_search_config(language) not in configs:
+        configs.append(text_search_config(language))
+    tsquery = None
+    for config in configs:
+        part = func.websearch_to_tsquery(_regconfig(config), query)
+        tsquery = part if tsquery is None else tsquery.op("||")(part)
+    return tsquery
+
+
+class KeywordSearch:
+    """
+    Ranked full-text search over titles, captions, summaries and transcripts.
+
+    Each completed analysis stores a tsvector (searchVector, GIN-indexed)
+    computed at write time with the text search configuration of its
+    detected language, so queries never parse documents; only the top
+    results are re-read (and their transcripts decompressed) for snippet
+    highlighting. Postgres only.
+    """
+
+    def __init__(self):
+        self._backfilled_users = set()
+
+    async def stage_analysis(self, db: AsyncSession, analysis: Analysis, transcript: Optional[str] = None):
+        """
+        Compute the analysis' tsvector inside the caller's transaction.
+
+        The vector is built in SQL from the row's own columns plus the
+        transcript, which is only sent as a parameter of that UPDATE.
+
+        Args:
+            db: Database session
+            analysis: Analysis row with its final text
+            transcript: Its full transcript
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            return
+        await db.flush()
+        await self._update_documents(
+            db, text_search_config(analysis.detectedLanguage), [{"analysis_id": analysis.id, "transcript": transcript}]
+        )
+
+    async def search(self, db: AsyncSession, user_id: Optional[str], query: str, limit: int = 20,
+                     language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Rank the user's analyses against a keyword query.
+
+        Args:
+            db: Database session
+            user_id: ID of the user whose history is searched
+            query: Keywords in websearch syntax
+            limit: Maximum number of results
+            language: Optional language code of the query, to match its stems
+
+        Returns:
+            Results ({'analysisId', 'score', 'matchedOn', 'snippet', ...}), best first
+        """
+        if user_id not in self._backfilled_users:
+            await self._backfill(db, user_id)
+            self._backfilled_users.add(user_id)
+
+        tsquery = search_query(query, language)
+        rank = func.ts_rank_cd(Analysis.searchVector, tsquery)
+        ranked = (
+            select(Analysis.id, rank.label("rank"))
+            .where(Analysis.userId == user_id, Analysis.searchVector.op("@@")(tsquery))
+            .order_by(rank.desc(), Analysis.createdAt.desc())
+            .limit(limit)
+            .subquery()
+        )
+        # Headlines are computed for the top rows only
+        rows = (await db.execute(
+            select(
+                Analysis.id, Analysis.originalUrl, Analysis.title, Analysis.uploader, Analysis.summary,
+                Analysis.createdAt, Analysis.searchConfig, ranked.c.rank,
+                func.ts_headline(_regconfig(SUMMARY_CONFIG), func.coalesce(Analysis.summary, ""),
+                                 tsquery, HEADLINE_OPTIONS).label("summaryHeadline"),
+                # Transcript lexemes carry weights C and D
+                func.ts_filter(Analysis.searchVector, literal_column("'{c,d}'")).op("@@")(tsquery)
+                .label("transcriptMatch"),
+            )
+            .join(ranked, ranked.c.id == Analysis.id)
+            .order_by(ranked.c.rank.desc(), Analysis.createdAt.desc())
+        )).all()
+        transcript_headlines = await self._transcript_headlines(db, [row for row in rows if row.transcriptMatch], tsquery)
+
+        results = []
+        for row in rows:
+            matched = "transcript" if row.id in transcript_headlines else "summary"
+            results.append({
+                "analysisId": row.id,
+                "originalUrl": row.originalUrl,
+                "title": row.title,
+                "uploader": row.uploader,
+                "summary": row.summary,
+                "createdAt": row.createdAt,
+                "score": round(float(row.rank), 4),
+                "matchedOn": matched,
+                "snippet": escape_headline(transcript_headlines.get(row.id, row.summaryHeadline)),
+            })
+        return results
+
+    async def _transcript_headlines(self, db: AsyncSession, rows: List[Any], tsquery) -> Dict[str, str]:
+        """Highlighted transcript excerpts for transcript matches, in one statement."""
+        transcripts = await blob_store.load_many(db, [row.id for row in rows], ["fullTranscript"])
+        documents = [
+            (row, transcripts[row.id]["fullTranscript"]) for row in rows
+            if transcripts.get(row.id, {}).get("fullTranscript")
+        ]
+        if not documents:
+            return {}
+        headlines = (await db.execute(select(*[
+            func.ts_headline(_regconfig(row.searchConfig or FALLBACK_CONFIG), transcript, tsquery, HEADLINE_OPTIONS)
+            for row, transcript in documents
+        ]))).one()
+        return {row.id: headline for (row, _), headline in zip(documents, headlines) if "<mark>" in (headline or "")}
+
+    async def _update_documents(self, db: AsyncSession, config: str, documents: List[Dict[str, Any]]):
+        """Set the tsvector of several analyses sharing a configuration ({'analysis_id', 'transcript'} each)."""
+        # Core executemany on the session's connection: one UPDATE statement, one parameter set per analysis
+        connection = await db.connection()
+        await connection.execute(
+            update(Analysis.__table__)
+            .where(Analysis.__table__.c.id == bindparam("analysis_id"))
+            .values(searchConfig=config, searchVector=search_document(config, bindparam("transcript", type_=Text))),
+            documents,
+        )
+
+    async def _backfill(self, db: AsyncSession, user_id: Optional[str]):
+        """Index completed analyses that predate keyword search (runs once per user per process)."""
+        total = 0
+        while True:
+            rows = (await db.execute(
+                select(Analysis.id, Analysis.detectedLanguage)
+                .where(Analysis.userId == user_id, Analysis.status == "completed", Analysis.searchVector.is_(None))
+                .limit(BACKFILL_BATCH_SIZE)
+            )).all()
+            if not rows:
+                break
+            transcripts = await blob_store.load_many(db, [row.id for row in rows], ["fullTranscript"])
+            by_config = defaultdict(list)
+            for row in rows:
+                by_config[text_search_config(row.detectedLanguage)].append({
+                    "analysis_id": row.id,
+                    "transcript": transcripts.get(row.id, {}).get("fullTranscript"),
+                })
+            for config, documents in by_config.items():
+                await self._update_documents(db, config, documents)
+            await db.commit()
+            # The Core UPDATE bumps updatedAt (and so the ETag) without going through the ORM's cache listeners
+            for row in rows:
+                response_cache.invalidate("analysis", row.id)
+            total += len(rows)
+        if total:
+            logger.info(f"Backfilled keyword search vectors for {total} analyses of user {user_id}")
+
+
+# Global search instance (Singleton pattern)
+keyword_search = KeywordSearch()
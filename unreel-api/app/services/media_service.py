@@ -5,11 +5,12 @@ import tempfile
 import re
 import requests
 import asyncio
-from typing import Dict, Any, Optional, List, cast
+from typing import Callable, Dict, Any, Optional, List, cast
 import yt_dlp
 import ffmpeg
 
 from app.services.speech_service import SpeechService
+from app.services.resource_pools import download_pool, transcribe_pool
 from app.core.config import settings
 
 # Configure logging
@@ -31,97 +32,35 @@ class MediaService:
         """Initialize the MediaService with SpeechService."""
         self.speech_service = SpeechService()
         
-    async def process_video(self, url: str) -> Dict[str, Any]:
+    async def process_video(self, url: str,
+                            on_downloaded: Optional[Callable[[Dict[str, Any], str], None]] = None) -> Dict[str, Any]:
         """
         Process a video from URL: download, extract audio, extract frames, extract transcript.
         (Supports Native -> RapidAPI Fallback chain)
+        
+        Args:
+            url: Video URL
+            on_downloaded: Called with (metadata, download tier) once the video is downloaded, before transcription
         """
         if 'drive.google.com' in url:
-            return await self._process_google_drive_video(url)
+            return await self._process_google_drive_video(url, on_downloaded)
         
         temp_dir = tempfile.mkdtemp()
         try:
             video_path = os.path.join(temp_dir, 'video.mp4')
             audio_path = os.path.join(temp_dir, 'audio.mp3')
             
-            # --- TIER 0: Native yt-dlp Download ---
-            metadata = None
-            try:
-                logger.info(f"Tier 0: Attempting native yt-dlp download for {url}")
-                ydl_opts = {
-                    'format': 'best[ext=mp4]/best',
-                    'outtmpl': video_path,
-                    'quiet': False, # Enabled for better cloud debugging
-                    'no_warnings': False,
-                    'retries': 5,
-                    'socket_timeout': 20,
-                    'force_generic_extractor': False,
-                    'source_address': '0.0.0.0', # Force IPv4
-                }
-                
-                # Cloud DNS Bypass Hack: Standard library doesn't easily allow DNS override in yt-dlp 
-                # but we can try to use standard networking hooks if needed.
-                
-                # Add cookie support if available
-                cookie_path = settings.INSTAGRAM_COOKIE_FILE or 'instagram_cookies.txt'
-                if os.path.exists(cookie_path):
-                    ydl_opts['cookiefile'] = cookie_path
-                
-                with yt_dlp.YoutubeDL(cast(Any, ydl_opts)) as ydl:
-                    info = ydl.extract_info(url, download=True)
-                    metadata = {
-                        'title': info.get('title'),
-                        'uploader': info.get('uploader'),
-                        'caption': info.get('description'),
-                    }
-                logger.info("Tier 0 Download Successful.")
-
-            except Exception as e:
-                logger.warning(f"Tier 0 (yt-dlp) failed: {e}. Moving to Triple-Fallback Shield...")
-                
-                # --- TIER 1: Instagram Looter (150/mo) ---
-                try:
-                    success = await self._try_looter_download(url, video_path)
-                    if success:
-                        metadata = {'title': 'Instagram Video', 'uploader': 'IG User', 'caption': 'Downloaded via Looter Proxy'}
-                        logger.info("Tier 1 (Looter) successful!")
-                    else:
-                        raise Exception("Looter API returned failure or empty URL")
-                except Exception as e1:
-                    # --- TIER 2: KK Creation Downloader (43/mo) ---
-                    logger.warning(f"Tier 1 failed ({e1}). Trying Tier 2 (KK Creation)...")
-                    try:
-                        success = await self._try_kk_creation_download(url, video_path)
-                        if success:
-                            metadata = {'title': 'Instagram Video', 'uploader': 'IG User', 'caption': 'Downloaded via KK Proxy'}
-                            logger.info("Tier 2 (KK Creation) successful!")
-                        else:
-                            raise Exception("KK Creation API returned failure or empty URL")
-                    except Exception as e2:
-                        # --- TIER 3: Stable Scraper (20/mo) ---
-                        logger.warning(f"Tier 2 failed ({e2}). Trying Tier 3 (Stable Scraper)...")
-                        try:
-                            success = await self._try_stable_scraper_download(url, video_path)
-                            if success:
-                                metadata = {'title': 'Instagram Video', 'uploader': 'IG User', 'caption': 'Downloaded via Stable Proxy'}
-                                logger.info("Tier 3 (Stable Scraper) successful!")
-                            else:
-                                raise Exception("Stable Scraper API returned failure or empty URL")
-                        except Exception as e3:
-                            logger.error(f"All Download Shields Failed. T3 Error: {e3}")
-                            raise Exception("Could not download Instagram video. All fallback proxies were blocked or exhausted.")
-
-            # Processing steps (FFMPEG)
-            ffmpeg_available = shutil.which("ffmpeg") is not None
-            extracted_audio_path = None
-            if ffmpeg_available:
-                extracted_audio_path = self._extract_audio(video_path, audio_path)
-                frame_paths = self._extract_frames(video_path, temp_dir)
-            else:
-                logger.warning("ffmpeg not found, skipping extraction")
-                frame_paths = []
+            # Shared pools cap concurrent downloads and transcriptions across all pipelines
+            async with download_pool:
+                metadata, download_tier = await self._download_with_fallbacks(url, video_path)
+            if on_downloaded:
+                on_downloaded(metadata, download_tier)
 
-            transcript = self._extract_transcript(extracted_audio_path)
+            # Processing steps (FFMPEG + Whisper), also blocking
+            async with transcribe_pool:
+                extracted_audio_path, frame_paths, transcript, segments = await asyncio.to_thread(
+                    self._extract_media, video_path, audio_path, temp_dir
+                )
  
             return {
                 "video_path": video_path,
@@ -129,13 +68,133 @@ class MediaService:
                 "frame_paths": frame_paths,
                 "metadata": metadata,
                 "transcript": transcript,
-                "temp_dir": temp_dir
+                "transcript_segments": segments,
+                "temp_dir": temp_dir,
+                "download_tier": download_tier
             }
         except Exception as e:
             if os.path.exists(temp_dir):
                 shutil.rmtree(temp_dir)
             raise e
 
+    async def _download_with_fallbacks(self, url: str, video_path: str):
+        """
+        Download the video through the tiered chain (Native -> RapidAPI fallbacks).
+        
+        Returns:
+            Tuple of (metadata, download tier name)
+        """
+        # --- TIER 0: Native yt-dlp Download ---
+        metadata = None
+        download_tier = "native"
+        try:
+            logger.info(f"Tier 0: Attempting native yt-dlp download for {url}")
+            # yt-dlp is blocking: run it off the event loop so other requests keep flowing
+            metadata = await asyncio.to_thread(self._native_download, url, video_path)
+            logger.info("Tier 0 Download Successful.")
+
+        except Exception as e:
+            logger.warning(f"Tier 0 (yt-dlp) failed: {e}. Moving to Triple-Fallback Shield...")
+            
+            # --- TIER 1: Instagram Looter (150/mo) ---
+            try:
+                success = await self._try_looter_download(url, video_path)
+                if success:
+                    metadata = {'title': 'Instagram Video', 'uploader': 'IG User', 'caption': 'Downloaded via Looter Proxy'}
+                    download_tier = "looter"
+                    logger.info("Tier 1 (Looter) successful!")
+                else:
+                    raise Exception("Looter API returned failure or empty URL")
+            except Exception as e1:
+                # --- TIER 2: KK Creation Downloader (43/mo) ---
+                logger.warning(f"Tier 1 failed ({e1}). Trying Tier 2 (KK Creation)...")
+                try:
+                    success = await self._try_kk_creation_download(url, video_path)
+                    if success:
+                        metadata = {'title': 'Instagram Video', 'uploader': 'IG User', 'caption': 'Downloaded via KK Proxy'}
+                        download_tier = "kk_creation"
+                        logger.info("Tier 2 (KK Creation) successful!")
+                    else:
+                        raise Exception("KK Creation API returned failure or empty URL")
+                except Exception as e2:
+                    # --- TIER 3: Stable Scraper (20/mo) ---
+                    logger.warning(f"Tier 2 failed ({e2}). Trying Tier 3 (Stable Scraper)...")
+                    try:
+                        success = await self._try_stable_scraper_download(url, video_path)
+                        if success:
+                            metadata = {'title': 'Instagram Video', 'uploader': 'IG User', 'caption': 'Downloaded via Stable Proxy'}
+                            download_tier = "stable_scraper"
+                            logger.info("Tier 3 (Stable Scraper) successful!")
+                        else:
+                            raise Exception("Stable Scraper API returned failure or empty URL")
+                    except Exception as e3:
+                        logger.error(f"All Download Shields Failed. T3 Error: {e3}")
+                        raise Exception("Could not download Instagram video. All fallback proxies were blocked or exhausted.")
+
+        return metadata, download_tier
+
+    async def fetch_metadata(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch yt-dlp metadata (title, uploader, caption) without downloading media.
+        
+        Args:
+            url: URL of the video
+            
+        Returns:
+            Metadata dict, or None if the URL is unsupported or extraction fails
+        """
+        if 'drive.google.com' in url:
+            return None
+        try:
+            ydl_opts = self._build_ydl_opts()
+            ydl_opts.update({'skip_download': True, 'quiet': True, 'no_warnings': True})
+            info = await asyncio.to_thread(self._extract_info, url, ydl_opts, False)
+            return {
+                'title': info.get('title'),
+                'uploader': info.get('uploader'),
+                'caption': info.get('description'),
+            }
+        except Exception as e:
+            logger.warning(f"Metadata-only extraction failed for {url}: {e}")
+            return None
+
+    # ─── NATIVE YT-DLP ───────────────────────────────────────────────
+
+    def _build_ydl_opts(self, video_path: Optional[str] = None) -> Dict[str, Any]:
+        ydl_opts = {
+            'format': 'best[ext=mp4]/best',
+            'quiet': False, # Enabled for better cloud debugging
+            'no_warnings': False,
+            'retries': 5,
+            'socket_timeout': 20,
+            'force_generic_extractor': False,
+            'source_address': '0.0.0.0', # Force IPv4
+        }
+        if video_path:
+            ydl_opts['outtmpl'] = video_path
+        
+        # Cloud DNS Bypass Hack: Standard library doesn't easily allow DNS override in yt-dlp 
+        # but we can try to use standard networking hooks if needed.
+        
+        # Add cookie support if available
+        cookie_path = settings.INSTAGRAM_COOKIE_FILE or 'instagram_cookies.txt'
+        if os.path.exists(cookie_path):
+            ydl_opts['cookiefile'] = cookie_path
+        return ydl_opts
+
+    def _extract_info(self, url: str, ydl_opts: Dict[str, Any], download: bool) -> Dict[str, Any]:
+        with yt_dlp.YoutubeDL(cast(Any, ydl_opts)) as ydl:
+            return ydl.extract_info(url, download=download)
+
+    def _native_download(self, url: str, video_path: str) -> Dict[str, Any]:
+        """Tier 0: download with yt-dlp and return its metadata (blocking)."""
+        info = self._extract_info(url, self._build_ydl_opts(video_path), True)
+        return {
+            'title': info.get('title'),
+            'uploader': info.get('uploader'),
+            'caption': info.get('description'),
+        }
+
     # ─── RAPIDAPI FALLBACKS ──────────────────────────────────────────
 
     async def _try_looter_download(self, url: str, output_path: str) -> bool:
@@ -236,12 +295,27 @@ class MediaService:
             return [os.path.join(frames_dir, f) for f in os.listdir(frames_dir) if f.endswith('.png')]
         except Exception: return []
 
-    def _extract_transcript(self, audio_path: Optional[str]) -> str:
+    def _extract_media(self, video_path: str, audio_path: str, temp_dir: str):
+        """Extract audio, frames and transcript from a downloaded video (blocking)."""
+        ffmpeg_available = shutil.which("ffmpeg") is not None
+        extracted_audio_path = None
+        if ffmpeg_available:
+            extracted_audio_path = self._extract_audio(video_path, audio_path)
+            frame_paths = self._extract_frames(video_path, temp_dir)
+        else:
+            logger.warning("ffmpeg not found, skipping extraction")
+            frame_paths = []
+
+        transcript, segments = self._extract_transcript_segments(extracted_audio_path)
+        return extracted_audio_path, frame_paths, transcript, segments
+
+    def _extract_transcript_segments(self, audio_path: Optional[str]):
         if audio_path and os.path.exists(audio_path):
-            return self.speech_service.extract_transcript_with_fallback(audio_path)
-        return "No audio available for transcription"
+            return self.speech_service.extract_transcript_segments_with_fallback(audio_path)
+        return "No audio available for transcription", []
 
-    async def _process_google_drive_video(self, url: str) -> Dict[str, Any]:
+    async def _process_google_drive_video(self, url: str,
+                                          on_downloaded: Optional[Callable[[Dict[str, Any], str], None]] = None) -> Dict[str, Any]:
         """(Standard Google Drive direct download logic remains same)"""
         temp_dir = tempfile.mkdtemp()
         video_path = os.path.join(temp_dir, 'video.mp4')
@@ -250,14 +324,14 @@ class MediaService:
         file_id = re.search(r'/file/d/([^/]+)', url).group(1)
         direct_url = f"https://drive.google.com/uc?export=download&id={file_id}"
         
-        await self._download_file(direct_url, video_path)
+        async with download_pool:
+            await self._download_file(direct_url, video_path)
+        metadata = {"title": "Drive Video", "uploader": "G-Drive"}
+        if on_downloaded:
+            on_downloaded(metadata, "google_drive")
         
-        ffmpeg_available = shutil.which("ffmpeg") is not None
-        if ffmpeg_available:
-            audio = self._extract_audio(video_path, audio_path)
-            frames = self._extract_frames(video_path, temp_dir)
-        else:
-            audio, frames = None, []
-            
-        transcript = self._extract_transcript(audio)
-        return {"video_path": video_path, "audio_path": audio, "frame_paths": frames, "metadata": {"title":"Drive Video", "uploader":"G-Drive"}, "transcript": transcript, "temp_dir": temp_dir}
\ No newline at end of file
+        async with transcribe_pool:
+            audio, frames, transcript, segments = await asyncio.to_thread(
+                self._extract_media, video_path, audio_path, temp_dir
+            )
+        return {"video_path": video_path, "audio_path": audio, "frame_paths": frames, "metadata": metadata, "transcript": transcript, "transcript_segments": segments, "temp_dir": temp_dir, "download_tier": "google_drive"}
\ No newline at end of file
@@ -0,0 +1,153 @@
+import asyncio
+import copy
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Ordered pipeline stages reported while an analysis is running
+ANALYSIS_STAGES = [
+    "queued",
+    "downloading",
+    "transcribing",
+    "detecting_language",
+    "analyzing",
+    "enriching",
+    "saving",
+    "completed",
+]
+
+TERMINAL_STAGES = {"completed", "failed"}
+
+# Keep progress for the most recent analyses only, so the tracker never grows unbounded
+MAX_TRACKED_ANALYSES = 1000
+# Cap on replayable events per analysis (stages + partial results)
+MAX_EVENTS_PER_ANALYSIS = 200
+
+
+class ProgressTracker:
+    """
+    In-process registry of stage-level progress for running analyses.
+
+    Besides the latest stage, the tracker keeps an ordered event log per
+    analysis (stage changes and partial results such as the core summary or
+    each enriched lens) and fans new events out to live subscribers, which
+    is what the Server-Sent Events endpoint streams.
+
+    Payloads are copied when published, so the pipeline can keep mutating
+    its own objects. Once an analysis finishes, its log keeps only the stage
+    events: the partial results are then part of the stored analysis, and
+    the tracker holds a few small records per finished analysis.
+    """
+
+    def __init__(self, max_entries: int = MAX_TRACKED_ANALYSES):
+        self.max_entries = max_entries
+        self._progress: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._events: Dict[str, List[Dict[str, Any]]] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    def update(self, analysis_id: str, stage: str, **detail: Any) -> Dict[str, Any]:
+        """
+        Record that an analysis has reached a new stage.
+
+        Args:
+            analysis_id: ID of the analysis
+            stage: Name of the stage (one of ANALYSIS_STAGES or "failed")
+            **detail: Extra stage-specific information (e.g. error message)
+
+        Returns:
+            The updated progress entry
+        """
+        now = datetime.utcnow()
+        entry = self._progress.pop(analysis_id, None) or {"startedAt": now}
+
+        entry["stage"] = stage
+        entry["stageIndex"] = ANALYSIS_STAGES.index(stage) if stage in ANALYSIS_STAGES else None
+        entry["totalStages"] = len(ANALYSIS_STAGES)
+        entry["updatedAt"] = now
+        if detail:
+            entry.setdefault("detail", {}).update(detail)
+
+        self._progress[analysis_id] = entry
+        while len(self._progress) > self.max_entries:
+            evicted_id, _ = self._progress.popitem(last=False)
+            self._events.pop(evicted_id, None)
+
+        logger.debug(f"Analysis {analysis_id} reached stage '{stage}'")
+        self.publish(analysis_id, "stage", {"stage": stage, "stageIndex": entry["stageIndex"], **detail})
+        if stage in TERMINAL_STAGES:
+            # Subscribers already got the partial results; late ones read the stored analysis
+            entry.pop("preview", None)
+            self._events[analysis_id] = [record for record in self._events[analysis_id] if record["event"] == "stage"]
+        return entry
+
+    def publish(self, analysis_id: str, event: str, data: Dict[str, Any]):
+        """
+        Append an event to the analysis log and push it to live subscribers.
+
+        Args:
+            analysis_id: ID of the analysis
+            event: Event name (e.g. "stage", "summary", "lens", "enrichment")
+            data: JSON-serializable payload
+        """
+        log = self._events.setdefault(analysis_id, [])
+        record = {"id": (log[-1]["id"] + 1) if log else 1, "event": event, "data": copy.deepcopy(data)}
+        log.append(record)
+        if len(log) > MAX_EVENTS_PER_ANALYSIS:
+            del log[0]
+
+        for queue in self._subscribers.get(analysis_id, []):
+            queue.put_nowait(record)
+
+    def subscribe(self, analysis_id: str, last_event_id: int = 0) -> asyncio.Queue:
+        """
+        Subscribe to events for an analysis.
+
+        Events already published after `last_event_id` are replayed into the
+        returned queue first, so late subscribers and reconnecting clients
+        (via the Last-Event-ID header) do not miss earlier stages.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for record in self._events.get(analysis_id, []):
+            if record["id"] > last_event_id:
+                queue.put_nowait(record)
+        self._subscribers.setdefault(analysis_id, []).append(queue)
+        return queue
+
+    def unsubscribe(self, analysis_id: str, queue: asyncio.Queue):
+        """Detach a subscriber queue returned by subscribe()."""
+        queues = self._subscribers.get(analysis_id, [])
+        if queue in queues:
+            queues.remove(queue)
+        if not queues:
+            self._subscribers.pop(analysis_id, None)
+
+    def set_preview(self, analysis_id: str, preview: Dict[str, Any]):
+        """
+        Attach a provisional (fast-lane) result to a running analysis.
+
+        The preview is exposed through get() until the analysis finishes and
+        is superseded by the "summary" event of the full multimodal pass.
+        """
+        entry = self._progress.get(analysis_id)
+        if entry is None or entry["stage"] in TERMINAL_STAGES:
+            return
+        entry["preview"] = preview
+        self.publish(analysis_id, "preview", preview)
+
+    def get(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the progress entry for an analysis, if tracked."""
+        entry = self._progress.get(analysis_id)
+        return dict(entry) if entry else None
+
+    def is_finished(self, analysis_id: str) -> bool:
+        """Whether the analysis has reached a terminal stage."""
+        entry = self._progress.get(analysis_id)
+        return bool(entry) and entry["stage"] in TERMINAL_STAGES
+
+
+# Global tracker instance shared by the pipeline, the job workers and the routers
+progress_tracker = ProgressTracker()
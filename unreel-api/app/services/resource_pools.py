@@ -0,0 +1,11 @@
+import asyncio
+
+from app.core.config import settings
+
+# Process-wide concurrency limits shared by every analysis pipeline (sync, job and batch).
+# Each pool guards one scarce resource so a burst of work queues at the bottleneck
+# stage instead of overloading it: network downloads, CPU-bound Whisper/ffmpeg work,
+# and Gemini requests (rate limited per API key).
+download_pool = asyncio.Semaphore(settings.DOWNLOAD_CONCURRENCY)
+transcribe_pool = asyncio.Semaphore(settings.TRANSCRIBE_CONCURRENCY)
+llm_pool = asyncio.Semaphore(settings.LLM_CONCURRENCY)
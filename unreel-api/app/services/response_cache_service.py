@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Analysis, ChatMessage
+
+try:
+    import redis
+except ImportError:  # Optional shared tier
+    redis = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Session.info key collecting cache keys to drop once the transaction commits
+_PENDING_KEY = "response_cache_invalidations"
+
+
+class ResponseCache:
+    """
+    Read-through cache of serialized JSON responses, keyed by resource.
+
+    Entries are grouped per resource (e.g. ("analysis", id)) with one entry
+    per representation variant (such as a ?fields= selection), so a single
+    invalidation drops every variant. The local tier is an LRU bounded by
+    total body size; when RESPONSE_CACHE_REDIS_URL is set (and redis is
+    installed) entries are also shared across processes.
+
+    Invalidation is automatic: a SQLAlchemy listener records every Analysis
+    or ChatMessage written in a session and drops the matching resources
+    after the transaction commits.
+
+    Redis calls never block the event loop: reads run in a worker thread
+    and writes/deletes in background tasks, all bounded by
+    RESPONSE_CACHE_REDIS_TIMEOUT_SECONDS. Writes to one resource are applied
+    in order, and a read first waits for the resource's pending writes.
+    """
+
+    def __init__(self, max_bytes: int = None, ttl_seconds: int = None, redis_url: Optional[str] = None):
+        self.max_bytes = max_bytes or settings.RESPONSE_CACHE_MAX_BYTES
+        self.ttl_seconds = ttl_seconds or settings.RESPONSE_CACHE_TTL_SECONDS
+        self._resources: "OrderedDict[Tuple[str, str], Dict[str, Dict[str, Any]]]" = OrderedDict()
+        self._size = 0
+        # Last pending shared write/delete per resource
+        self._shared_writes: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._redis = None
+        if redis_url and redis is not None:
+            timeout = settings.RESPONSE_CACHE_REDIS_TIMEOUT_SECONDS
+            self._redis = redis.Redis.from_url(redis_url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        elif redis_url:
+            logger.warning("RESPONSE_CACHE_REDIS_URL is set but redis is not installed; using the local cache only")
+
+    async def get(self, namespace: str, key: str, variant: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Returns:
+            {'etag', 'body'} or None on a miss
+        """
+        variants = self._resources.get((namespace, key))
+        entry = variants.get(variant) if variants else None
+        if entry and entry["expiresAt"] > time.monotonic():
+            self._resources.move_to_end((namespace, key))
+            return entry
+
+        if self._redis is None:
+            return None
+        pending = self._shared_writes.get((namespace, key))
+        if pending is not None:
+            await asyncio.wait([pending])
+        shared = await asyncio.to_thread(self._shared_get, namespace, key, variant)
+        if shared:
+            self._store(namespace, key, variant, shared["etag"], shared["body"])
+        return shared
+
+    def put(self, namespace: str, key: str, variant: str, etag: str, body: bytes):
+        """Cache a serialized response body with its ETag."""
+        self._store(namespace, key, variant, etag, body)
+        if self._redis is not None:
+            self._write_shared(namespace, key, self._shared_put, namespace, key, variant, etag, body)
+
+    def invalidate(self, namespace: str, key: str):
+        """Drop every cached variant of a resource."""
+        variants = self._resources.pop((namespace, key), None)
+        if variants:
+            self._size -= sum(len(entry["body"]) for entry in variants.values())
+        if self._redis is not None:
+            self._write_shared(namespace, key, self._shared_delete, namespace, key)
+
+    def clear(self):
+        self._resources.clear()
+        self._size = 0
+
+    def _store(self, namespace: str, key: str, variant: str, etag: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        variants = self._resources.setdefault((namespace, key), {})
+        previous = variants.get(variant)
+        if previous:
+            self._size -= len(previous["body"])
+        variants[variant] = {"etag": etag, "body": body, "expiresAt": time.monotonic() + self.ttl_seconds}
+        self._size += len(body)
+        self._resources.move_to_end((namespace, key))
+
+        while self._size > self.max_bytes and self._resources:
+            _, evicted = self._resources.popitem(last=False)
+            self._size -= sum(len(entry["body"]) for entry in evicted.values())
+
+    def _redis_key(self, namespace: str, key: str) -> str:
+        return f"unreel:response:{namespace}:{key}"
+
+    def _write_shared(self, namespace: str, key: str, write, *args):
+        """Run a blocking Redis write in a worker thread after the resource's previous write."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (sync sessions in migrations and scripts): nothing to block
+            write(*args)
+            return
+        resource = (namespace, key)
+        previous = self._shared_writes.get(resource)
+
+        async def run():
+            if previous is not None:
+                await asyncio.wait([previous])
+            await asyncio.to_thread(write, *args)
+
+        task = loop.create_task(run())
+        self._shared_writes[resource] = task
+        task.add_done_callback(
+            lambda done: self._shared_writes.pop(resource, None) if self._shared_writes.get(resource) is done else None
+        )
+
+    def _shared_get(self, namespace: str, key: str, variant: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = self._redis.hget(self._redis_key(namespace, key), variant)
+        except Exception as e:
+            logger.warning(f"Shared response cache read failed for {namespace}/{key}: {e}")
+            return None
+        if not raw:
+            return None
+        etag, _, body = raw.partition(b"\n")
+        return {"etag": etag.decode("utf-8"), "body": body}
+
+    def _shared_put(self, namespace: str, key: str, variant: str, etag: str, body: bytes):
+        try:
+            redis_key = self._redis_key(namespace, key)
+            pipe = self._redis.pipeline()
+            pipe.hset(redis_key, variant, etag.encode("utf-8") + b"\n" + body)
+            pipe.expire(redis_key, self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Shared response cache write failed for {namespace}/{key}: {e}")
+
+    def _shared_delete(self, namespace: str, key: str):
+        try:
+            self._redis.delete(self._redis_key(namespace, key))
+        except Exception as e:
+            logger.warning(f"Shared response cache invalidation failed for {namespace}/{key}: {e}")
+
+
+# Global cache instance (Singleton pattern)
+response_cache = ResponseCache(redis_url=settings.RESPONSE_CACHE_REDIS_URL)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Analysis):
+            pending.add(("analysis", obj.id))
+        elif isinstance(obj, ChatMessage):
+            pending.add(("chat", obj.analysisId))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    for namespace, key in session.info.pop(_PENDING_KEY, set()):
+        response_cache.invalidate(namespace, key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, text, update
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal, async_engine
+from app.models import Analysis, AnalysisBlob
+from app.services.blob_store_service import archive_path, write_archive
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Tables range-partitioned by month on "createdAt" (see database_migration.partition_tables)
+PARTITIONED_TABLES = ["analyses", "chat_messages"]
+
+# Session-level Postgres advisory lock: one retention run at a time across workers ("unrr")
+RETENTION_LOCK_KEY = 0x756E7272
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month `months` after the month of `month`."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def monthly_partitions(table: str, first: date, last: date) -> List[Tuple[str, date, date]]:
+    """
+    Monthly partitions covering first..last (inclusive months).
+
+    Returns:
+        (partition name, from, to) triples, e.g. ("analyses_y2026m10", 2026-10-01, 2026-11-01)
+    """
+    partitions = []
+    month = add_months(first, 0)
+    while month <= last:
+        upper = add_months(month, 1)
+        partitions.append((f"{table}_y{month.year}m{month.month:02d}", month, upper))
+        month = upper
+    return partitions
+
+
+def partition_ddl(table: str, name: str, lower: date, upper: date, parent: Optional[str] = None) -> str:
+    """CREATE TABLE statement for one monthly partition (names come from monthly_partitions only)."""
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{parent or table}" '
+        f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    )
+
+
+def default_partition_ddl(table: str, parent: Optional[str] = None) -> str:
+    """CREATE TABLE statement for the catch-all partition (rows outside every monthly range)."""
+    return f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{parent or table}" DEFAULT'
+
+
+def archive_dir_problem(archive_dir: Optional[str]) -> Optional[str]:
+    """
+    Why blobs cannot be archived to `archive_dir`, if they cannot.
+
+    Archived bytes are removed from the database, so the directory must be
+    set explicitly, absolute (not relative to the working directory) and
+    already exist (a mounted volume is never created on the fly).
+
+    Returns:
+        A reason, or None if the directory is usable
+    """
+    if not archive_dir:
+        return "ARCHIVE_DIR is not set"
+    if not os.path.isabs(archive_dir):
+        return f"ARCHIVE_DIR {archive_dir!r} is not an absolute path"
+    if not os.path.isdir(archive_dir):
+        return f"ARCHIVE_DIR {archive_dir!r} does not exist"
+    return None
+
+
+class RetentionService:
+    """
+    Periodic storage maintenance.
+
+    Each run creates the next PARTITION_MONTHS_AHEAD monthly partitions of
+    the partitioned tables (so new rows never land in the default
+    partition), then archives the blobs of analyses older than
+    ARCHIVE_AFTER_DAYS to compressed files under ARCHIVE_DIR, leaving only
+    a pointer row in analysis_blobs. Old partitions are then never written
+    again, so vacuum and index maintenance track the recent months only.
+
+    Off unless RETENTION_ENABLED; archival also needs ARCHIVE_DIR (see
+    archive_dir_problem). Partitions are still created once at startup
+    when the job is off.
+
+    Partitioning itself is an offline step (database_migration
+    partition_tables); on partitioned tables, lookups by id alone
+    (db.get(Analysis, id), UPDATEs by id) cannot be pruned to one partition
+    and probe the id index of every month kept.
+    """
+
+    def __init__(self, interval_seconds: int = None):
+        self.interval_seconds = interval_seconds or settings.RETENTION_INTERVAL_SECONDS
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the periodic run. Called once from the application lifespan."""
+        if self._task:
+            return
+        if not settings.RETENTION_ENABLED:
+            # Rows of a month without a partition land in the default one and block creating it later
+            if async_engine.dialect.name == "postgresql":
+                try:
+                    await self.ensure_partitions()
+                except Exception as e:
+                    logger.warning(f"Could not create upcoming partitions: {e}")
+            return
+        self._task = asyncio.create_task(self._loop(), name="retention")
+        logger.info(f"Retention job started (every {self.interval_seconds} s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_once(self):
+        """Run partition maintenance and archival once, unless another worker is already running them."""
+        postgres = async_engine.dialect.name == "postgresql"
+        async with async_engine.connect() as lock_connection:
+            if postgres:
+                locked = (await lock_connection.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": RETENTION_LOCK_KEY}
+                )).scalar()
+                await lock_connection.commit()
+                if not locked:
+                    logger.info("Retention run skipped: another worker holds the lock")
+                    return
+            try:
+                if postgres:
+                    await self.ensure_partitions()
+                archived = await self.archive_cold_blobs()
+                if archived:
+                    logger.info(f"Archived {archived} cold blobs to {settings.ARCHIVE_DIR}")
+            finally:
+                if postgres:
+                    await lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RETENTION_LOCK_KEY})
+                    await lock_connection.commit()
+
+    async def ensure_partitions(self):
+        """Create the current and upcoming monthly partitions of each partitioned table."""
+        this_month = date.today().replace(day=1)
+        async with async_engine.connect() as connection:
+            for table in PARTITIONED_TABLES:
+                relkind = (await connection.execute(
+                    text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table}
+                )).scalar()
+                if relkind != "p":
+                    continue
+                for name, lower, upper in monthly_partitions(
+                    table, this_month, add_months(this_month, settings.PARTITION_MONTHS_AHEAD)
+                ):
+                    try:
+                        # Never queue behind long transactions on the parent table
+                        await connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+                        await connection.execute(text(partition_ddl(table, name, lower, upper)))
+                        await connection.commit()
+                    except Exception as e:
+                        # e.g. the default partition already holds rows of that month
+                        await connection.rollback()
+                        logger.warning(f"Could not create partition {name}: {e}")
+
+    async def archive_cold_blobs(self, older_than_days: int = None) -> int:
+        """
+        Move the blobs of old analyses to local files.
+
+        The stored (compressed) bytes are written as-is; the row keeps its
+        codec and gets the file's path, so blob_store reads it back
+        transparently.
+
+        Args:
+            older_than_days: Age threshold (defaults to ARCHIVE_AFTER_DAYS)
+
+        Returns:
+            Number of blobs archived
+        """
+        problem = archive_dir_problem(settings.ARCHIVE_DIR)
+        if problem:
+            logger.warning(f"Cold blobs not archived: {problem}")
+            return 0
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days or settings.ARCHIVE_AFTER_DAYS)
+        archived = 0
+        async with AsyncSessionLocal() as db:
+            while True:
+                rows = (await db.execute(
+                    select(AnalysisBlob.analysisId, AnalysisBlob.kind, AnalysisBlob.codec, AnalysisBlob.data,
+                           Analysis.createdAt)
+                    .join(Analysis, Analysis.id == AnalysisBlob.analysisId)
+                    .where(Analysis.createdAt < cutoff, AnalysisBlob.archivePath.is_(None))
+                    .limit(settings.ARCHIVE_BATCH_SIZE)
+                )).all()
+                if not rows:
+                    break
+
+                paths = await asyncio.to_thread(self._write_files, rows)
+                connection = await db.connection()
+                await connection.execute(
+                    update(AnalysisBlob.__table__)
+                    .where(AnalysisBlob.__table__.c.analysisId == bindparam("b_analysis_id"),
+                           AnalysisBlob.__table__.c.kind == bindparam("b_kind"))
+                    .values(data=b"", archivePath=bindparam("b_path")),
+                    [
+                        {"b_analysis_id": row.analysisId, "b_kind": row.kind, "b_path": path}
+                        for row, path in zip(rows, paths)
+                    ],
+                )
+                await db.commit()
+                archived += len(rows)
+        return archived
+
+    @staticmethod
+    def _write_files(rows) -> List[str]:
+        paths = []
+        for row in rows:
+            path = archive_path(row.analysisId, row.kind, row.codec, row.createdAt)
+            write_archive(path, row.data)
+            paths.append(path)
+        return paths
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Retention run failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+
+
+# Global retention service instance (Singleton pattern)
+_retention_service = None
+
+
+def get_retention_service() -> RetentionService:
+    """Return the process-wide RetentionService, creating it on first use."""
+    global _retention_service
+    if _retention_service is None:
+        _retention_service = RetentionService()
+    return _retention_service
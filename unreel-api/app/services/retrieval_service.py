@@ -0,0 +1,165 @@
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# BM25 parameters (standard Okapi defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?।])\s+")
+
+# Small English stopword list; other languages are indexed as-is
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "how", "i",
+    "if", "in", "into", "is", "it", "its", "me", "my", "of", "on", "or", "so", "that",
+    "the", "their", "them", "then", "there", "these", "they", "this", "to", "was", "we",
+    "what", "when", "where", "which", "who", "why", "will", "with", "you", "your",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens with English stopwords removed."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _chunk_segments(segments: List[Dict[str, Any]], chunk_chars: int) -> List[Dict[str, Any]]:
+    """Merge consecutive Whisper segments into chunks of roughly chunk_chars characters."""
+    chunks = []
+    current: List[Dict[str, Any]] = []
+    size = 0
+    for seg in segments:
+        text = seg.get("text", "").strip()
+        if not text:
+            continue
+        current.append(seg)
+        size += len(text) + 1
+        if size >= chunk_chars:
+            chunks.append(current)
+            current, size = [], 0
+    if current:
+        chunks.append(current)
+
+    return [
+        {
+            "text": " ".join(seg["text"].strip() for seg in group),
+            "start": group[0].get("start"),
+            "end": group[-1].get("end"),
+        }
+        for group in chunks
+    ]
+
+
+def _chunk_text(transcript: str, chunk_chars: int) -> List[Dict[str, Any]]:
+    """Split an untimed transcript into sentence-aligned chunks."""
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_RE.split(transcript.strip()):
+        if current and len(current) + len(sentence) + 1 > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return [{"text": text, "start": None, "end": None} for text in chunks]
+
+
+def build_transcript_index(transcript: Optional[str],
+                           segments: Optional[List[Dict[str, Any]]] = None,
+                           chunk_chars: int = 600) -> Optional[Dict[str, Any]]:
+    """
+    Build a BM25 chunk index over a transcript.
+
+    Uses Whisper's timestamped segments when available, otherwise falls back
+    to sentence-aligned chunks without timestamps. The result is plain JSON so
+    it can be stored on the analysis row and reused by every chat turn.
+
+    Args:
+        transcript: Full transcript text
+        segments: Optional Whisper segments ([{'start', 'end', 'text'}])
+        chunk_chars: Target chunk size in characters
+
+    Returns:
+        Index dict, or None if there is nothing to index
+    """
+    if not transcript or not transcript.strip():
+        return None
+
+    chunks = _chunk_segments(segments, chunk_chars) if segments else _chunk_text(transcript, chunk_chars)
+    doc_freq: Counter = Counter()
+    for chunk in chunks:
+        term_freq = Counter(tokenize(chunk["text"]))
+        chunk["tf"] = dict(term_freq)
+        chunk["length"] = sum(term_freq.values())
+        doc_freq.update(term_freq.keys())
+
+    if not chunks:
+        return None
+
+    return {
+        "version": INDEX_VERSION,
+        "chunks": chunks,
+        "df": dict(doc_freq),
+        "avgLength": sum(c["length"] for c in chunks) / len(chunks),
+    }
+
+
+def search_transcript_index(index: Dict[str, Any], query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    """
+    Rank transcript chunks against a question with BM25.
+
+    Args:
+        index: Index built by build_transcript_index
+        query: User question
+        top_k: Maximum number of chunks to return
+
+    Returns:
+        Up to top_k chunks ({'text', 'start', 'end'}) in transcript order;
+        empty if no chunk shares a term with the query
+    """
+    chunks = index.get("chunks") or []
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not chunks or not terms:
+        return []
+
+    doc_freq = index.get("df", {})
+    n_chunks = len(chunks)
+    tf = np.array([[chunk["tf"].get(term, 0) for chunk in chunks] for term in terms], dtype=np.float32)
+    idf = np.array(
+        [math.log(1 + (n_chunks - doc_freq.get(term, 0) + 0.5) / (doc_freq.get(term, 0) + 0.5)) for term in terms],
+        dtype=np.float32,
+    )
+    lengths = np.array([chunk["length"] for chunk in chunks], dtype=np.float32)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(index.get("avgLength") or 1.0, 1e-6))
+
+    scores = (idf[:, None] * tf * (BM25_K1 + 1) / (tf + norm[None, :])).sum(axis=0)
+    ranked = [i for i in np.argsort(-scores)[:top_k] if scores[i] > 0]
+
+    return [
+        {"text": chunks[i]["text"], "start": chunks[i]["start"], "end": chunks[i]["end"]}
+        for i in sorted(ranked)
+    ]
+
+
+def format_excerpts(excerpts: List[Dict[str, Any]]) -> str:
+    """Render retrieved chunks as '[m:ss-m:ss] text' lines for the chat prompt."""
+    def timestamp(seconds: Optional[float]) -> str:
+        seconds = int(seconds or 0)
+        return f"{seconds // 60}:{seconds % 60:02d}"
+
+    lines = []
+    for excerpt in excerpts:
+        if excerpt.get("start") is not None:
+            lines.append(f"[{timestamp(excerpt['start'])}-{timestamp(excerpt['end'])}] {excerpt['text']}")
+        else:
+            lines.append(excerpt["text"])
+    return "\n".join(lines)
@@ -0,0 +1,333 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Analysis, AnalysisEmbedding
+from app.services.embedding_service import embed_text
+from app.services.blob_store_service import blob_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Search vectors are smaller than chat-cache vectors: they are scanned in bulk
+SEARCH_EMBEDDING_DIM = 256
+
+# Transcript matches count slightly less than summary/topic matches
+KIND_WEIGHTS = {"summary": 1.0, "topics": 1.0, "transcript": 0.85}
+
+MAX_INDEXED_USERS = 200
+BACKFILL_BATCH_SIZE = 100
+# Initial row capacity of a user index (doubled as it fills)
+MIN_CAPACITY = 64
+# Vector kinds ("summary", "topics", "transcript")
+KIND_DTYPE = "<U16"
+
+
+def build_analysis_vectors(analysis: Analysis, transcript: Optional[str] = None,
+                           transcript_index: Optional[Dict[str, Any]] = None) -> List[Tuple[str, np.ndarray]]:
+    """
+    Compute the search vectors for one analysis.
+
+    One vector for title/caption/summary, one for the key topics, and up to
+    SEARCH_TRANSCRIPT_VECTORS for the transcript (its index chunks merged
+    into evenly sized groups, so long videos do not dominate the index).
+
+    Args:
+        analysis: Completed Analysis row
+        transcript: Its full transcript (a blob, see blob_store_service)
+        transcript_index: Its transcript chunk index, if built
+
+    Returns:
+        List of (kind, float16 vector) pairs
+    """
+    vectors = []
+
+    summary_text = " ".join(filter(None, [analysis.title, analysis.caption, analysis.summary]))
+    if summary_text.strip():
+        vectors.append(("summary", summary_text))
+
+    topics = analysis.keyTopics or []
+    if isinstance(topics, list) and topics:
+        vectors.append(("topics", ", ".join(str(topic) for topic in topics)))
+
+    chunks = [chunk["text"] for chunk in ((transcript_index or {}).get("chunks") or [])]
+    if not chunks and transcript:
+        chunks = [transcript]
+    if chunks:
+        groups = np.array_split(np.arange(len(chunks)), min(len(chunks), settings.SEARCH_TRANSCRIPT_VECTORS))
+        vectors += [("transcript", " ".join(chunks[i] for i in group)) for group in groups]
+
+    return [(kind, embed_text(text, SEARCH_EMBEDDING_DIM).astype(np.float16)) for kind, text in vectors]
+
+
+class SearchIndex:
+    """
+    Per-user, array-backed semantic search index over completed analyses.
+
+    Vectors are stored as float16 in the analysis_embeddings table. On a
+    user's first search their vectors are loaded into one contiguous matrix
+    (widened to float32 so scoring is a single BLAS matrix-vector product),
+    with a parallel array mapping each row to its analysis. The arrays keep
+    spare capacity, so appending an analysis does not copy the matrix.
+
+    Each search first reads the user's (vector count, newest createdAt)
+    from the table. When it changed (vectors written by another worker or
+    replica), only the rows written since are loaded and swapped in; if the
+    counts still disagree (deleted vectors), the user's index is reloaded.
+    """
+
+    # Row-aligned arrays of a user index
+    ARRAYS = ("matrix", "owners", "kinds", "weights")
+
+    def __init__(self, max_users: int = MAX_INDEXED_USERS):
+        self.max_users = max_users
+        self._users: "OrderedDict[Optional[str], Dict[str, Any]]" = OrderedDict()
+
+    async def index_analysis(self, db: AsyncSession, analysis: Analysis, transcript: Optional[str] = None,
+                             transcript_index: Optional[Dict[str, Any]] = None):
+        """
+        (Re)compute and store the search vectors for a completed analysis.
+
+        Args:
+            db: Database session
+            analysis: Completed Analysis row
+            transcript: Its full transcript
+            transcript_index: Its transcript chunk index, if built
+        """
+        vectors = await self.stage_analysis(db, analysis, transcript, transcript_index)
+        await db.commit()
+        self.publish(analysis, vectors)
+
+    async def stage_analysis(self, db: AsyncSession, analysis: Analysis, transcript: Optional[str] = None,
+                             transcript_index: Optional[Dict[str, Any]] = None) -> List[Tuple[str, np.ndarray]]:
+        """
+        Replace an analysis' stored vectors inside the caller's transaction.
+
+        Nothing is committed, so the vectors land atomically with the rest of
+        the caller's writes; call publish() once that transaction commits.
+
+        Args:
+            db: Database session
+            analysis: Completed Analysis row
+            transcript: Its full transcript
+            transcript_index: Its transcript chunk index, if built
+
+        Returns:
+            The staged (kind, vector) pairs
+        """
+        try:
+            vectors = build_analysis_vectors(analysis, transcript, transcript_index)
+        except Exception as e:
+            # Search is best effort: never fail the analysis over it
+            logger.warning(f"Could not build search vectors for analysis {analysis.id}: {e}")
+            return []
+
+        await db.execute(delete(AnalysisEmbedding).where(AnalysisEmbedding.analysisId == analysis.id))
+        db.add_all([
+            AnalysisEmbedding(analysisId=analysis.id, userId=analysis.userId, kind=kind, vector=vector.tobytes())
+            for kind, vector in vectors
+        ])
+        return vectors
+
+    def publish(self, analysis: Analysis, vectors: List[Tuple[str, np.ndarray]]):
+        """Swap committed vectors into the user's in-memory index, if it is loaded."""
+        user_index = self._users.get(analysis.userId)
+        if user_index is not None:
+            self._remove(user_index, analysis.id)
+            self._append(user_index, analysis.id, vectors)
+
+    async def search(self, db: AsyncSession, user_id: Optional[str], query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Rank the user's analyses against a free-text query.
+
+        Args:
+            db: Database session
+            user_id: ID of the user whose history is searched
+            query: Free-text query
+            limit: Maximum number of results
+
+        Returns:
+            Results ({'analysisId', 'score', 'matchedOn'}), best first
+        """
+        user_index = await self._load(db, user_id)
+        if not user_index["analysisIds"]:
+            return []
+
+        started = time.perf_counter()
+        size = user_index["size"]
+        owners, kinds = user_index["owners"][:size], user_index["kinds"][:size]
+        query_vector = embed_text(query, SEARCH_EMBEDDING_DIM)
+        scores = (user_index["matrix"][:size] @ query_vector) * user_index["weights"][:size]
+
+        # Best-scoring vector per analysis
+        best = np.full(len(user_index["analysisIds"]), -np.inf, dtype=np.float32)
+        np.maximum.at(best, owners, scores)
+
+        top = np.argsort(-best)[:limit]
+        results = []
+        for position in top:
+            if best[position] < settings.SEARCH_MIN_SCORE:
+                break
+            rows = np.flatnonzero(owners == position)
+            matched = str(kinds[rows[np.argmax(scores[rows])]])
+            results.append({
+                "analysisId": user_index["analysisIds"][position],
+                "score": round(float(best[position]), 4),
+                "matchedOn": matched,
+            })
+
+        logger.info(f"Semantic search over {len(scores)} vectors took {(time.perf_counter() - started) * 1000:.1f} ms")
+        return results
+
+    async def _load(self, db: AsyncSession, user_id: Optional[str]) -> Dict[str, Any]:
+        user_index = self._users.get(user_id)
+        if user_index is not None:
+            self._users.move_to_end(user_id)
+            stamp = await self._stamp(db, user_id)
+            if stamp == user_index["stamp"]:
+                return user_index
+            if user_index["stamp"] is not None:
+                await self._apply_since(db, user_id, user_index, user_index["stamp"][1])
+                if user_index["size"] == stamp[0]:
+                    user_index["stamp"] = stamp
+                    return user_index
+        else:
+            await self._backfill(db, user_id)
+
+        stamp = await self._stamp(db, user_id)
+        rows = (await db.execute(
+            select(AnalysisEmbedding.analysisId, AnalysisEmbedding.kind, AnalysisEmbedding.vector)
+            .where(AnalysisEmbedding.userId == user_id)
+            .order_by(AnalysisEmbedding.analysisId)
+        )).all()
+        user_index = self._empty()
+        user_index["stamp"] = stamp
+        positions: Dict[str, int] = {}
+        owners, kinds = [], []
+        for row in rows:
+            if row.analysisId not in positions:
+                positions[row.analysisId] = len(user_index["analysisIds"])
+                user_index["analysisIds"].append(row.analysisId)
+            owners.append(positions[row.analysisId])
+            kinds.append(row.kind)
+        if rows:
+            matrix = np.frombuffer(b"".join(row.vector for row in rows), dtype=np.float16)
+            user_index["matrix"] = matrix.reshape(len(rows), SEARCH_EMBEDDING_DIM).astype(np.float32)
+            user_index["owners"] = np.array(owners, dtype=np.int64)
+            user_index["kinds"] = np.array(kinds, dtype=KIND_DTYPE)
+            user_index["weights"] = np.array([KIND_WEIGHTS.get(k, 1.0) for k in kinds], dtype=np.float32)
+            user_index["size"] = len(rows)
+
+        self._users[user_id] = user_index
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        logger.info(f"Loaded search index for user {user_id}: {len(user_index['analysisIds'])} analyses, {len(rows)} vectors")
+        return user_index
+
+    async def _stamp(self, db: AsyncSession, user_id: Optional[str]) -> Tuple[int, Any]:
+        """(vector count, newest createdAt) of a user's stored vectors: changes whenever they are written."""
+        count, newest = (await db.execute(
+            select(func.count(), func.max(AnalysisEmbedding.createdAt)).where(AnalysisEmbedding.userId == user_id)
+        )).one()
+        return count, newest
+
+    async def _apply_since(self, db: AsyncSession, user_id: Optional[str], user_index: Dict[str, Any], since):
+        """Swap in the vectors of analyses (re)indexed at or after `since` (possibly by another process)."""
+        rows = (await db.execute(
+            select(AnalysisEmbedding.analysisId, AnalysisEmbedding.kind, AnalysisEmbedding.vector)
+            .where(AnalysisEmbedding.userId == user_id, AnalysisEmbedding.createdAt >= since)
+            .order_by(AnalysisEmbedding.analysisId)
+        )).all()
+        vectors: "OrderedDict[str, List[Tuple[str, np.ndarray]]]" = OrderedDict()
+        for row in rows:
+            vectors.setdefault(row.analysisId, []).append((row.kind, np.frombuffer(row.vector, dtype=np.float16)))
+        for analysis_id, analysis_vectors in vectors.items():
+            self._remove(user_index, analysis_id)
+            self._append(user_index, analysis_id, analysis_vectors)
+
+    async def _backfill(self, db: AsyncSession, user_id: Optional[str]):
+        """Index completed analyses that predate the search index (runs once per user)."""
+        indexed = select(AnalysisEmbedding.analysisId).where(AnalysisEmbedding.userId == user_id)
+        missing = list((await db.execute(
+            select(Analysis.id)
+            .where(Analysis.userId == user_id, Analysis.status == "completed", ~Analysis.id.in_(indexed))
+        )).scalars())
+        for start in range(0, len(missing), BACKFILL_BATCH_SIZE):
+            batch_ids = missing[start:start + BACKFILL_BATCH_SIZE]
+            batch = (await db.execute(select(Analysis).where(Analysis.id.in_(batch_ids)))).scalars().all()
+            blobs = await blob_store.load_many(db, batch_ids, ["fullTranscript", "transcriptIndex"])
+            for analysis in batch:
+                transcripts = blobs.get(analysis.id, {})
+                db.add_all([
+                    AnalysisEmbedding(analysisId=analysis.id, userId=user_id, kind=kind, vector=vector.tobytes())
+                    for kind, vector in build_analysis_vectors(
+                        analysis, transcripts.get("fullTranscript"), transcripts.get("transcriptIndex")
+                    )
+                ])
+            await db.commit()
+        if missing:
+            logger.info(f"Backfilled search vectors for {len(missing)} analyses of user {user_id}")
+
+    def _append(self, user_index: Dict[str, Any], analysis_id: str, vectors: List[Tuple[str, np.ndarray]]):
+        if not vectors:
+            return
+        position = len(user_index["analysisIds"])
+        user_index["analysisIds"].append(analysis_id)
+        start = user_index["size"]
+        end = start + len(vectors)
+        self._reserve(user_index, end)
+        kinds = [kind for kind, _ in vectors]
+        user_index["matrix"][start:end] = np.stack([v for _, v in vectors])
+        user_index["owners"][start:end] = position
+        user_index["kinds"][start:end] = kinds
+        user_index["weights"][start:end] = [KIND_WEIGHTS.get(k, 1.0) for k in kinds]
+        user_index["size"] = end
+
+    def _reserve(self, user_index: Dict[str, Any], rows: int):
+        """Grow the arrays geometrically, so appends are amortized O(1) rather than a copy of the matrix."""
+        capacity = len(user_index["matrix"])
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, MIN_CAPACITY)
+        size = user_index["size"]
+        for key in self.ARRAYS:
+            grown = np.zeros((capacity,) + user_index[key].shape[1:], dtype=user_index[key].dtype)
+            grown[:size] = user_index[key][:size]
+            user_index[key] = grown
+
+    def _remove(self, user_index: Dict[str, Any], analysis_id: str):
+        if analysis_id not in user_index["analysisIds"]:
+            return
+        position = user_index["analysisIds"].index(analysis_id)
+        size = user_index["size"]
+        keep = user_index["owners"][:size] != position
+        kept = int(keep.sum())
+        for key in self.ARRAYS:
+            user_index[key][:kept] = user_index[key][:size][keep]
+        owners = user_index["owners"][:kept]
+        owners[owners > position] -= 1
+        user_index["size"] = kept
+        del user_index["analysisIds"][position]
+
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {
+            "analysisIds": [],
+            "size": 0,
+            # (vector count, newest createdAt) the index reflects; None until loaded from the table
+            "stamp": None,
+            "matrix": np.zeros((0, SEARCH_EMBEDDING_DIM), dtype=np.float32),
+            "owners": np.zeros(0, dtype=np.int64),
+            "kinds": np.array([], dtype=KIND_DTYPE),
+            "weights": np.zeros(0, dtype=np.float32),
+        }
+
+
+# Global index instance (Singleton pattern)
+search_index = SearchIndex()
@@ -57,16 +57,7 @@ class SearchService:
             )
 
             if response.status_code == 200:
-                data = response.json()
-                organic = data.get("organic", [])
-                results = []
-                for item in organic[:num_results]:
-                    results.append({
-                        "title": item.get("title", ""),
-                        "link": item.get("link", ""),
-                        "snippet": item.get("snippet", ""),
-                    })
-                return results
+                return self._parse_results(response.json(), num_results)
             else:
                 logger.warning(f"Serper API returned status {response.status_code}: {response.text}")
                 return []
@@ -75,6 +66,61 @@ class SearchService:
             logger.error(f"Search error: {e}")
             return []
 
+    async def _search_many(self, queries: List[str], num_results: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Perform several Google searches in a single Serper request.
+        
+        Serper accepts a JSON array of queries and answers with an array of
+        result pages, so N lookups cost one round trip instead of N.
+        Falls back to concurrent single queries if the batch call fails.
+        
+        Args:
+            queries: Search query strings
+            num_results: Number of results to return per query
+            
+        Returns:
+            One result list per query, in the same order
+        """
+        if not self.available or not queries:
+            return [[] for _ in queries]
+        if len(queries) == 1:
+            return [await self._search(queries[0], num_results)]
+
+        try:
+            headers = {
+                "X-API-KEY": self.api_key,
+                "Content-Type": "application/json"
+            }
+            payload = [{"q": query, "num": num_results} for query in queries]
+
+            response = await asyncio.to_thread(
+                requests.post, self.base_url, headers=headers, json=payload, timeout=15
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                if isinstance(data, list) and len(data) == len(queries):
+                    return [self._parse_results(page, num_results) for page in data]
+                logger.warning("Serper batch response did not match the query count, retrying individually")
+            else:
+                logger.warning(f"Serper batch API returned status {response.status_code}: {response.text}")
+
+        except Exception as e:
+            logger.error(f"Batch search error: {e}")
+
+        return list(await asyncio.gather(*(self._search(query, num_results) for query in queries)))
+
+    def _parse_results(self, data: Dict[str, Any], num_results: int) -> List[Dict[str, Any]]:
+        """Extract 'title', 'link', 'snippet' from a Serper organic result page."""
+        results = []
+        for item in data.get("organic", [])[:num_results]:
+            results.append({
+                "title": item.get("title", ""),
+                "link": item.get("link", ""),
+                "snippet": item.get("snippet", ""),
+            })
+        return results
+
     # ─── FACT-CHECK RAG ─────────────────────────────────────────────
 
     async def verify_claims(self, claims: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -91,21 +137,13 @@ class SearchService:
         if not claims or not self.available:
             return claims or []
 
-        enriched_claims = []
-        for claim_obj in claims:
-            claim_text = claim_obj.get("claim", "")
-            if not claim_text:
-                enriched_claims.append(claim_obj)
-                continue
-
-            # Search for evidence about this claim
-            query = f"is it true that {claim_text}"
-            results = await self._search(query, num_results=3)
-
+        # Search for evidence about every claim in one batched request
+        searchable = [claim_obj for claim_obj in claims if claim_obj.get("claim")]
+        queries = [f"is it true that {claim_obj['claim']}" for claim_obj in searchable]
+        for claim_obj, results in zip(searchable, await self._search_many(queries, num_results=3)):
             claim_obj["searchEvidence"] = results
-            enriched_claims.append(claim_obj)
 
-        return enriched_claims
+        return claims
 
     # ─── LINK-DETECTIVE RAG ─────────────────────────────────────────
 
@@ -123,15 +161,10 @@ class SearchService:
         if not resources or not self.available:
             return resources or []
 
-        enriched_resources = []
-        for resource in resources:
-            search_query = resource.get("urlSuggestion") or resource.get("name", "")
-            if not search_query:
-                enriched_resources.append(resource)
-                continue
-
-            results = await self._search(search_query, num_results=3)
+        searchable = [r for r in resources if r.get("urlSuggestion") or r.get("name")]
+        queries = [r.get("urlSuggestion") or r.get("name") for r in searchable]
 
+        for resource, results in zip(searchable, await self._search_many(queries, num_results=3)):
             # Pick the most relevant link as the "resolved" URL
             if results:
                 resource["resolvedUrl"] = results[0].get("link")
@@ -140,9 +173,7 @@ class SearchService:
                 resource["resolvedUrl"] = None
                 resource["searchResults"] = []
 
-            enriched_resources.append(resource)
-
-        return enriched_resources
+        return resources
 
     # ─── SHOPPING RAG ───────────────────────────────────────────────
 
@@ -160,15 +191,9 @@ class SearchService:
         if not items or not self.available:
             return items or []
 
-        enriched_items = []
-        for item in items:
-            search_query = item.get("potentialUrl") or f"buy {item.get('name', '')}"
-            if not search_query:
-                enriched_items.append(item)
-                continue
-
-            results = await self._search(search_query, num_results=3)
+        queries = [item.get("potentialUrl") or f"buy {item.get('name', '')}" for item in items]
 
+        for item, results in zip(items, await self._search_many(queries, num_results=3)):
             if results:
                 item["resolvedUrl"] = results[0].get("link")
                 item["searchResults"] = results
@@ -176,9 +201,7 @@ class SearchService:
                 item["resolvedUrl"] = None
                 item["searchResults"] = []
 
-            enriched_items.append(item)
-
-        return enriched_items
+        return items
 
     # ─── TREND ANALYSIS RAG ─────────────────────────────────────────
 
@@ -1,6 +1,6 @@
 import os
 import logging
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 import whisper
 import warnings
 
@@ -47,6 +47,20 @@ class SpeechService:
         Returns:
             Transcript text or None if transcription fails
         """
+        result = self.transcribe(audio_file_path)
+        return result["text"] if result else None
+
+    def transcribe(self, audio_file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Transcribe an audio file, keeping Whisper's timestamped segments.
+        
+        Args:
+            audio_file_path: Path to the audio file
+            
+        Returns:
+            Dict with 'text' and 'segments' ([{'start', 'end', 'text'}], seconds),
+            or None if transcription fails
+        """
         if not self.available or not self.model:
             logger.warning("Speech service not available, returning placeholder")
             return None
@@ -60,7 +74,13 @@ class SpeechService:
             # Note: Whisper's transcribe function is not natively async
             result = self.model.transcribe(audio_file_path)
             # Ensure we always return a string
-            return str(result["text"])
+            return {
+                "text": str(result["text"]),
+                "segments": [
+                    {"start": float(seg["start"]), "end": float(seg["end"]), "text": str(seg["text"]).strip()}
+                    for seg in result.get("segments", [])
+                ],
+            }
             
         except Exception as e:
             logger.error(f"Error in speech transcription: {str(e)}", exc_info=True)
@@ -76,7 +96,17 @@ class SpeechService:
         Returns:
             Transcript text or placeholder
         """
-        transcript = self.extract_transcript(audio_file_path)
-        if transcript is None:
-            return "Full transcript would be extracted from audio in a real implementation with Whisper model"
-        return transcript
\ No newline at end of file
+        transcript, _ = self.extract_transcript_segments_with_fallback(audio_file_path)
+        return transcript
+
+    def extract_transcript_segments_with_fallback(self, audio_file_path: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Like extract_transcript_with_fallback, but also returns timestamped segments.
+        
+        Returns:
+            Tuple of (transcript text or placeholder, segments)
+        """
+        result = self.transcribe(audio_file_path)
+        if result is None:
+            return "Full transcript would be extracted from audio in a real implementation with Whisper model", []
+        return result["text"], result["segments"]
\ No newline at end of file
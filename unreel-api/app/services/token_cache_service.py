@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+import firebase_admin
+from firebase_admin import auth
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Google's public keys for Firebase ID tokens (the URL firebase_admin verifies against)
+ID_TOKEN_CERT_URI = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+
+
+class VerifiedTokenCache:
+    """
+    LRU of verified Firebase ID tokens, keyed by the token's SHA-256.
+
+    A token verified once is trusted until its `exp` claim, so the history,
+    analysis, chat and translate calls of a session verify it a single time.
+    Cold verifications (RSA check, possibly a certificate fetch) run in a
+    worker thread, and concurrent requests carrying the same new token share
+    one verification. Failures are never cached.
+
+    A background task keeps Google's signing certificates fresh in
+    firebase_admin's HTTP cache, so a cold verification never waits on the
+    network.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or settings.AUTH_TOKEN_CACHE_SIZE
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Return the decoded claims of a Firebase ID token.
+
+        Raises:
+            Whatever auth.verify_id_token raises for an invalid or expired token
+        """
+        if not settings.AUTH_TOKEN_CACHE_ENABLED:
+            return await asyncio.to_thread(auth.verify_id_token, token)
+
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        claims = self._lookup(key)
+        if claims is not None:
+            return claims
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._verify_cold(key, token))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(pending)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        claims = self._entries.get(key)
+        if claims is None:
+            return None
+        if time.time() >= claims.get("exp", 0):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    async def _verify_cold(self, key: str, token: str) -> Dict[str, Any]:
+        claims = await asyncio.to_thread(auth.verify_id_token, token)
+        self._entries[key] = claims
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return claims
+
+    async def start(self):
+        """Start refreshing the signing certificates. Called once from the application lifespan."""
+        if self._refresh_task or not settings.AUTH_TOKEN_CACHE_ENABLED:
+            return
+        self._refresh_task = asyncio.create_task(self._refresh_loop(), name="auth-cert-refresh")
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self._refresh_certificates)
+            except Exception as e:
+                logger.warning(f"Could not refresh Firebase signing certificates: {e}")
+            await asyncio.sleep(settings.AUTH_CERT_REFRESH_SECONDS)
+
+    @staticmethod
+    def _refresh_certificates():
+        """
+        Re-fetch the signing certificates through the verifier's own cached HTTP session.
+
+        no-cache bypasses the stored copy and stores the new response, so its
+        max-age restarts and verifications keep reading certificates from
+        memory.
+        """
+        verifier = auth._get_client(firebase_admin.get_app())._token_verifier
+        response = verifier.request(url=ID_TOKEN_CERT_URI, method="GET", headers={"Cache-Control": "no-cache"})
+        if response.status != 200:
+            raise RuntimeError(f"certificate endpoint returned HTTP {response.status}")
+
+
+# Global token cache instance (Singleton pattern)
+verified_token_cache = VerifiedTokenCache()
@@ -0,0 +1,224 @@
+import importlib.util
+from abc import ABC, abstractmethod
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from deep_translator import GoogleTranslator
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# FLORES-200 codes used by NLLB for the supported languages
+NLLB_CODES = {
+    'hi': 'hin_Deva',
+    'ta': 'tam_Taml',
+    'te': 'tel_Telu',
+    'bn': 'ben_Beng',
+    'mr': 'mar_Deva',
+    'en': 'eng_Latn',
+    'es': 'spa_Latn',
+    'fr': 'fra_Latn',
+    'de': 'deu_Latn',
+    'zh': 'zho_Hans',
+}
+
+
+class TranslationBackend(ABC):
+    """
+    A machine-translation engine used by TranslationService.
+
+    Backends translate chunks of sentences; splitting, caching and
+    reassembly are done by TranslationService.
+    """
+
+    name = ""
+    # Whether translate() needs the source language (otherwise it is detected by the provider)
+    needs_source_language = False
+
+    def supports(self, source_language: Optional[str], target_language: str) -> bool:
+        return True
+
+    def model_id(self, source_language: Optional[str], target_language: str) -> str:
+        """Identifier of the engine/model translating a pair (part of a stored translation's key)."""
+        return self.name
+
+    @abstractmethod
+    def translate(self, sentences: List[str], source_language: Optional[str], target_language: str) -> List[str]:
+        """
+        Translate sentences.
+
+        Args:
+            sentences: Sentences to translate (each within TRANSLATION_CHUNK_CHARS)
+            source_language: Source language code, if known
+            target_language: Target language code
+
+        Returns:
+            One translation per sentence, in order
+        """
+
+    def shutdown(self):
+        """Release the engine's resources (worker processes, models)."""
+
+
+class GoogleTranslateBackend(TranslationBackend):
+    """Google Translate through deep_translator (remote, source language auto-detected)."""
+
+    name = "google"
+
+    def __init__(self):
+        # One GoogleTranslator per target language and thread (translators keep per-request state)
+        self._local = threading.local()
+
+    def translate(self, sentences: List[str], source_language: Optional[str], target_language: str) -> List[str]:
+        """
+        Translate a chunk of sentences in one request.
+
+        Sentences are sent one per line. If the provider merges or splits
+        lines, they are translated one by one instead.
+        """
+        translator = self._translator(target_language)
+        lines = [line.strip() for line in (translator.translate("\n".join(sentences)) or "").split("\n")]
+        lines = [line for line in lines if line]
+        if len(lines) != len(sentences):
+            lines = [translator.translate(sentence) or sentence for sentence in sentences]
+        return lines
+
+    def _translator(self, target_language: str) -> GoogleTranslator:
+        translators = getattr(self._local, "translators", None)
+        if translators is None:
+            translators = self._local.translators = {}
+        if target_language not in translators:
+            translators[target_language] = GoogleTranslator(source='auto', target=target_language)
+        return translators[target_language]
+
+
+class LocalTranslateBackend(TranslationBackend):
+    """
+    Offline translation with CTranslate2-converted models, on the CPU.
+
+    Models live under TRANSLATION_MODEL_DIR: a MarianMT model per language
+    pair (`opus-mt-<src>-<tgt>/`, with its source.spm/target.spm) is used
+    when present, otherwise a multilingual NLLB model (`nllb/`, with its
+    sentencepiece.bpe.model) covering every supported pair. Inference runs
+    batched in worker processes (TRANSLATION_LOCAL_WORKERS), each loading a
+    model the first time a pair needs it and keeping it for later calls.
+    Needs the optional ctranslate2 and sentencepiece packages.
+    """
+
+    name = "local"
+    needs_source_language = True
+
+    def __init__(self, model_dir: str = None):
+        self.model_dir = model_dir or settings.TRANSLATION_MODEL_DIR
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    @staticmethod
+    def installed() -> bool:
+        return all(importlib.util.find_spec(module) for module in ("ctranslate2", "sentencepiece"))
+
+    def model_for(self, source_language: Optional[str], target_language: str) -> Optional[Tuple[str, str]]:
+        """
+        Model serving a language pair.
+
+        Returns:
+            (model path, "marian" | "nllb"), or None if no model covers the pair
+        """
+        if not source_language:
+            return None
+        marian = os.path.join(self.model_dir, f"opus-mt-{source_language}-{target_language}")
+        if os.path.isdir(marian):
+            return marian, "marian"
+        nllb = os.path.join(self.model_dir, "nllb")
+        if os.path.isdir(nllb) and source_language in NLLB_CODES and target_language in NLLB_CODES:
+            return nllb, "nllb"
+        return None
+
+    def supports(self, source_language: Optional[str], target_language: str) -> bool:
+        return source_language == target_language or self.model_for(source_language, target_language) is not None
+
+    def model_id(self, source_language: Optional[str], target_language: str) -> str:
+        model = self.model_for(source_language, target_language)
+        return f"{self.name}:{os.path.basename(model[0])}" if model else self.name
+
+    def translate(self, sentences: List[str], source_language: Optional[str], target_language: str) -> List[str]:
+        if source_language == target_language:
+            return list(sentences)
+        model = self.model_for(source_language, target_language)
+        if model is None:
+            raise ValueError(f"No local translation model for {source_language}->{target_language}")
+        path, kind = model
+        return self._executor().submit(
+            translate_in_worker, path, kind, sentences,
+            NLLB_CODES.get(source_language), NLLB_CODES.get(target_language),
+            settings.TRANSLATION_LOCAL_THREADS, settings.TRANSLATION_LOCAL_BEAM_SIZE, settings.TRANSLATION_LOCAL_BATCH_SIZE,
+        ).result()
+
+    def shutdown(self):
+        """Stop the worker processes (they are started again on the next translation)."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: never fork the server process (event loop, DB pools, threads)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=settings.TRANSLATION_LOCAL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+
+# Models loaded in this (worker) process: path -> (translator, source tokenizer, target tokenizer)
+_worker_models: Dict[str, tuple] = {}
+
+
+def translate_in_worker(path: str, kind: str, sentences: List[str], source_code: Optional[str],
+                        target_code: Optional[str], threads: int, beam_size: int, batch_size: int) -> List[str]:
+    """Batched translation of sentences with a CTranslate2 model (runs in a worker process)."""
+    if path not in _worker_models:
+        import ctranslate2
+        import sentencepiece
+
+        translator = ctranslate2.Translator(path, device="cpu", intra_threads=threads)
+        if kind == "nllb":
+            source_sp = target_sp = sentencepiece.SentencePieceProcessor(
+                model_file=os.path.join(path, "sentencepiece.bpe.model"))
+        else:
+            source_sp = sentencepiece.SentencePieceProcessor(model_file=os.path.join(path, "source.spm"))
+            target_sp = sentencepiece.SentencePieceProcessor(model_file=os.path.join(path, "target.spm"))
+        _worker_models[path] = (translator, source_sp, target_sp)
+    translator, source_sp, target_sp = _worker_models[path]
+
+    tokens = [source_sp.encode(sentence, out_type=str) + ["</s>"] for sentence in sentences]
+    target_prefix = None
+    if kind == "nllb":
+        # NLLB: source language token first, target language token forced as the first output token
+        tokens = [[source_code] + sentence_tokens for sentence_tokens in tokens]
+        target_prefix = [[target_code]] * len(tokens)
+    results = translator.translate_batch(
+        tokens, target_prefix=target_prefix, beam_size=beam_size, max_batch_size=batch_size
+    )
+    skip = 1 if kind == "nllb" else 0
+    return [target_sp.decode(result.hypotheses[0][skip:]) for result in results]
+
+
+def get_translation_backend(name: str = None) -> TranslationBackend:
+    """
+    Build the configured backend (TRANSLATION_BACKEND), falling back to Google if the local engine isn't installed.
+    """
+    name = name or settings.TRANSLATION_BACKEND
+    if name == "local":
+        if LocalTranslateBackend.installed():
+            return LocalTranslateBackend()
+        logger.warning("Local translation needs the ctranslate2 and sentencepiece packages; using Google Translate")
+    elif name != "google":
+        logger.warning(f"Unknown translation backend {name!r}; using Google Translate")
+    return GoogleTranslateBackend()
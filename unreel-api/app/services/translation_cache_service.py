@@ -0,0 +1,109 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Translation
+from app.services.blob_store_service import encode_blob, decode_blob
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def source_hash(text: str) -> str:
+    """Content key of a text to translate."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    Stored translations keyed by (source text hash, target language, translator).
+
+    Translations are persisted in the translations table, so a transcript
+    is sent to a translation engine once per target language, ever. The
+    translator (TranslationService.translator_id) is part of the key, so a
+    different backend or model translates afresh instead of being served
+    another engine's output. An
+    in-process LRU of the most recent translations sits on top, so repeat
+    requests don't even read the table.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or settings.TRANSLATION_CACHE_SIZE
+        self._entries: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+
+    async def get(self, db: AsyncSession, text: str, target_language: str, translator: str) -> Optional[str]:
+        """
+        Look up a stored translation.
+
+        Args:
+            db: Database session
+            text: Source text
+            target_language: Target language code
+            translator: Engine/model that would translate it
+
+        Returns:
+            Translated text, or None if that translator never translated it to that language
+        """
+        key = (source_hash(text), target_language, translator)
+        translated = self._entries.get(key)
+        if translated is not None:
+            self._entries.move_to_end(key)
+            return translated
+
+        row = (await db.execute(
+            select(Translation.codec, Translation.data)
+            .where(
+                Translation.sourceHash == key[0],
+                Translation.targetLanguage == target_language,
+                Translation.translator == translator,
+            )
+        )).first()
+        if row is None:
+            return None
+        translated = decode_blob(row.codec, row.data)
+        self._remember(key, translated)
+        return translated
+
+    async def put(self, db: AsyncSession, text: str, target_language: str, translator: str, translated: str,
+                  analysis_id: Optional[str] = None):
+        """
+        Store a translation and commit (best effort: a failed write only costs a later re-translation).
+
+        Args:
+            db: Database session
+            text: Source text
+            target_language: Target language code
+            translator: Engine/model that translated it
+            translated: Translated text
+            analysis_id: Analysis the text belongs to, if any
+        """
+        key = (source_hash(text), target_language, translator)
+        self._remember(key, translated)
+        codec, _, data = encode_blob(translated)
+        try:
+            await db.merge(Translation(
+                sourceHash=key[0], targetLanguage=target_language, translator=translator,
+                analysisId=analysis_id, codec=codec, data=data,
+            ))
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Could not store {target_language} translation for analysis {analysis_id}: {e}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def _remember(self, key: Tuple[str, str, str], translated: str):
+        self._entries[key] = translated
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# Global translation cache instance (Singleton pattern)
+translation_cache = TranslationCache()
@@ -1,8 +1,14 @@
 import logging
-from typing import Optional, Dict, List
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Tuple
 from langdetect import detect, DetectorFactory
 from langdetect.lang_detect_exception import LangDetectException
-from deep_translator import GoogleTranslator
+
+from app.core.config import settings
+from app.services.translation_backends import GoogleTranslateBackend, TranslationBackend, get_translation_backend
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -10,6 +16,56 @@ logger = logging.getLogger(__name__)
 # Set seed for consistent language detection results
 DetectorFactory.seed = 0
 
+# Line breaks, whitespace after sentence-ending punctuation (Latin, Devanagari danda),
+# or the point right after full-width CJK punctuation (no space follows it)
+SENTENCE_BREAK = re.compile(r'\s*\n\s*|(?<=[.!?\u0964])\s+|(?<=[\u3002\uff01\uff1f])\s*')
+
+# Target languages written without spaces between sentences
+UNSPACED_LANGUAGES = {'zh'}
+
+
+
+def split_sentences(text: str, max_chars: int) -> List[Tuple[str, str]]:
+    """
+    Split text into sentences no longer than max_chars.
+
+    Sentences over the limit are cut at the last space before it (or hard
+    cut if there is none).
+
+    Returns:
+        (sentence, separator) pairs; joining them back gives the text with
+        its line breaks (runs of other whitespace become one space)
+    """
+    sentences = []
+    start = 0
+    for match in list(SENTENCE_BREAK.finditer(text)) + [None]:
+        end = match.start() if match else len(text)
+        separator = ("\n" if "\n" in match.group() else " " if match.group() else "") if match else ""
+        sentence = text[start:end].strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars + 1)
+            cut = cut if cut > 0 else max_chars
+            sentences.append((sentence[:cut].strip(), " "))
+            sentence = sentence[cut:].strip()
+        if sentence:
+            sentences.append((sentence, separator))
+        start = match.end() if match else len(text)
+    return sentences
+
+
+def pack_chunks(sentences: List[str], max_chars: int) -> List[List[str]]:
+    """Group consecutive sentences into chunks of at most max_chars once newline-joined."""
+    chunks, chunk, size = [], [], 0
+    for sentence in sentences:
+        if chunk and size + 1 + len(sentence) > max_chars:
+            chunks.append(chunk)
+            chunk, size = [], 0
+        size += len(sentence) + (1 if chunk else 0)
+        chunk.append(sentence)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
 class TranslationService:
     """Service for language detection and translation of video transcripts."""
     
@@ -27,8 +83,21 @@ class TranslationService:
         'zh': 'Chinese'
     }
     
-    def __init__(self):
-        """Initialize the TranslationService."""
+    def __init__(self, backend: TranslationBackend = None):
+        """
+        Initialize the TranslationService.
+        
+        Args:
+            backend: Translation engine (defaults to TRANSLATION_BACKEND)
+        """
+        self.backend = backend or get_translation_backend()
+        # Pairs the configured backend can't serve (e.g. no local model) go to Google Translate
+        self.fallback_backend = None if isinstance(self.backend, GoogleTranslateBackend) else GoogleTranslateBackend()
+        # Sentence translations, shared by every text (song lyrics and stock phrases recur across videos),
+        # keyed by (backend, source language, target language, sentence): engines differ in output, and the
+        # same sentence reads differently depending on the language it was detected as
+        self._segments: "OrderedDict[Tuple[str, Optional[str], str, str], str]" = OrderedDict()
+        self._segments_lock = threading.Lock()
         logger.info("Translation service initialized")
     
     def detect_language(self, text: str) -> Optional[str]:
@@ -60,6 +129,11 @@ class TranslationService:
         """
         Translate text to the target language.
         
+        The text is split at sentence boundaries. Sentences already translated
+        (in this text or an earlier one) come from the segment cache; the rest
+        are packed into chunks within the provider's size limit and translated
+        concurrently, then everything is reassembled in order.
+        
         Args:
             text: Text to translate
             target_language: Target language code
@@ -76,14 +150,90 @@ class TranslationService:
             return None
             
         try:
-            translator = GoogleTranslator(source='auto', target=target_language)
-            translated_text = translator.translate(text)
-            logger.info(f"Translated text to {target_language}")
+            backend, source_language = self._select_backend(text, target_language)
+            
+            sentences = split_sentences(text, settings.TRANSLATION_CHUNK_CHARS)
+            translations = {}
+            pending = []
+            for sentence, _ in sentences:
+                if sentence in translations:
+                    continue
+                cached = self._cached_segment((backend.name, source_language, target_language, sentence))
+                translations[sentence] = cached
+                if cached is None:
+                    pending.append(sentence)
+            
+            chunks = pack_chunks(pending, settings.TRANSLATION_CHUNK_CHARS)
+            if len(chunks) > 1:
+                with ThreadPoolExecutor(max_workers=min(settings.TRANSLATION_CONCURRENCY, len(chunks))) as pool:
+                    results = list(pool.map(
+                        lambda chunk: self._translate_chunk(backend, chunk, source_language, target_language), chunks
+                    ))
+            else:
+                results = [self._translate_chunk(backend, chunk, source_language, target_language) for chunk in chunks]
+            for chunk, translated in zip(chunks, results):
+                translations.update(zip(chunk, translated))
+            
+            # Line breaks are kept; sentences are otherwise spaced the way the target language is written
+            gap = "" if target_language in UNSPACED_LANGUAGES else " "
+            parts = []
+            for sentence, separator in sentences:
+                parts += [translations[sentence], "\n" if separator == "\n" else gap]
+            translated_text = "".join(parts).strip()
+            logger.info(
+                f"Translated text to {target_language} with {backend.name} ({len(sentences)} sentences, "
+                f"{len(pending)} new, {len(chunks)} chunks)"
+            )
             return translated_text
         except Exception as e:
             logger.error(f"Translation failed: {str(e)}")
             return None
     
+    def translator_id(self, text: str, target_language: str) -> str:
+        """
+        Identify the engine/model that translates a text to a language.
+        
+        Args:
+            text: Text to translate
+            target_language: Target language code
+            
+        Returns:
+            Translator identifier (e.g. "google", "local:opus-mt-en-es"), part of stored translations' key
+        """
+        backend, source_language = self._select_backend(text, target_language)
+        return backend.model_id(source_language, target_language)
+    
+    def _select_backend(self, text: str, target_language: str) -> Tuple[TranslationBackend, Optional[str]]:
+        """Backend translating a text (the fallback when the configured one can't serve the pair) and its source language."""
+        backend = self.backend
+        source_language = None
+        if backend.needs_source_language:
+            source_language = (self.detect_language(text) or "").split("-")[0] or None
+            if not backend.supports(source_language, target_language) and self.fallback_backend:
+                logger.info(f"No {backend.name} model for {source_language}->{target_language}, using {self.fallback_backend.name}")
+                backend = self.fallback_backend
+        return backend, source_language
+    
+    def _translate_chunk(self, backend: TranslationBackend, sentences: List[str],
+                         source_language: Optional[str], target_language: str) -> List[str]:
+        """Translate a chunk of sentences with a backend and cache each sentence's translation."""
+        lines = backend.translate(sentences, source_language, target_language)
+        with self._segments_lock:
+            for sentence, line in zip(sentences, lines):
+                key = (backend.name, source_language, target_language, sentence)
+                self._segments[key] = line
+                self._segments.move_to_end(key)
+            while len(self._segments) > settings.TRANSLATION_SEGMENT_CACHE_SIZE:
+                self._segments.popitem(last=False)
+        return lines
+    
+    def _cached_segment(self, key: Tuple[str, Optional[str], str, str]) -> Optional[str]:
+        with self._segments_lock:
+            translated = self._segments.get(key)
+            if translated is not None:
+                self._segments.move_to_end(key)
+            return translated
+    
     def get_supported_languages(self) -> Dict[str, str]:
         """
         Get the list of supported languages.
@@ -91,4 +241,10 @@ class TranslationService:
         Returns:
             Dictionary of language codes and their names
         """
-        return self.SUPPORTED_LANGUAGES.copy()
\ No newline at end of file
+        return self.SUPPORTED_LANGUAGES.copy()
+    
+    def shutdown(self):
+        """Release the backends' resources (local translation worker processes). Called on application shutdown."""
+        self.backend.shutdown()
+        if self.fallback_backend:
+            self.fallback_backend.shutdown()
\ No newline at end of file
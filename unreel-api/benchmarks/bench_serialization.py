@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark analysis response serialization.
+
+Compares FastAPI's default path for POST /api/v1/analyze (validate the
+returned dict against AnalysisResponse, serialize the model, then
+json.dumps) with FastJSONResponse (serialize the already shaped dict
+directly), across response sizes.
+
+Usage:
+    python benchmarks/bench_serialization.py [--iterations 200]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import schemas
+from app.core.responses import FastJSONResponse, orjson
+
+# (label, transcript characters, items per lens, search results per item)
+SIZES = [
+    ("small", 2_000, 2, 3),
+    ("medium", 20_000, 8, 5),
+    ("large", 200_000, 25, 10),
+]
+
+
+def search_results(count):
+    return [
+        {"title": f"Result {i}", "link": f"https://example.com/{i}", "snippet": "Lorem ipsum dolor sit amet. " * 6}
+        for i in range(count)
+    ]
+
+
+def make_payload(transcript_chars, items, results):
+    """An AnalysisService.to_response-shaped payload of the given size."""
+    return {
+        "analysisId": "3f2c9a4e-0000-4000-8000-000000000000",
+        "originalUrl": "https://www.instagram.com/reel/example/",
+        "status": "completed",
+        "metadata": {"title": "Example video", "uploader": "creator", "caption": "Caption #tags"},
+        "content": {
+            "summary": "A summary of the video. " * 20,
+            "translation": None,
+            "keyTopics": [f"topic {i}" for i in range(8)],
+            "mentionedResources": [{"type": "tool", "name": f"Resource {i}"} for i in range(items)],
+            "locationContext": {"sceneType": "kitchen", "landmark": None, "confidence": 0.8},
+            "educationalInsights": [f"Step {i}: do the thing." for i in range(items)],
+            "shoppingItems": [
+                {"name": f"Item {i}", "description": "A product.", "potentialUrl": None,
+                 "resolvedUrl": f"https://shop.example.com/{i}", "searchResults": search_results(results)}
+                for i in range(items)
+            ],
+            "factCheck": [
+                {"claim": f"Claim {i}", "verdict": "Supported", "confidence": 0.9,
+                 "explanation": "Because the sources agree. " * 4, "sources": ["https://example.com/src"]}
+                for i in range(items)
+            ],
+            "enhancedResources": [
+                {"name": f"Link {i}", "type": "link", "urlSuggestion": None, "detectiveLogic": "Link in bio",
+                 "resolvedUrl": None, "searchResults": search_results(results)}
+                for i in range(items)
+            ],
+            "musicContext": {"songName": "Song", "artist": "Artist", "musicLink": None, "isTrending": False},
+        },
+        "availableFeatures": {"location": True, "shopping": True, "factCheck": True},
+        "fullTranscript": ("word " * (transcript_chars // 5)).strip(),
+        "detectedLanguage": "en",
+        "supportedLanguages": {"en": "English", "es": "Spanish", "fr": "French", "hi": "Hindi"},
+        "createdAt": datetime(2025, 1, 1, 12, 0, 0, 123456),
+    }
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    field = create_response_field(name="Response_create_analysis", type_=schemas.AnalysisResponse)
+    loop = asyncio.new_event_loop()
+
+    def validated(payload):
+        content = loop.run_until_complete(serialize_response(field=field, response_content=payload))
+        return JSONResponse(content).body
+
+    def fast(payload):
+        return FastJSONResponse(payload).body
+
+    print(f"Encoder: {'orjson ' + orjson.__version__ if orjson else 'stdlib json (orjson not installed)'}")
+    print(f"{'size':<8}{'bytes':>10}{'validated ms':>15}{'fast ms':>10}{'speedup':>10}")
+    for label, transcript_chars, items, results in SIZES:
+        payload = make_payload(transcript_chars, items, results)
+        size = len(fast(payload))
+        slow_ms = timed(lambda: validated(payload), args.iterations)
+        fast_ms = timed(lambda: fast(payload), args.iterations)
+        print(f"{label:<8}{size:>10}{slow_ms:>15.3f}{fast_ms:>10.3f}{slow_ms / fast_ms:>9.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark translation backends.
+
+Translates the same multi-sentence transcript with each backend through
+TranslationService (sentence chunking, parallel chunks) and reports
+throughput. Every run uses a fresh service, so the segment cache never
+answers; "cold" includes model loading for the local backend (worker
+process start and model load), "warm" reuses the loaded model.
+
+The local backend needs ctranslate2, sentencepiece and converted models
+under TRANSLATION_MODEL_DIR; the Google backend needs network access.
+
+Usage:
+    python benchmarks/bench_translation.py [--sentences 200] [--source en] [--target es] [--backends google local]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.translation_backends import GoogleTranslateBackend, LocalTranslateBackend
+from app.services.translation_service import TranslationService
+
+SUBJECTS = ["the recipe", "this trail", "the camera", "our budget", "the new phone", "that song"]
+TEMPLATES = [
+    "Today we are going to look at {subject} in detail, step {i}.",
+    "Honestly, {subject} surprised me more than I expected, part {i}.",
+    "If you want to try {subject} yourself, remember tip number {i}.",
+]
+
+
+def make_transcript(sentences):
+    """Distinct sentences (nothing repeats, so the segment cache cannot help)."""
+    return " ".join(
+        TEMPLATES[i % len(TEMPLATES)].format(subject=SUBJECTS[i % len(SUBJECTS)], i=i) for i in range(sentences)
+    )
+
+
+def run(backend, text, source, target):
+    service = TranslationService(backend=backend)
+    # Skip language detection: the source is known here
+    service.detect_language = lambda _: source
+    started = time.perf_counter()
+    translated = service.translate_text(text, target)
+    elapsed = time.perf_counter() - started
+    if not translated:
+        raise RuntimeError("translation failed (see log)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sentences", type=int, default=200)
+    parser.add_argument("--source", default="en")
+    parser.add_argument("--target", default="es")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--backends", nargs="+", default=["google", "local"], choices=["google", "local"])
+    args = parser.parse_args()
+
+    text = make_transcript(args.sentences)
+    print(f"{args.sentences} sentences, {len(text)} chars, {args.source}->{args.target}")
+    print(f"{'backend':<10}{'cold s':>10}{'warm s':>10}{'sent/s':>10}{'chars/s':>12}")
+    for name in args.backends:
+        if name == "local":
+            backend = LocalTranslateBackend()
+            if not backend.installed():
+                print(f"{name:<10}skipped: pip install ctranslate2 sentencepiece")
+                continue
+            if not backend.supports(args.source, args.target):
+                print(f"{name:<10}skipped: no model for {args.source}->{args.target} under {backend.model_dir}")
+                continue
+        else:
+            backend = GoogleTranslateBackend()
+
+        try:
+            cold = run(backend, text, args.source, args.target)
+            warm = statistics.median(run(backend, text, args.source, args.target) for _ in range(args.runs))
+        except Exception as e:
+            print(f"{name:<10}failed: {e}")
+            continue
+        finally:
+            if isinstance(backend, LocalTranslateBackend):
+                backend.shutdown()
+        print(f"{name:<10}{cold:>10.2f}{warm:>10.2f}{args.sentences / warm:>10.1f}{len(text) / warm:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
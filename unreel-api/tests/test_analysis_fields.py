@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for sparse fieldsets on analysis reads.
+"""
+
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.analysis_service import AnalysisService, BASE_COLUMNS
+
+
+class StrictAnalysis:
+    """Analysis stand-in that fails on any column that was not loaded, like an unloaded load_only attribute."""
+
+    def __init__(self, columns, **values):
+        self._columns = set(columns) | {"id"}
+        self._values = values
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name not in self._columns:
+            raise AssertionError(f"Column {name} was not loaded")
+        return self._values.get(name)
+
+
+class TestSparseFieldsets(unittest.TestCase):
+    """Test cases for AnalysisService.parse_fields/columns_for/to_response."""
+
+    def test_parse_fields(self):
+        """Top-level fields and content sub-fields are parsed; unknown ones are rejected."""
+        self.assertIsNone(AnalysisService.parse_fields(None))
+        self.assertEqual(
+            AnalysisService.parse_fields("metadata, content.summary,content.factCheck"),
+            {"metadata": None, "content": {"summary", "factCheck"}},
+        )
+        self.assertEqual(AnalysisService.parse_fields("content.summary,content"), {"content": None})
+        for bad in ["secrets", "metadata.title", "content.nope"]:
+            with self.assertRaises(ValueError):
+                AnalysisService.parse_fields(bad)
+
+    def test_columns_for_selection(self):
+        """Only the columns behind the selected fields are loaded."""
+        selection = AnalysisService.parse_fields("metadata,content.factCheck")
+        self.assertEqual(
+            AnalysisService.columns_for(selection),
+            BASE_COLUMNS + ["title", "uploader", "caption", "factCheck"],
+        )
+        # The transcript is a blob, not a column
+        self.assertNotIn("fullTranscript", AnalysisService.columns_for(None))
+        self.assertEqual(AnalysisService.blobs_for(None), ["fullTranscript"])
+        self.assertEqual(AnalysisService.blobs_for(selection), [])
+
+    def test_to_response_touches_only_selected_columns(self):
+        """Rendering a selection never reads columns outside it."""
+        selection = AnalysisService.parse_fields("content.summary")
+        analysis = StrictAnalysis(
+            AnalysisService.columns_for(selection),
+            id="a1", originalUrl="https://example.com/v", status="completed",
+            createdAt=datetime(2025, 1, 1), summary="A summary.",
+        )
+        response = AnalysisService.to_response(analysis, selection)
+        self.assertEqual(response["content"], {"summary": "A summary."})
+        self.assertNotIn("fullTranscript", response)
+        self.assertNotIn("supportedLanguages", response)
+
+
+if __name__ == "__main__":
+    unittest.main()
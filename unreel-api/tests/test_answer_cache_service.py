@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the semantic chat answer cache.
+"""
+
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.answer_cache_service import ChatAnswerCache
+from app.services.ai_service import CHAT_FALLBACK_REPLY
+from app.services.embedding_service import embed_text
+
+
+def history_db(*rows):
+    """Fake session whose chat history query returns the given (message, persona, reply) rows, newest first."""
+    db = MagicMock()
+    records = [SimpleNamespace(message=m, persona=p, reply=r) for m, p, r in rows]
+    db.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=records)))
+    return db
+
+
+class TestChatAnswerCache(unittest.IsolatedAsyncioTestCase):
+    """Test cases for ChatAnswerCache."""
+
+    def setUp(self):
+        self.cache = ChatAnswerCache()
+        self.db = history_db(
+            ("Where was this filmed?", None, "In Lisbon."),
+            ("What song is this", None, "Blinding Lights."),
+        )
+
+    async def test_exact_hit_ignores_case_and_punctuation(self):
+        """Normalized message plus persona is an exact hit."""
+        self.assertEqual(await self.cache.lookup(self.db, "a1", "what SONG is this??"), "Blinding Lights.")
+
+    async def test_near_hit_and_miss(self):
+        """Close rewordings hit; questions asking something else do not."""
+        self.assertEqual(await self.cache.lookup(self.db, "a1", "where was this video filmed"), "In Lisbon.")
+        self.assertIsNone(await self.cache.lookup(self.db, "a1", "when was this filmed"))
+        self.assertIsNone(await self.cache.lookup(self.db, "a1", "what is the recipe"))
+
+    async def test_partial_and_cached_replies_not_seeded(self):
+        """Replies cut short mid-stream, and repeats served from the cache, are left out of the history query."""
+        await self.cache.lookup(self.db, "a1", "What song is this")
+        query = str(self.db.execute.call_args[0][0])
+        self.assertIn("chat_messages.complete IS true", query)
+        self.assertIn("chat_messages.cached IS false", query)
+
+    async def test_persona_must_match(self):
+        """Replies given under one persona are not reused for another."""
+        self.assertIsNone(await self.cache.lookup(self.db, "a1", "What song is this", persona="pirate"))
+        self.cache.remember("a1", "What song is this", "pirate", "Arr, Blinding Lights.")
+        self.assertEqual(await self.cache.lookup(self.db, "a1", "what song is this", persona="Pirate"),
+                         "Arr, Blinding Lights.")
+
+    async def test_history_loaded_once_and_fallback_skipped(self):
+        """History is seeded on first lookup only, and failure replies are never served."""
+        db = history_db(("Is this real?", None, CHAT_FALLBACK_REPLY))
+        self.assertIsNone(await self.cache.lookup(db, "a2", "Is this real?"))
+        await self.cache.lookup(db, "a2", "Is this real?")
+        self.assertEqual(db.execute.await_count, 1)
+
+    def test_embeddings_are_normalized_and_stable(self):
+        """Vectors are unit length and identical across calls."""
+        vector = embed_text("where was this filmed")
+        self.assertAlmostEqual(float(vector @ vector), 1.0, places=5)
+        self.assertTrue((vector == embed_text("Where was this filmed?")).all())
+        self.assertEqual(float(embed_text("").sum()), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Unit tests for batch URL canonicalization and batch status.
+"""
+
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services import batch_service
+from app.services.batch_service import BatchService, canonicalize_url
+
+
+class TestCanonicalizeUrl(unittest.TestCase):
+    """Test cases for canonicalize_url."""
+
+    def test_instagram_variants_deduplicate(self):
+        """Share links, tracking params and /reels/ map to one URL."""
+        variants = [
+            "https://www.instagram.com/reel/DQ6sUBGEks8/",
+            "https://instagram.com/reel/DQ6sUBGEks8?igsh=abc123",
+            "HTTPS://www.Instagram.com/reels/DQ6sUBGEks8/#comments",
+        ]
+        canonical = {canonicalize_url(url) for url in variants}
+        self.assertEqual(canonical, {"https://instagram.com/reel/DQ6sUBGEks8"})
+
+    def test_youtube_keeps_video_id(self):
+        """The video id survives while tracking parameters are dropped."""
+        self.assertEqual(
+            canonicalize_url("https://youtu.be/abc123?si=share"),
+            canonicalize_url("https://m.youtube.com/watch?v=abc123&utm_source=x"),
+        )
+        self.assertNotEqual(
+            canonicalize_url("https://youtube.com/watch?v=abc123"),
+            canonicalize_url("https://youtube.com/watch?v=xyz789"),
+        )
+
+
+class TestBatchStatus(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the items returned by create_batch and get_batch."""
+
+    async def test_created_batch_matches_batch_status(self):
+        urls = [
+            "https://www.instagram.com/reel/DQ6sUBGEks8/",
+            "https://youtu.be/abc123",
+            "https://instagram.com/reel/DQ6sUBGEks8?igsh=abc123",
+        ]
+        db = MagicMock(add_all=MagicMock(), commit=AsyncMock())
+        job_service = MagicMock(running=True, has_capacity=MagicMock(return_value=True))
+        with patch.object(batch_service, "get_job_service", return_value=job_service):
+            created = await BatchService().create_batch(db, urls, "u1", {})
+        self.assertEqual(created["total"], 2)
+        self.assertEqual([item["url"] for item in created["items"]].count(urls[0]), 1)
+        self.assertNotIn(urls[2], [item["url"] for item in created["items"]])
+        self.assertEqual([item["url"] for item in created["items"]], urls[:2])
+
+        added = db.add_all.call_args[0][0]
+        self.assertEqual([a.batchPosition for a in added], [0, 1])
+        rows = [SimpleNamespace(id=a.id, originalUrl=a.originalUrl, status=a.status) for a in added]
+        db.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=rows)))
+        self.assertEqual(await BatchService().get_batch(db, created["batchId"], "u1"), created)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit tests for compressed analysis blobs.
+"""
+
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services import blob_store_service
+from app.services.blob_store_service import (
+    BlobStore, encode_blob, decode_blob, extract_rag_results, merge_rag_results
+)
+
+TRANSCRIPT = "so in this video we are going to look at the new trail " * 200
+
+
+class TestBlobCodec(unittest.TestCase):
+    """Test cases for encode_blob/decode_blob."""
+
+    def test_round_trip_zlib_fallback(self):
+        """Without zstandard, blobs are zlib-compressed and still decode."""
+        with patch.object(blob_store_service, "zstandard", None):
+            codec, size, data = encode_blob(TRANSCRIPT)
+        self.assertEqual(codec, "zlib")
+        self.assertEqual(size, len(TRANSCRIPT) + 2)
+        self.assertLess(len(data), size // 10)
+        self.assertEqual(decode_blob(codec, data), TRANSCRIPT)
+
+    def test_small_values_stored_as_is(self):
+        codec, _, data = encode_blob({"chunks": []})
+        self.assertEqual(codec, "identity")
+        self.assertEqual(decode_blob(codec, data), {"chunks": []})
+        with self.assertRaises(ValueError):
+            decode_blob("lz77", data)
+
+
+class TestRagResults(unittest.TestCase):
+    """Test cases for splitting raw RAG output off lens items."""
+
+    def test_extract_and_merge(self):
+        """Raw results leave the lens items and are put back per item."""
+        results = [{"title": "Mug", "link": "https://shop.example.com/mug"}]
+        items = [
+            {"name": "Mug", "resolvedUrl": "https://shop.example.com/mug", "searchResults": results},
+            {"name": "Pan", "resolvedUrl": None, "searchResults": None},
+        ]
+        lenses = {"shoppingItems": items, "factCheck": [{"claim": "x", "verdict": "Supported"}], "enhancedResources": None}
+        extracted = extract_rag_results(lenses)
+        self.assertEqual(extracted, {"shoppingItems": [{"searchResults": results}, None]})
+        self.assertNotIn("searchResults", items[0])
+        merged = merge_rag_results(items, extracted["shoppingItems"])
+        self.assertEqual(merged[0]["searchResults"], results)
+        self.assertIs(merged[1], items[1])
+        self.assertIs(merge_rag_results(items, None), items)
+
+
+class TestBlobStore(unittest.IsolatedAsyncioTestCase):
+    """Test cases for BlobStore."""
+
+    async def test_load_many_decodes_rows(self):
+        rows = [
+            SimpleNamespace(analysisId=analysis_id, kind="fullTranscript", codec=codec, data=data, archivePath=None)
+            for analysis_id, (codec, _, data) in [("a1", encode_blob(TRANSCRIPT)), ("a2", encode_blob("short"))]
+        ]
+        db = MagicMock(execute=AsyncMock(return_value=MagicMock(all=MagicMock(return_value=rows))))
+        blobs = await BlobStore().load_many(db, ["a1", "a2", "a3"], ["fullTranscript"])
+        self.assertEqual(blobs, {"a1": {"fullTranscript": TRANSCRIPT}, "a2": {"fullTranscript": "short"}})
+        self.assertEqual(await BlobStore().load(db, "a1", []), {})
+
+    async def test_stage_skips_missing_values(self):
+        db = MagicMock(execute=AsyncMock())
+        await BlobStore().stage(db, "a1", {"fullTranscript": TRANSCRIPT, "ragResults": None})
+        rows = db.add_all.call_args[0][0]
+        self.assertEqual([row.kind for row in rows], ["fullTranscript"])
+        self.assertEqual(decode_blob(rows[0].codec, rows[0].data), TRANSCRIPT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Unit tests for paginated chat history.
+"""
+
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import Base
+from app.models import ChatMessage
+from app.routers.chat_router import _chat_page_query
+
+
+class TestChatHistoryPages(unittest.TestCase):
+    """Test cases for the keyset chat page query."""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(self.engine)
+        start = datetime(2025, 5, 1, 12, 0)
+        with Session(self.engine) as session:
+            # m3 and m4 share a timestamp: the id breaks the tie
+            times = [start, start + timedelta(seconds=1), start + timedelta(seconds=2),
+                     start + timedelta(seconds=3), start + timedelta(seconds=3)]
+            session.add_all(
+                ChatMessage(id=f"m{i}", analysisId="a1", message="q", reply="r", createdAt=created_at)
+                for i, created_at in enumerate(times)
+            )
+            session.add(ChatMessage(id="other", analysisId="a2", message="q", reply="r", createdAt=start))
+            session.commit()
+
+    def test_pages_walk_back_through_thread(self):
+        pages = []
+        with self.engine.connect() as connection:
+            before = None
+            while True:
+                rows = connection.execute(_chat_page_query("a1", 2, before)).all()
+                if not rows:
+                    break
+                pages.append([row.id for row in rows])
+                before = (rows[-1].createdAt, rows[-1].id)
+        self.assertEqual(pages, [["m4", "m3"], ["m2", "m1"], ["m0"]])
+
+    def test_page_served_from_composite_index(self):
+        """The thread is read in index order: no sort of the analysis' messages."""
+        query = _chat_page_query("a1", 50).compile(self.engine, compile_kwargs={"literal_binds": True})
+        with self.engine.connect() as connection:
+            plan = " ".join(row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {query}")))
+        self.assertIn("ix_chat_messages_analysisId_createdAt", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
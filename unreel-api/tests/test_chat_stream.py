@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for persisting streamed chat replies.
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import anyio
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import schemas
+from app.core.config import settings
+from app.routers import chat_router
+from app.services.ai_service import AiService
+from app.services.resource_pools import llm_pool
+
+
+class TestChatStreamDisconnect(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the partial-reply save when the client goes away."""
+
+    async def test_partial_reply_saved_when_stream_cancelled(self):
+        saved = []
+
+        async def save_chat_message(analysis_id, message, reply, persona=None, **kwargs):
+            # A real save awaits the database several times; each await would see the cancellation
+            await asyncio.sleep(0.01)
+            await asyncio.sleep(0.01)
+            saved.append({"analysisId": analysis_id, "reply": reply, **kwargs})
+            return "m1"
+
+        async def chat_with_video_stream(*args, **kwargs):
+            yield "The video shows "
+            await asyncio.Event().wait()  # the model is still generating when the client leaves
+
+        analysis_service = MagicMock()
+        analysis_service.ai_service.chat_with_video_stream = chat_with_video_stream
+        request = schemas.ChatRequest(analysisId="a1", message="What is this video about?")
+        first_token = anyio.Event()
+
+        async def consume():
+            async for _ in chat_router._chat_event_stream(request, "context"):
+                first_token.set()
+
+        with patch.object(chat_router, "AnalysisService", return_value=analysis_service), \
+                patch.object(chat_router, "_save_chat_message", save_chat_message):
+            # Starlette cancels the response's task group when the client disconnects
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(consume)
+                await first_token.wait()
+                task_group.cancel_scope.cancel()
+            await asyncio.gather(*chat_router._pending_saves)
+
+        self.assertEqual(len(saved), 1)
+        self.assertEqual((saved[0]["analysisId"], saved[0]["reply"]), ("a1", "The video shows "))
+        self.assertIs(saved[0]["complete"], False)
+
+    async def test_partial_reply_marked_incomplete_when_generation_fails(self):
+        saved = []
+
+        async def save_chat_message(analysis_id, message, reply, persona=None, **kwargs):
+            saved.append({"reply": reply, **kwargs})
+            return "m1"
+
+        async def chat_with_video_stream(*args, **kwargs):
+            yield "The video shows "
+            raise RuntimeError("stream reset")
+
+        analysis_service = MagicMock()
+        analysis_service.ai_service.chat_with_video_stream = chat_with_video_stream
+        request = schemas.ChatRequest(analysisId="a1", message="What is this video about?")
+        with patch.object(chat_router, "AnalysisService", return_value=analysis_service), \
+                patch.object(chat_router, "_save_chat_message", save_chat_message):
+            events = [event async for event in chat_router._chat_event_stream(request, "context")]
+
+        self.assertTrue(events[-1].startswith("event: error"))
+        self.assertEqual(saved, [{"reply": "The video shows ", "complete": False}])
+
+
+    async def test_cached_answer_saved_as_cache_hit(self):
+        saved = []
+
+        async def save_chat_message(analysis_id, message, reply, persona=None, **kwargs):
+            saved.append({"reply": reply, **kwargs})
+            return "m1"
+
+        request = schemas.ChatRequest(analysisId="a1", message="What song is this?")
+        with patch.object(chat_router, "_save_chat_message", save_chat_message):
+            events = [event async for event in chat_router._cached_chat_event_stream(request, "Blinding Lights.")]
+
+        self.assertTrue(events[-1].startswith("event: done"))
+        self.assertEqual(saved, [{"reply": "Blinding Lights.", "cached": True}])
+
+
+class TestChatStreamLLMSlot(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the LLM slot held by a streamed reply."""
+
+    async def test_slot_released_before_slow_client_reads_the_reply(self):
+        async def stream():
+            for text in ["The video ", "shows ", "a recipe."]:
+                yield SimpleNamespace(text=text)
+
+        model = MagicMock(generate_content_async=AsyncMock(return_value=stream()))
+        service = AiService()
+        with patch.object(service, "_prepare_chat", AsyncMock(return_value=(model, "prompt"))):
+            reply = service.chat_with_video_stream("context", "What is this video about?")
+            self.assertEqual(await reply.__anext__(), "The video ")
+            # The client has read one fragment; generation finishes without waiting for it
+            for _ in range(10):
+                await asyncio.sleep(0)
+            self.assertEqual(llm_pool._value, settings.LLM_CONCURRENCY)
+            self.assertEqual([fragment async for fragment in reply], ["shows ", "a recipe."])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Unit tests for negotiated response compression.
+"""
+
+import unittest
+import sys
+import os
+import gzip
+from unittest.mock import patch
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+
+BODY = b'{"fullTranscript":"' + b"so this is the part where " * 200 + b'"}'
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    async def large():
+        return Response(BODY, media_type="application/json", headers={"ETag": '"a1-3"'})
+
+    @app.get("/small")
+    async def small():
+        return Response(b'{"ok":true}', media_type="application/json")
+
+    @app.get("/events")
+    async def events():
+        async def stream():
+            yield b"data: " + b"x" * 2000 + b"\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+class TestNegotiation(unittest.TestCase):
+    """Test cases for negotiate_encoding."""
+
+    def test_negotiation(self):
+        with patch.object(compression, "available_encodings", return_value=["zstd", "br", "gzip"]):
+            self.assertEqual(negotiate_encoding("gzip, deflate, br, zstd"), "zstd")
+            self.assertEqual(negotiate_encoding("gzip;q=1.0, br;q=0.5"), "gzip")
+            self.assertEqual(negotiate_encoding("*"), "zstd")
+            self.assertIsNone(negotiate_encoding("identity"))
+            self.assertIsNone(negotiate_encoding("gzip;q=0"))
+            self.assertIsNone(negotiate_encoding(None))
+        with patch.object(compression, "available_encodings", return_value=["gzip"]):
+            self.assertEqual(negotiate_encoding("br, gzip;q=0.1"), "gzip")
+
+
+class TestCompressionMiddleware(unittest.IsolatedAsyncioTestCase):
+    """Test cases for CompressionMiddleware."""
+
+    async def asyncSetUp(self):
+        transport = httpx.ASGITransport(app=make_app())
+        self.client = httpx.AsyncClient(transport=transport, base_url="http://test")
+        self.headers = {"Accept-Encoding": "gzip"}
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_large_json_is_compressed(self):
+        """Large JSON bodies are gzipped, with Vary and a weak ETag."""
+        response = await self.client.get("/large", headers=self.headers)
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        self.assertEqual(response.headers["etag"], 'W/"a1-3"')
+        self.assertLess(int(response.headers["content-length"]), len(BODY))
+        self.assertEqual(response.content, BODY)
+
+    async def test_compressed_body_cached_per_etag(self):
+        """A response with an ETag is compressed once and then served from the cache."""
+        with patch.object(compression, "compress", wraps=compression.compress) as compress:
+            for _ in range(3):
+                response = await self.client.get("/large", headers=self.headers)
+                self.assertEqual(response.content, BODY)
+            self.assertEqual(compress.call_count, 1)
+
+    async def test_small_and_streaming_bodies_pass_through(self):
+        """Bodies under the threshold and event streams are never compressed."""
+        response = await self.client.get("/small", headers=self.headers)
+        self.assertNotIn("content-encoding", response.headers)
+        response = await self.client.get("/events", headers=self.headers)
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertTrue(response.text.startswith("data: xxx"))
+
+    async def test_no_accept_encoding(self):
+        response = await self.client.get("/large", headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(response.content, BODY)
+        self.assertEqual(gzip.decompress(compression.compress(BODY, "gzip")), BODY)
+
+
+if __name__ == "__main__":
+    unittest.main()
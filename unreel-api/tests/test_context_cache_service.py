@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Gemini chat context cache registry.
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services import context_cache_service
+from app.services.context_cache_service import ChatContextCache
+
+
+class FakeCachedContent:
+    created = 0
+
+    def __init__(self, name):
+        self.name = name
+
+    @classmethod
+    def create(cls, **kwargs):
+        cls.created += 1
+        return cls(f"cachedContents/{cls.created}")
+
+
+class TestChatContextCache(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the ChatContextCache class."""
+
+    def setUp(self):
+        FakeCachedContent.created = 0
+        patches = [
+            mock.patch.object(context_cache_service.caching, "CachedContent", FakeCachedContent),
+            mock.patch.object(context_cache_service.genai.GenerativeModel, "from_cached_content",
+                              side_effect=lambda cached_content: f"model:{cached_content.name}"),
+            mock.patch.object(context_cache_service.settings, "CHAT_CONTEXT_CACHE_MIN_TOKENS", 0),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def test_reuses_cache_until_context_changes(self):
+        """Repeated turns reuse one cache; a changed context gets a new one."""
+        cache = ChatContextCache()
+        first = await cache.get_model("a1", "system", "transcript")
+        second = await cache.get_model("a1", "system", "transcript")
+        self.assertEqual(first, "model:cachedContents/1")
+        self.assertEqual(first, second)
+
+        with mock.patch.object(cache, "_delete", mock.AsyncMock()) as delete:
+            updated = await cache.get_model("a1", "system", "transcript + new lens")
+        self.assertEqual(updated, "model:cachedContents/2")
+        delete.assert_called_once_with("cachedContents/1")
+
+    async def test_expired_cache_is_recreated(self):
+        """Entries past their TTL are transparently recreated."""
+        cache = ChatContextCache()
+        await cache.get_model("a1", "system", "transcript")
+        cache._entries["a1"]["expiresAt"] -= context_cache_service.timedelta(days=1)
+        with mock.patch.object(cache, "_delete", mock.AsyncMock()):
+            model = await cache.get_model("a1", "system", "transcript")
+        self.assertEqual(model, "model:cachedContents/2")
+
+    async def test_failed_creation_falls_back(self):
+        """A creation failure returns None and is not retried on every turn."""
+        cache = ChatContextCache()
+        with mock.patch.object(FakeCachedContent, "create", side_effect=RuntimeError("quota exceeded")) as create:
+            self.assertIsNone(await cache.get_model("a1", "system", "transcript"))
+            self.assertIsNone(await cache.get_model("a1", "system", "transcript"))
+        self.assertEqual(create.call_count, 1)
+
+    async def test_small_context_never_sent_to_cache(self):
+        """Contexts estimated below the minimum cacheable size skip the API call."""
+        cache = ChatContextCache()
+        with mock.patch.object(context_cache_service.settings, "CHAT_CONTEXT_CACHE_MIN_TOKENS", 1024), \
+                mock.patch.object(FakeCachedContent, "create") as create:
+            self.assertIsNone(await cache.get_model("a1", "system", "short transcript " * 100))
+            create.assert_not_called()
+            self.assertIsNotNone(await cache.get_model("a1", "system", "long transcript " * 300))
+        create.assert_called_once()
+        self.assertEqual(create.call_args.kwargs["model"], context_cache_service.settings.GEMINI_MODEL)
+
+
+if __name__ == "__main__":
+    unittest.main()
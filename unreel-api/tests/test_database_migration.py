@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the versioned migration ledger.
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine, event, select
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import database_migration
+from app.database_migration import MIGRATIONS, run_migrations, schema_migrations, schema_version
+
+
+class TestMigrationLedger(unittest.TestCase):
+    """Test cases for run_migrations."""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        self.steps = [MagicMock(), MagicMock()]
+        self.patches = [
+            patch.object(database_migration, "engine", self.engine),
+            patch.object(database_migration, "MIGRATIONS", [(1, "first", self.steps[0]), (2, "second", self.steps[1])]),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_versions_ordered_and_unique(self):
+        versions = [version for version, _, _ in MIGRATIONS]
+        self.assertEqual(versions, sorted(set(versions)))
+        self.assertEqual(MIGRATIONS[0][1], "create_tables")
+
+    def test_applies_pending_migrations_once(self):
+        self.assertEqual(schema_version(), 0)
+        run_migrations()
+        run_migrations()
+        for step in self.steps:
+            step.assert_called_once_with()
+        self.assertEqual(schema_version(), 2)
+        with self.engine.connect() as connection:
+            self.assertEqual(list(connection.execute(select(schema_migrations.c.name))), [("first",), ("second",)])
+
+    def test_current_schema_costs_one_query(self):
+        """Once everything is applied, boot runs a single version check."""
+        run_migrations()
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        run_migrations()
+        self.assertEqual(len(statements), 1)
+
+    def test_failed_migration_retried_on_next_boot(self):
+        self.steps[1].side_effect = RuntimeError("boom")
+        with self.assertRaises(RuntimeError):
+            run_migrations()
+        self.assertEqual(schema_version(), 1)
+        self.steps[1].side_effect = None
+        run_migrations()
+        self.steps[0].assert_called_once_with()
+        self.assertEqual(schema_version(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the background analysis job service and progress tracker.
+"""
+
+import asyncio
+import unittest
+import sys
+import os
+import shutil
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models import Analysis
+from app.routers import analysis_router
+from app.services import job_service
+from app.services.analysis_service import AnalysisService
+from app.services.media_service import MediaService
+from app.services.job_service import JobService, QueueFullError
+from app.services.progress_service import ProgressTracker, progress_tracker
+
+
+class TestProgressTracker(unittest.TestCase):
+    """Test cases for the ProgressTracker class."""
+
+    def test_stage_updates(self):
+        """Stages advance and keep their start time."""
+        tracker = ProgressTracker()
+        first = tracker.update("a1", "queued")
+        tracker.update("a1", "analyzing")
+        entry = tracker.get("a1")
+        self.assertEqual(entry["stage"], "analyzing")
+        self.assertEqual(entry["startedAt"], first["startedAt"])
+        self.assertFalse(tracker.is_finished("a1"))
+
+        tracker.update("a1", "failed", error="boom")
+        self.assertTrue(tracker.is_finished("a1"))
+        self.assertIsNone(tracker.get("a1")["stageIndex"])
+        self.assertEqual(tracker.get("a1")["detail"]["error"], "boom")
+
+    def test_bounded_size(self):
+        """Oldest entries are evicted once the tracker is full."""
+        tracker = ProgressTracker(max_entries=2)
+        for analysis_id in ("a", "b", "c"):
+            tracker.update(analysis_id, "queued")
+        self.assertIsNone(tracker.get("a"))
+        self.assertIsNotNone(tracker.get("c"))
+
+    def test_event_replay(self):
+        """Subscribers receive events published after their Last-Event-ID."""
+        tracker = ProgressTracker()
+        tracker.update("a1", "downloading")
+        tracker.publish("a1", "summary", {"summary": "A cooking reel"})
+
+        queue = tracker.subscribe("a1", last_event_id=1)
+        tracker.publish("a1", "lens", {"lens": "locationContext", "data": {"sceneType": "Kitchen"}})
+        events = [queue.get_nowait()["event"] for _ in range(queue.qsize())]
+        self.assertEqual(events, ["summary", "lens"])
+
+        tracker.unsubscribe("a1", queue)
+        tracker.publish("a1", "stage", {"stage": "completed"})
+        self.assertTrue(queue.empty())
+
+    def test_payloads_copied_and_dropped_when_finished(self):
+        """Published payloads don't follow later mutations, and finished analyses keep only stage events."""
+        tracker = ProgressTracker()
+        tracker.update("a1", "enriching")
+        items = [{"claim": "Water boils at 100C", "searchEvidence": ["..."]}]
+        tracker.publish("a1", "enrichment", {"lens": "factCheck", "data": items})
+        items[0].pop("searchEvidence")
+        queue = tracker.subscribe("a1")
+        records = [queue.get_nowait() for _ in range(queue.qsize())]
+        self.assertIn("searchEvidence", records[-1]["data"]["data"][0])
+
+        tracker.update("a1", "completed")
+        replay = tracker.subscribe("a1")
+        events = [replay.get_nowait() for _ in range(replay.qsize())]
+        self.assertEqual([record["event"] for record in events], ["stage", "stage"])
+        self.assertEqual(events[-1]["id"], 3)
+
+
+class TestJobService(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the JobService class."""
+
+    async def asyncSetUp(self):
+        self.release = asyncio.Event()
+        self.started = []
+        self.service = JobService(concurrency=1, max_depth=2)
+
+        async def fake_run_job(analysis_id, options):
+            self.started.append(analysis_id)
+            await self.release.wait()
+
+        self.service._run_job = fake_run_job
+        self.service.fail_interrupted = AsyncMock(return_value=0)
+        await self.service.start()
+
+    async def asyncTearDown(self):
+        await self.service.stop()
+
+    async def wait_for_jobs(self, count):
+        for _ in range(100):
+            if len(self.started) >= count:
+                return
+            await asyncio.sleep(0.01)
+        self.fail(f"Only {len(self.started)} of {count} jobs started")
+
+    async def test_queue_depth_limit(self):
+        """Jobs beyond the maximum depth are rejected while workers are busy."""
+        self.service.submit("job-1", {})
+        await self.wait_for_jobs(1)  # worker is now busy with job-1
+        self.service.submit("job-2", {})
+        self.service.submit("job-3", {})
+        self.assertFalse(self.service.has_capacity())
+        with self.assertRaises(QueueFullError):
+            self.service.submit("job-4", {})
+
+        self.release.set()
+        await self.wait_for_jobs(3)
+        self.assertEqual(self.started, ["job-1", "job-2", "job-3"])
+        self.assertEqual(progress_tracker.get("job-2")["stage"], "queued")
+
+    async def test_round_robin_between_owners(self):
+        """A second owner's job is not stuck behind another owner's backlog."""
+        self.service.max_depth = 10
+        self.service.submit("busy", {}, owner="batch-user")
+        await self.wait_for_jobs(1)
+        for i in range(3):
+            self.service.submit(f"batch-{i}", {}, owner="batch-user")
+        self.service.submit("single", {}, owner="other-user")
+
+        self.release.set()
+        await self.wait_for_jobs(5)
+        self.assertEqual(self.started, ["busy", "batch-0", "single", "batch-1", "batch-2"])
+
+    async def test_interrupted_analyses_failed_at_start(self):
+        """Rows left processing by a previous run are failed and their cached responses dropped."""
+        service = JobService(concurrency=1)
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = ["old-1", "old-2"]
+        db = MagicMock(execute=AsyncMock(return_value=result), commit=AsyncMock())
+        session = MagicMock(return_value=MagicMock(__aenter__=AsyncMock(return_value=db), __aexit__=AsyncMock()))
+        with patch.object(job_service, "AsyncSessionLocal", session), \
+                patch.object(job_service.response_cache, "invalidate") as invalidate:
+            self.assertEqual(await service.fail_interrupted(), 2)
+        statement = str(db.execute.call_args[0][0])
+        self.assertIn("UPDATE analyses SET status", statement)
+        db.commit.assert_awaited_once()
+        self.assertEqual([c.args for c in invalidate.call_args_list], [("analysis", "old-1"), ("analysis", "old-2")])
+
+    async def test_heartbeat_keeps_owned_processing_analyses(self):
+        """Owned analyses get heartbeats until they stop processing; other workers' stale rows are failed."""
+        service = JobService(concurrency=1)
+        analyses = [Analysis(id=f"own-{i}", originalUrl="u", status="processing") for i in range(2)]
+        for analysis in analyses:
+            service.claim(analysis)
+        self.assertEqual({a.workerId for a in analyses}, {job_service.WORKER_ID})
+
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = ["own-0"]  # own-1 has completed meanwhile
+        db = MagicMock(execute=AsyncMock(return_value=result), commit=AsyncMock())
+        session = MagicMock(return_value=MagicMock(__aenter__=AsyncMock(return_value=db), __aexit__=AsyncMock()))
+        with patch.object(job_service, "AsyncSessionLocal", session):
+            await service.send_heartbeat()
+            self.assertEqual(service._owned, {"own-0"})
+            self.assertIn('"heartbeatAt"', str(db.execute.call_args[0][0]))
+
+            result.scalars.return_value.all.return_value = []
+            await service.fail_interrupted()
+        statement = str(db.execute.call_args[0][0])
+        self.assertIn("coalesce(analyses.\"heartbeatAt\", analyses.\"updatedAt\")", statement)
+        self.assertIn("analyses.\"workerId\" !=", statement)
+
+
+class TestAnalysisEventStream(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the SSE stream of analyses this process does not track."""
+
+    async def test_untracked_processing_analysis_ends_stream(self):
+        events = [event async for event in analysis_router._analysis_event_stream("untracked", "processing", MagicMock(), None)]
+        self.assertEqual(len(events), 1)
+        self.assertIn('"stage": "unknown"', events[0])
+
+
+class TestDownloadProgress(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the download event published from inside the media pipeline."""
+
+    async def test_download_published_before_transcription(self):
+        media_service = MediaService.__new__(MediaService)  # skip loading Whisper
+        media_service._download_with_fallbacks = AsyncMock(return_value=({"title": "Trail run"}, "native"))
+        seen_while_transcribing = []
+
+        def extract_media(video_path, audio_path, temp_dir):
+            seen_while_transcribing.append(progress_tracker.get("dl-1")["stage"])
+            return None, [], "", []
+
+        media_service._extract_media = extract_media
+        queue = progress_tracker.subscribe("dl-1")
+        try:
+            result = await media_service.process_video(
+                "https://example.com/v", on_downloaded=lambda metadata, tier: AnalysisService._publish_download(
+                    "dl-1", metadata, tier)
+            )
+        finally:
+            progress_tracker.unsubscribe("dl-1", queue)
+        shutil.rmtree(result["temp_dir"])
+        self.assertEqual(seen_while_transcribing, ["transcribing"])
+        download = queue.get_nowait()
+        self.assertEqual((download["event"], download["data"]["tier"]), ("download", "native"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Unit tests for tsvector-backed keyword search.
+"""
+
+import unittest
+import sys
+import os
+
+from sqlalchemy import bindparam
+from sqlalchemy.dialects import postgresql
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.keyword_search_service import (
+    text_search_config, search_document, search_query, escape_headline
+)
+
+
+def compile_pg(clause):
+    return str(clause.compile(dialect=postgresql.dialect()))
+
+
+class TestKeywordSearch(unittest.TestCase):
+    """Test cases for the keyword search SQL builders."""
+
+    def test_language_to_config(self):
+        self.assertEqual(text_search_config("es"), "spanish")
+        self.assertEqual(text_search_config("EN"), "english")
+        self.assertEqual(text_search_config("zh-cn"), "simple")
+        self.assertEqual(text_search_config(None), "simple")
+
+    def test_document_weights_and_configs(self):
+        """Summary is stemmed as English, the rest in the video's language, plus an unstemmed transcript copy."""
+        transcript = bindparam("transcript")
+        sql = compile_pg(search_document("spanish", transcript))
+        self.assertIn("to_tsvector('english'::regconfig, coalesce(analyses.summary", sql)
+        self.assertIn("to_tsvector('spanish'::regconfig, coalesce(%(transcript)s", sql)
+        self.assertIn("to_tsvector('simple'::regconfig, coalesce(%(transcript)s", sql)
+        # Already unstemmed: no second transcript copy
+        self.assertEqual(compile_pg(search_document("simple", transcript)).count("%(transcript)s"), 1)
+
+    def test_query_is_constant(self):
+        """Configurations are literals, so the GIN index applies; only the user's text is a parameter."""
+        sql = compile_pg(search_query("pasta recipe", "fr"))
+        for config in ("english", "simple", "french"):
+            self.assertIn(f"websearch_to_tsquery('{config}'::regconfig", sql)
+        self.assertEqual(compile_pg(search_query("pasta", "xx")).count("websearch_to_tsquery('"), 2)
+
+    def test_headline_escaped(self):
+        self.assertEqual(
+            escape_headline("a <script>x</script> <mark>pasta</mark> & more"),
+            "a &lt;script&gt;x&lt;/script&gt; <mark>pasta</mark> &amp; more",
+        )
+        self.assertIsNone(escape_headline(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
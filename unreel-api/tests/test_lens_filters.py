@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Unit tests for JSONB lens columns, their indexes and the lens history filters.
+"""
+
+import unittest
+import sys
+import os
+
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import Base
+from app.models import Analysis, FEATURE_FLAGS, feature_flag_clause
+
+
+def compile_pg(clause):
+    return str(clause.compile(dialect=postgresql.dialect()))
+
+
+class TestLensIndexes(unittest.TestCase):
+    """Test cases for the lens column types and indexes."""
+
+    def test_lens_columns_are_jsonb_on_postgres(self):
+        for column in ("availableFeatures", "factCheck", "shoppingItems", "keyTopics"):
+            self.assertEqual(Analysis.__table__.c[column].type.compile(dialect=postgresql.dialect()), "JSONB")
+
+    def test_filter_matches_partial_index_predicate(self):
+        """The history filter renders exactly the partial index predicate, so the planner can use it."""
+        indexes = {index.name: index for index in Analysis.__table__.indexes}
+        for flag in FEATURE_FLAGS:
+            ddl = compile_pg(CreateIndex(indexes[f"ix_analyses_feature_{flag}"]))
+            query = compile_pg(select(Analysis.id).where(feature_flag_clause(flag)))
+            predicate = ddl.split(" WHERE ", 1)[1]
+            self.assertIn(predicate, query)
+        self.assertIn("USING gin", compile_pg(CreateIndex(indexes["ix_analyses_factCheck_gin"])))
+
+    def test_unknown_flag_rejected(self):
+        with self.assertRaises(ValueError):
+            feature_flag_clause("shopping') OR (1=1")
+
+    def test_postgres_only_indexes_skipped_elsewhere(self):
+        """SQLite gets plain JSON columns and none of the JSONB indexes."""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        names = {index["name"] for index in inspect(engine).get_indexes("analyses")}
+        self.assertIn("ix_analyses_userId_createdAt", names)
+        self.assertFalse(any(name.startswith("ix_analyses_feature_") or name.endswith("_gin") for name in names))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Unit tests for keyset pagination cursors.
+"""
+
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.pagination import encode_cursor, decode_cursor
+
+
+class TestCursor(unittest.TestCase):
+    """Test cases for encode_cursor/decode_cursor."""
+
+    def test_round_trip_keeps_microseconds(self):
+        """The decoded position matches the last row exactly."""
+        created_at = datetime(2025, 3, 14, 9, 26, 53, 589793)
+        cursor = encode_cursor(created_at, "3f2c-row-id")
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor), (created_at, "3f2c-row-id"))
+
+    def test_malformed_cursor_raises_value_error(self):
+        """Garbage cursors are rejected with ValueError (mapped to 400 by the routers)."""
+        for cursor in ["not-a-cursor", "", encode_cursor(datetime(2025, 1, 1), "x")[:-4]]:
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+
+if __name__ == "__main__":
+    unittest.main()
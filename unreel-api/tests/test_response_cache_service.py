@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the serialized response cache and conditional GET helpers.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import Base
+from app.models import Analysis, ChatMessage
+from app.core.http_cache import etag_matches, conditional_json_response
+from app.routers import analysis_router
+from app.services.response_cache_service import ResponseCache, response_cache
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    """Test cases for ResponseCache."""
+
+    async def test_variants_share_one_invalidation(self):
+        """Invalidating a resource drops all of its variants."""
+        cache = ResponseCache(max_bytes=1024, ttl_seconds=60)
+        cache.put("analysis", "a1", "", '"e1"', b'{"full":true}')
+        cache.put("analysis", "a1", "metadata", '"e2"', b'{"metadata":{}}')
+        self.assertEqual((await cache.get("analysis", "a1", "metadata"))["etag"], '"e2"')
+        cache.invalidate("analysis", "a1")
+        self.assertIsNone(await cache.get("analysis", "a1"))
+        self.assertIsNone(await cache.get("analysis", "a1", "metadata"))
+
+    async def test_lru_bounded_by_bytes(self):
+        """The least recently used resources are evicted once the byte budget is exceeded."""
+        cache = ResponseCache(max_bytes=25, ttl_seconds=60)
+        cache.put("analysis", "a1", "", '"1"', b"x" * 10)
+        cache.put("analysis", "a2", "", '"2"', b"x" * 10)
+        await cache.get("analysis", "a1")
+        cache.put("analysis", "a3", "", '"3"', b"x" * 10)
+        self.assertIsNotNone(await cache.get("analysis", "a1"))
+        self.assertIsNone(await cache.get("analysis", "a2"))
+        self.assertIsNotNone(await cache.get("analysis", "a3"))
+
+    async def test_commit_invalidates_written_rows(self):
+        """Committing an Analysis or ChatMessage write drops its cached responses."""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        response_cache.put("analysis", "a1", "", '"e"', b"{}")
+        response_cache.put("chat", "a1", "", '"e"', b"{}")
+
+        with Session(engine) as session:
+            session.add(Analysis(id="a1", originalUrl="https://example.com/v"))
+            session.flush()
+            # Not committed yet: still cached
+            self.assertIsNotNone(await response_cache.get("analysis", "a1"))
+            session.commit()
+            self.assertIsNone(await response_cache.get("analysis", "a1"))
+            self.assertIsNotNone(await response_cache.get("chat", "a1"))
+
+            version = session.get(Analysis, "a1").version
+            session.add(ChatMessage(analysisId="a1", message="hi", reply="hello"))
+            session.get(Analysis, "a1").summary = "Updated"
+            session.commit()
+            self.assertIsNone(await response_cache.get("chat", "a1"))
+            self.assertEqual(session.get(Analysis, "a1").version, version + 1)
+
+    async def test_read_through_skips_renderings_of_superseded_rows(self):
+        """A GET that read the row before a concurrent write committed doesn't cache its stale body."""
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with sessions() as session:
+            session.add(Analysis(id="a9", originalUrl="https://example.com/v", status="completed"))
+            await session.commit()
+
+        async def concurrent_write(db, analysis_id, names):
+            async with sessions() as writer:
+                (await writer.get(Analysis, analysis_id)).summary = "Updated"
+                await writer.commit()
+            return {}
+
+        async with sessions() as db:
+            with patch.object(analysis_router.blob_store, "load", concurrent_write):
+                await analysis_router.get_analysis("a9", fields=None, if_none_match=None, db=db, current_user={})
+            self.assertIsNone(await response_cache.get("analysis", "a9"))
+
+            db.expire_all()
+            await analysis_router.get_analysis("a9", fields=None, if_none_match=None, db=db, current_user={})
+            self.assertIsNotNone(await response_cache.get("analysis", "a9"))
+        await engine.dispose()
+
+    async def test_shared_tier_runs_off_the_event_loop(self):
+        """Redis writes run in the background, in order; reads wait for them."""
+        shared = FakeRedis()
+        cache = ResponseCache(max_bytes=1024, ttl_seconds=60)
+        cache._redis = shared
+        cache.put("analysis", "a1", "", '"e1"', b"{}")
+        cache.invalidate("analysis", "a1")
+        self.assertEqual(shared.calls, [])  # nothing ran on the loop
+        self.assertIsNone(await cache.get("analysis", "a1"))
+        self.assertEqual(shared.calls, ["hset", "delete", "hget"])
+        self.assertNotEqual(shared.threads, {threading.get_ident()})
+
+        other_process = ResponseCache(max_bytes=1024, ttl_seconds=60)
+        other_process._redis = shared
+        cache.put("analysis", "a2", "", '"e2"', b'{"a":2}')
+        await asyncio.sleep(0.1)
+        self.assertEqual(await other_process.get("analysis", "a2"), {"etag": '"e2"', "body": b'{"a":2}'})
+
+
+class FakeRedis:
+    """Blocking in-memory stand-in for redis.Redis (hashes only)."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.calls = []
+        self.threads = set()
+
+    def _record(self, call):
+        time.sleep(0.01)
+        self.calls.append(call)
+        self.threads.add(threading.get_ident())
+
+    def hget(self, key, field):
+        self._record("hget")
+        return self.hashes.get(key, {}).get(field)
+
+    def delete(self, key):
+        self._record("delete")
+        self.hashes.pop(key, None)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def hset(self, key, field, value):
+        self.commands.append((key, field, value))
+
+    def expire(self, key, seconds):
+        pass
+
+    def execute(self):
+        self.client._record("hset")
+        for key, field, value in self.commands:
+            self.client.hashes.setdefault(key, {})[field] = value
+
+
+class TestConditionalGet(unittest.TestCase):
+    """Test cases for If-None-Match handling."""
+
+    def test_etag_matching(self):
+        self.assertTrue(etag_matches('"abc"', '"abc"'))
+        self.assertTrue(etag_matches('"x", W/"abc"', '"abc"'))
+        self.assertTrue(etag_matches("*", '"abc"'))
+        self.assertFalse(etag_matches('"abd"', '"abc"'))
+        self.assertFalse(etag_matches(None, '"abc"'))
+
+    def test_not_modified_response(self):
+        response = conditional_json_response(b'{"a":1}', '"abc"', '"abc"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.body, b"")
+        self.assertEqual(response.headers["etag"], '"abc"')
+        response = conditional_json_response(b'{"a":1}', '"abc"', None)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.body, b'{"a":1}')
+
+
+if __name__ == "__main__":
+    unittest.main()
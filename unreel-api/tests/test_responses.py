@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the fast JSON response path.
+"""
+
+import unittest
+import sys
+import os
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.responses import FastJSONResponse, serialize_json
+from app.services.analysis_service import AnalysisService, CONTENT_FIELDS
+
+
+class TestSerializeJson(unittest.TestCase):
+    """Test cases for serialize_json/FastJSONResponse."""
+
+    def test_matches_default_json_response(self):
+        """Output decodes to the same document FastAPI's JSONResponse produces."""
+        payload = {
+            "createdAt": datetime(2025, 3, 14, 9, 26, 53, 589793),
+            "summary": "Café ☕ — résumé",
+            "keyTopics": ["a", "b"],
+            "confidence": 0.85,
+            "missing": None,
+        }
+        expected = JSONResponse(jsonable_encoder(payload)).body
+        self.assertEqual(json.loads(serialize_json(payload)), json.loads(expected))
+        self.assertEqual(FastJSONResponse(payload).body, serialize_json(payload))
+        self.assertIn("Café ☕".encode("utf-8"), serialize_json(payload))
+
+
+class TestValidateContent(unittest.TestCase):
+    """Test cases for AnalysisService.validate_content."""
+
+    def make_analysis(self, **content):
+        values = {field: None for field in CONTENT_FIELDS}
+        values.update(content)
+        return SimpleNamespace(id="a1", **values)
+
+    def test_content_stored_in_response_shape(self):
+        """Defaults are filled in and unknown keys dropped, as response validation would."""
+        analysis = self.make_analysis(
+            shoppingItems=[{"name": "Mug", "description": "Ceramic mug", "internalScore": 3}],
+            locationContext={"sceneType": "kitchen", "confidence": "0.7"},
+        )
+        AnalysisService.validate_content(analysis)
+        self.assertEqual(analysis.shoppingItems, [{
+            "name": "Mug", "description": "Ceramic mug", "potentialUrl": None,
+            "resolvedUrl": None, "searchResults": None,
+        }])
+        self.assertEqual(analysis.locationContext, {"sceneType": "kitchen", "landmark": None, "confidence": 0.7})
+
+    def test_invalid_content_kept_as_generated(self):
+        """A lens that does not match its schema is stored unchanged."""
+        claims = [{"claim": "The sky is green"}]
+        analysis = self.make_analysis(factCheck=claims, summary="Fine")
+        AnalysisService.validate_content(analysis)
+        self.assertEqual(analysis.factCheck, claims)
+        self.assertEqual(analysis.summary, "Fine")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Unit tests for table partitioning helpers and cold blob archival.
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from datetime import date, datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.services.blob_store_service import BlobStore, encode_blob
+from app.services.retention_service import (
+    RetentionService, add_months, archive_dir_problem, default_partition_ddl, monthly_partitions, partition_ddl
+)
+
+
+class TestPartitions(unittest.TestCase):
+    """Test cases for the monthly partition helpers."""
+
+    def test_add_months_rolls_over_years(self):
+        self.assertEqual(add_months(date(2026, 11, 1), 2), date(2027, 1, 1))
+        self.assertEqual(add_months(date(2026, 1, 15), -1), date(2025, 12, 1))
+
+    def test_monthly_partitions(self):
+        partitions = monthly_partitions("analyses", date(2026, 11, 20), date(2027, 1, 1))
+        self.assertEqual(partitions, [
+            ("analyses_y2026m11", date(2026, 11, 1), date(2026, 12, 1)),
+            ("analyses_y2026m12", date(2026, 12, 1), date(2027, 1, 1)),
+            ("analyses_y2027m01", date(2027, 1, 1), date(2027, 2, 1)),
+        ])
+
+    def test_partition_ddl(self):
+        name, lower, upper = monthly_partitions("chat_messages", date(2026, 10, 1), date(2026, 10, 1))[0]
+        self.assertEqual(
+            partition_ddl("chat_messages", name, lower, upper, parent="chat_messages_partitioned"),
+            'CREATE TABLE IF NOT EXISTS "chat_messages_y2026m10" PARTITION OF "chat_messages_partitioned" '
+            "FOR VALUES FROM ('2026-10-01') TO ('2026-11-01')",
+        )
+        self.assertTrue(default_partition_ddl("analyses").endswith('"analyses_default" PARTITION OF "analyses" DEFAULT'))
+
+
+class TestArchival(unittest.IsolatedAsyncioTestCase):
+    """Test cases for archiving blobs to files and reading them back."""
+
+    async def test_archived_blob_loads_from_file(self):
+        transcript = "we are going to look at the new trail " * 200
+        codec, _, data = encode_blob(transcript)
+        with tempfile.TemporaryDirectory() as archive_dir, patch.object(settings, "ARCHIVE_DIR", archive_dir):
+            row = SimpleNamespace(analysisId="a1", kind="fullTranscript", codec=codec, data=data,
+                                  createdAt=datetime(2025, 3, 9))
+            [path] = RetentionService._write_files([row])
+            self.assertEqual(path, f"2025/03/a1/fullTranscript.{codec}")
+
+            archived = SimpleNamespace(analysisId="a1", kind="fullTranscript", codec=codec, data=b"", archivePath=path)
+            db = MagicMock(execute=AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[archived]))))
+            self.assertEqual(await BlobStore().load(db, "a1", ["fullTranscript"]), {"fullTranscript": transcript})
+
+            os.remove(os.path.join(archive_dir, path))
+            self.assertEqual(await BlobStore().load(db, "a1", ["fullTranscript"]), {})
+
+    async def test_archival_needs_an_absolute_existing_directory(self):
+        self.assertIn("not set", archive_dir_problem(None))
+        self.assertIn("absolute", archive_dir_problem("archive"))
+        with tempfile.TemporaryDirectory() as archive_dir:
+            self.assertIn("does not exist", archive_dir_problem(os.path.join(archive_dir, "missing")))
+            self.assertIsNone(archive_dir_problem(archive_dir))
+
+        with patch.object(settings, "ARCHIVE_DIR", "archive"), \
+                patch("app.services.retention_service.AsyncSessionLocal") as session:
+            self.assertEqual(await RetentionService().archive_cold_blobs(), 0)
+        session.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
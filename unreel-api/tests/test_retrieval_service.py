@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for transcript chunk retrieval used by chat on long videos.
+"""
+
+import unittest
+import sys
+import os
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.retrieval_service import (
+    build_transcript_index,
+    search_transcript_index,
+    format_excerpts,
+)
+
+
+SEGMENTS = [
+    {"start": 0.0, "end": 20.0, "text": "Welcome back to the channel, today we are baking sourdough bread."},
+    {"start": 20.0, "end": 45.0, "text": "First feed your starter and wait until it doubles in size."},
+    {"start": 45.0, "end": 70.0, "text": "Mix flour, water and salt, then knead the dough for ten minutes."},
+    {"start": 70.0, "end": 95.0, "text": "Bake the loaf at 250 degrees in a dutch oven for forty minutes."},
+    {"start": 95.0, "end": 110.0, "text": "Thanks for watching and subscribe for more recipes."},
+]
+
+
+class TestTranscriptRetrieval(unittest.TestCase):
+    """Test cases for the BM25 transcript index."""
+
+    def setUp(self):
+        transcript = " ".join(seg["text"] for seg in SEGMENTS)
+        self.index = build_transcript_index(transcript, SEGMENTS, chunk_chars=40)
+
+    def test_index_keeps_segment_timestamps(self):
+        """Chunks built from Whisper segments carry start/end times."""
+        self.assertEqual(len(self.index["chunks"]), len(SEGMENTS))
+        self.assertEqual(self.index["chunks"][3]["start"], 70.0)
+        self.assertEqual(self.index["chunks"][3]["end"], 95.0)
+
+    def test_search_ranks_relevant_chunk(self):
+        """The chunk sharing the question's terms is retrieved first."""
+        results = search_transcript_index(self.index, "What temperature do I bake the loaf at?", top_k=1)
+        self.assertEqual(len(results), 1)
+        self.assertIn("250 degrees", results[0]["text"])
+
+    def test_results_in_transcript_order(self):
+        """Multiple hits are returned in the order they occur in the video."""
+        results = search_transcript_index(self.index, "starter dough oven", top_k=3)
+        starts = [r["start"] for r in results]
+        self.assertEqual(starts, sorted(starts))
+        self.assertEqual(len(results), 3)
+
+    def test_no_overlap_returns_nothing(self):
+        """Questions without shared terms yield no excerpts."""
+        self.assertEqual(search_transcript_index(self.index, "quantum physics", top_k=3), [])
+
+    def test_untimed_transcript_and_formatting(self):
+        """Plain transcripts are chunked by sentence and formatted without timestamps."""
+        index = build_transcript_index("One sentence here. Another sentence there.", chunk_chars=20)
+        self.assertEqual(len(index["chunks"]), 2)
+        self.assertEqual(format_excerpts(index["chunks"]), "One sentence here.\nAnother sentence there.")
+        self.assertEqual(
+            format_excerpts([{"text": "Bake it.", "start": 70.0, "end": 95.5}]),
+            "[1:10-1:35] Bake it.",
+        )
+        self.assertIsNone(build_transcript_index("   "))
+
+
+if __name__ == "__main__":
+    unittest.main()
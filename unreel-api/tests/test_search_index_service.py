@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the per-user semantic search index.
+"""
+
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.search_index_service import SearchIndex, build_analysis_vectors
+
+
+def make_analysis(analysis_id, summary, topics=None, user_id="u1"):
+    return SimpleNamespace(
+        id=analysis_id, userId=user_id, title=None, caption=None, summary=summary, keyTopics=topics,
+    )
+
+
+ANALYSES = [
+    make_analysis("pasta", "A quick weeknight pasta recipe with garlic and chili.", ["cooking", "pasta recipe"]),
+    make_analysis("hike", "Hiking the Dolomites in autumn, with trail tips.", ["travel", "hiking"]),
+    make_analysis("gpu", "Benchmarking a new graphics card in modern games.", ["hardware", "gaming"]),
+]
+
+# Transcripts are blobs, passed alongside the row
+TRANSCRIPTS = {"gpu": "We test frame rates and ray tracing performance across ten titles."}
+
+# (vector count, newest createdAt) the mocked analysis_embeddings table reports
+STAMP = (7, "t1")
+
+
+class TestSearchIndex(unittest.IsolatedAsyncioTestCase):
+    """Test cases for SearchIndex."""
+
+    async def asyncSetUp(self):
+        self.index = SearchIndex()
+        # Start from an already loaded (empty) index so no database is needed
+        self.index._users["u1"] = self.index._empty()
+        self.index._users["u1"]["stamp"] = STAMP
+        self.result = MagicMock()
+        self.result.one.return_value = STAMP
+        self.db = MagicMock(execute=AsyncMock(return_value=self.result), commit=AsyncMock())
+        for analysis in ANALYSES:
+            await self.index.index_analysis(self.db, analysis, TRANSCRIPTS.get(analysis.id))
+
+    def test_vectors_are_float16_per_kind(self):
+        """Summary, topics and transcript each get compact float16 vectors."""
+        vectors = build_analysis_vectors(ANALYSES[2], TRANSCRIPTS["gpu"])
+        self.assertEqual([kind for kind, _ in vectors], ["summary", "topics", "transcript"])
+        self.assertTrue(all(vector.dtype == np.float16 for _, vector in vectors))
+
+    async def test_search_ranks_matching_analysis_first(self):
+        """The analysis sharing the query's content ranks first."""
+        results = await self.index.search(self.db, "u1", "that pasta recipe")
+        self.assertEqual(results[0]["analysisId"], "pasta")
+        results = await self.index.search(self.db, "u1", "ray tracing frame rates")
+        self.assertEqual(results[0]["analysisId"], "gpu")
+        self.assertEqual(results[0]["matchedOn"], "transcript")
+
+    async def test_reindex_replaces_vectors_incrementally(self):
+        """Re-indexing an analysis swaps its vectors without duplicating it."""
+        await self.index.index_analysis(self.db, make_analysis("hike", "Sourdough bread baking at home."))
+        user_index = self.index._users["u1"]
+        self.assertEqual(sorted(user_index["analysisIds"]), ["gpu", "hike", "pasta"])
+        self.assertEqual(user_index["size"], 6)
+        self.assertEqual(int(user_index["owners"][:user_index["size"]].max()), 2)
+        self.assertEqual((await self.index.search(self.db, "u1", "sourdough bread"))[0]["analysisId"], "hike")
+        self.assertNotIn("hike", [r["analysisId"] for r in await self.index.search(self.db, "u1", "dolomites trail")])
+
+    async def test_appends_reuse_spare_capacity(self):
+        """Appending an analysis fills spare rows instead of reallocating the matrix."""
+        matrix = self.index._users["u1"]["matrix"]
+        self.index.publish(make_analysis("bread", "Sourdough bread baking at home."),
+                           build_analysis_vectors(make_analysis("bread", "Sourdough bread baking at home.")))
+        self.assertIs(self.index._users["u1"]["matrix"], matrix)
+
+    async def test_search_picks_up_vectors_written_elsewhere(self):
+        """Vectors another worker committed are loaded when the table's stamp changes."""
+        bread = make_analysis("bread", "Sourdough bread baking at home.")
+        rows = [
+            SimpleNamespace(analysisId="bread", kind=kind, vector=vector.tobytes())
+            for kind, vector in build_analysis_vectors(bread)
+        ]
+        self.result.one.return_value = (7 + len(rows), "t2")
+        self.result.all.return_value = rows
+        results = await self.index.search(self.db, "u1", "sourdough bread")
+        self.assertEqual(results[0]["analysisId"], "bread")
+        self.assertEqual(self.index._users["u1"]["stamp"], (7 + len(rows), "t2"))
+
+    async def test_unrelated_query_returns_nothing(self):
+        """Results below the minimum score are dropped."""
+        self.assertEqual(await self.index.search(self.db, "u1", "zzzz qqqq"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the verified Firebase ID-token cache.
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import HTTPException
+
+from app.auth import create_stream_token, get_stream_user, verify_stream_token
+from app.core.config import settings
+from app.services import token_cache_service
+from app.services.token_cache_service import VerifiedTokenCache
+
+
+class TestVerifiedTokenCache(unittest.IsolatedAsyncioTestCase):
+    """Test cases for VerifiedTokenCache."""
+
+    def setUp(self):
+        self.verify_id_token = MagicMock(side_effect=lambda token: {"uid": token, "exp": time.time() + 3600})
+        patcher = patch.object(token_cache_service.auth, "verify_id_token", self.verify_id_token)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_token_verified_once(self):
+        cache = VerifiedTokenCache(max_entries=10)
+        claims = await asyncio.gather(*[cache.verify("t1") for _ in range(5)])
+        self.assertEqual(await cache.verify("t1"), claims[0])
+        self.assertEqual(claims[0]["uid"], "t1")
+        self.verify_id_token.assert_called_once_with("t1")
+
+    async def test_expired_token_reverified(self):
+        self.verify_id_token.side_effect = lambda token: {"uid": token, "exp": time.time() - 1}
+        cache = VerifiedTokenCache(max_entries=10)
+        await cache.verify("t1")
+        await cache.verify("t1")
+        self.assertEqual(self.verify_id_token.call_count, 2)
+
+    async def test_failures_not_cached_and_lru_bounded(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        self.verify_id_token.side_effect = ValueError("Token expired")
+        with self.assertRaises(ValueError):
+            await cache.verify("bad")
+        self.verify_id_token.side_effect = lambda token: {"uid": token, "exp": time.time() + 3600}
+        for token in ("t1", "t2", "t3"):
+            await cache.verify(token)
+        self.assertEqual(len(cache._entries), 2)
+        await cache.verify("bad")
+        self.assertEqual(self.verify_id_token.call_count, 5)
+
+
+
+class TestStreamToken(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the ?token= credential of event streams."""
+
+    async def test_token_opens_only_its_analysis(self):
+        token = create_stream_token("user:1", "a1")
+        self.assertEqual(await get_stream_user("a1", token=token, authorization=None), {"uid": "user:1"})
+        with self.assertRaises(HTTPException):
+            verify_stream_token(token, "a2")
+        with self.assertRaises(HTTPException):
+            verify_stream_token(token[:-1] + ("0" if token[-1] != "0" else "1"), "a1")
+
+    async def test_expired_token_rejected(self):
+        with patch.object(settings, "STREAM_TOKEN_TTL_SECONDS", -1):
+            token = create_stream_token("u1", "a1")
+        with self.assertRaises(HTTPException):
+            verify_stream_token(token, "a1")
+        with self.assertRaises(HTTPException):
+            verify_stream_token("garbage", "a1")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for stored transcript translations.
+"""
+
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.blob_store_service import encode_blob
+from app.services.translation_cache_service import TranslationCache, source_hash
+
+TRANSCRIPT = "today we are making a quick pasta with garlic and olive oil " * 40
+TRANSLATED = "hoy vamos a preparar una pasta rápida con ajo y aceite de oliva " * 40
+
+
+def make_db(row=None):
+    return MagicMock(
+        execute=AsyncMock(return_value=MagicMock(first=MagicMock(return_value=row))),
+        merge=AsyncMock(), commit=AsyncMock(), rollback=AsyncMock(),
+    )
+
+
+class TestTranslationCache(unittest.IsolatedAsyncioTestCase):
+    """Test cases for TranslationCache."""
+
+    async def test_miss_then_stored_translation_served_from_memory(self):
+        cache = TranslationCache(max_entries=10)
+        db = make_db()
+        self.assertIsNone(await cache.get(db, TRANSCRIPT, "es", "google"))
+        await cache.put(db, TRANSCRIPT, "es", "google", TRANSLATED, analysis_id="a1")
+        row = db.merge.call_args[0][0]
+        self.assertEqual(
+            (row.sourceHash, row.targetLanguage, row.translator, row.analysisId),
+            (source_hash(TRANSCRIPT), "es", "google", "a1"),
+        )
+        self.assertLess(len(row.data), len(TRANSLATED))
+        db.commit.assert_awaited_once()
+
+        db.execute.reset_mock()
+        self.assertEqual(await cache.get(db, TRANSCRIPT, "es", "google"), TRANSLATED)
+        db.execute.assert_not_called()
+        self.assertIsNone(await cache.get(make_db(), TRANSCRIPT, "fr", "google"))
+
+    async def test_other_translator_misses(self):
+        """Another engine's translation of the same text is not served."""
+        cache = TranslationCache(max_entries=10)
+        await cache.put(make_db(), TRANSCRIPT, "es", "google", TRANSLATED)
+        self.assertIsNone(await cache.get(make_db(), TRANSCRIPT, "es", "local:opus-mt-en-es"))
+
+    async def test_stored_translation_loaded_from_table(self):
+        codec, _, data = encode_blob(TRANSLATED)
+        db = make_db(SimpleNamespace(codec=codec, data=data))
+        self.assertEqual(await TranslationCache().get(db, TRANSCRIPT, "es", "google"), TRANSLATED)
+
+    async def test_failed_write_is_not_fatal(self):
+        cache = TranslationCache(max_entries=1)
+        db = make_db()
+        db.commit.side_effect = RuntimeError("connection lost")
+        await cache.put(db, TRANSCRIPT, "es", "google", TRANSLATED)
+        db.rollback.assert_awaited_once()
+        await cache.put(db, "other text", "es", "google", "otro texto")
+        self.assertEqual(len(cache._entries), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
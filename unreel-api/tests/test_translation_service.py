@@ -6,11 +6,17 @@ Unit tests for the translation service.
 import unittest
 import sys
 import os
+from unittest.mock import patch
 
 # Add the app directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from app.services.translation_service import TranslationService
+from app.core.config import settings
+from app.services import translation_backends
+from app.services.translation_backends import (
+    GoogleTranslateBackend, LocalTranslateBackend, TranslationBackend, get_translation_backend
+)
+from app.services.translation_service import TranslationService, split_sentences, pack_chunks
 
 class TestTranslationService(unittest.TestCase):
     """Test cases for the TranslationService class."""
@@ -71,5 +77,131 @@ class TestTranslationService(unittest.TestCase):
         for lang_code in required_languages:
             self.assertIn(lang_code, supported_languages)
 
+
+class FakeTranslator:
+    """Offline stand-in for GoogleTranslator: upper-cases each line and records requests."""
+    
+    requests = []
+    
+    def __init__(self, source, target):
+        self.target = target
+    
+    def translate(self, text):
+        FakeTranslator.requests.append(text)
+        return "\n".join(f"[{self.target}] {line.upper()}" for line in text.split("\n"))
+
+
+class TestChunkedTranslation(unittest.TestCase):
+    """Test cases for sentence chunking and the segment cache (no network)."""
+    
+    def setUp(self):
+        FakeTranslator.requests = []
+        self.patches = [
+            patch.object(translation_backends, "GoogleTranslator", FakeTranslator),
+            patch.object(settings, "TRANSLATION_CHUNK_CHARS", 40),
+        ]
+        for p in self.patches:
+            p.start()
+        self.translation_service = TranslationService()
+    
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+    
+    def test_split_keeps_limit_and_line_breaks(self):
+        text = "First one. Second one?\nThird!  " + "word " * 20
+        sentences = split_sentences(text, 40)
+        self.assertEqual(sentences[:3], [("First one.", " "), ("Second one?", "\n"), ("Third!", " ")])
+        self.assertTrue(all(len(sentence) <= 40 for sentence, _ in sentences))
+        self.assertEqual(split_sentences("这是中文。好的！", 40), [("这是中文。", ""), ("好的！", "")])
+        chunks = pack_chunks([sentence for sentence, _ in sentences], 40)
+        self.assertTrue(all(len("\n".join(chunk)) <= 40 for chunk in chunks))
+    
+    def test_long_text_translated_in_order(self):
+        text = " ".join(f"Sentence number {i}." for i in range(12))
+        translated = self.translation_service.translate_text(text, "es")
+        self.assertEqual(translated, " ".join(f"[es] SENTENCE NUMBER {i}." for i in range(12)))
+        self.assertGreater(len(FakeTranslator.requests), 1)
+        self.assertTrue(all(len(request) < 5000 for request in FakeTranslator.requests))
+    
+    def test_repeated_sentences_translated_once(self):
+        """A chorus repeated within and across texts is only sent once."""
+        chorus = "We will rock you."
+        self.translation_service.translate_text(f"{chorus} {chorus}\nIntro line.", "fr")
+        self.assertEqual(FakeTranslator.requests, [f"{chorus}\nIntro line."])
+        translated = self.translation_service.translate_text(f"Another intro. {chorus}", "fr")
+        self.assertEqual(translated, "[fr] ANOTHER INTRO. [fr] WE WILL ROCK YOU.")
+        self.assertEqual(FakeTranslator.requests[1:], ["Another intro."])
+    
+    def test_merged_lines_fall_back_to_single_sentences(self):
+        with patch.object(FakeTranslator, "translate", side_effect=["merged", "[de] A.", "[de] B."]):
+            self.assertEqual(self.translation_service.translate_text("A. B.", "de"), "[de] A. [de] B.")
+
+
+class TestTranslationBackends(unittest.TestCase):
+    """Test cases for backend selection and local model resolution (no models loaded)."""
+    
+    def test_local_model_resolution(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as model_dir:
+            backend = LocalTranslateBackend(model_dir)
+            self.assertFalse(backend.supports("hi", "en"))
+            os.makedirs(os.path.join(model_dir, "nllb"))
+            os.makedirs(os.path.join(model_dir, "opus-mt-en-es"))
+            self.assertEqual(backend.model_for("en", "es"), (os.path.join(model_dir, "opus-mt-en-es"), "marian"))
+            self.assertEqual(backend.model_for("hi", "ta"), (os.path.join(model_dir, "nllb"), "nllb"))
+            self.assertIsNone(backend.model_for("ja", "en"))
+            self.assertIsNone(backend.model_for(None, "en"))
+            self.assertEqual(backend.model_id("en", "es"), "local:opus-mt-en-es")
+            self.assertEqual(backend.model_id("hi", "ta"), "local:nllb")
+    
+    def test_unsupported_pair_falls_back_to_google(self):
+        FakeTranslator.requests = []
+        local = LocalTranslateBackend("/nonexistent")
+        with patch.object(translation_backends, "GoogleTranslator", FakeTranslator), \
+                patch.object(local, "translate") as local_translate:
+            service = TranslationService(backend=local)
+            self.assertEqual(service.translate_text("Hello, how are you today?", "es"), "[es] HELLO, HOW ARE YOU TODAY?")
+        local_translate.assert_not_called()
+    
+    def test_segment_cache_is_per_backend_and_source_language(self):
+        """A sentence cached from one backend is not served for another backend or source language."""
+        FakeTranslator.requests = []
+        local = LocalTranslateBackend("/nonexistent")
+        with patch.object(translation_backends, "GoogleTranslator", FakeTranslator), \
+                patch.object(local, "translate", return_value=["Hola a todos."]), \
+                patch.object(local, "supports", return_value=True):
+            service = TranslationService(backend=local)
+            self.assertEqual(service.translate_text("Hello everyone.", "es"), "Hola a todos.")
+            local.supports.return_value = False
+            self.assertEqual(service.translate_text("Hello everyone.", "es"), "[es] HELLO EVERYONE.")
+            local.supports.return_value = True
+            with patch.object(service, "detect_language", return_value="fr"):
+                service.translate_text("Hello everyone.", "es")
+            self.assertEqual(local.translate.call_count, 2)
+
+    def test_backend_selection(self):
+        self.assertIsInstance(get_translation_backend("google"), GoogleTranslateBackend)
+        self.assertIsInstance(get_translation_backend("unknown"), GoogleTranslateBackend)
+        with patch.object(LocalTranslateBackend, "installed", return_value=False):
+            self.assertIsInstance(get_translation_backend("local"), GoogleTranslateBackend)
+        with patch.object(LocalTranslateBackend, "installed", return_value=True):
+            self.assertIsInstance(get_translation_backend("local"), LocalTranslateBackend)
+
+    def test_backends_must_implement_translate(self):
+        class Incomplete(TranslationBackend):
+            name = "incomplete"
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_shutdown_stops_local_workers(self):
+        local = LocalTranslateBackend("/nonexistent")
+        pool = local._executor()
+        TranslationService(backend=local).shutdown()
+        self.assertIsNone(local._pool)
+        with self.assertRaises(RuntimeError):
+            pool.submit(len, "")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file